@@ -0,0 +1,268 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote
+from pymongo import AsyncMongoClient
+import asyncio
+import json
+import time
+import comments_crawler
+import server
+from async_crawler import AsyncCrawler
+from async_http import AsyncSessionPool
+from keyword_engine import KeywordAccumulator
+from scoring import ScoreAccumulator, sentiment_codes
+from server import (ANALYSES_IN_FLIGHT, DOCUMENTS_KEPT, FILTER_PROJECTION, SCORE_HALF_LIFE_HOURS, STOPWORDS,
+                    analysisPayload, cleanComment, collectResults, comment_filter, crawl_queue, filterQuery,
+                    measureStage, rankAccumulatedKeywords, recordStage, result_cache, saveScoreHistory,
+                    sentiment_cache, sentiment_classifier, source_collections, splitClassified)
+from sentiment_dispatcher import AsyncSentimentDispatcher
+
+# 비동기(ASGI) 서버 설정
+# 크롤링/감정 분석 API/MongoDB는 이벤트 루프에서 비동기로 기다리고, 파싱/필터링/키워드 같은 CPU 작업만 고정 크기 스레드 풀에서 실행
+# 분석 하나가 스레드를 붙잡지 않으므로 프로세스 하나로 수백 개의 분석을 동시에 진행 (ASYNC_MAX_ANALYSES를 넘으면 503)
+ASYNC_MAX_ANALYSES = 500
+ASYNC_CPU_WORKERS = 4
+ASYNC_HTTP_CONNECTIONS = 100  # 전체 동시 연결 수 (호스트별로는 comments_crawler.HOST_CONCURRENCY)
+
+
+# 서버가 시작될 때 이벤트 루프 안에서 만드는 비동기 자원
+class AsyncServices:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=ASYNC_CPU_WORKERS, thread_name_prefix='asgi-cpu')
+        self.client = AsyncMongoClient(comments_crawler.MONGO_URI)
+        self.db = self.client['stock_data']
+        self.crawl_pool = AsyncSessionPool(comments_crawler.HOST_CONCURRENCY, ASYNC_HTTP_CONNECTIONS)
+        self.crawler = AsyncCrawler(self.db, self.crawl_pool, self.executor)
+        # 감정 분석 API는 디스패처가 직접 재시도하므로 세션 풀은 재시도하지 않음
+        self.api_pool = AsyncSessionPool(server.SENTIMENT_WORKERS, server.SENTIMENT_WORKERS, max_retries=0)
+        self.dispatcher = AsyncSentimentDispatcher(
+            server.API_URL,
+            server.sentiment_dispatcher.headers,
+            self.api_pool,
+            max_workers=server.SENTIMENT_WORKERS,
+            requests_per_second=server.SENTIMENT_REQUESTS_PER_SECOND
+        )
+        self.analyses = 0
+        self.inflight = {}  # 종목코드 -> 진행 중인 분석 Task (같은 종목 요청 합치기)
+
+    async def close(self):
+        await self.crawl_pool.close()
+        await self.api_pool.close()
+        await self.client.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_cpu(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+
+services = None
+
+
+class TooManyAnalyses(Exception):
+    pass
+
+
+# 크롤링 (CRAWL_MODE가 queue면 작업 큐에 등록하고 비동기로 완료를 기다림)
+async def crawlStock(code, timings=None):
+    source_seconds = {}
+    if server.CRAWL_MODE == 'queue':
+        started = time.perf_counter()
+        task_sources = await services.run_cpu(
+            lambda: {crawl_queue.enqueue(code, source): source for source in comments_crawler.CRAWLERS})
+
+        def done(task_id, status):
+            source_seconds[task_sources[task_id]] = time.perf_counter() - started
+
+        await crawl_queue.wait_async(services.db[crawl_queue.collection.name], list(task_sources),
+                                     server.CRAWL_QUEUE_TIMEOUT, done)
+    else:
+        await services.crawler.crawl_all(code, timings=source_seconds)
+    for source, seconds in source_seconds.items():
+        recordStage('crawling', source, seconds, timings)
+
+
+# server.streamSource와 같음 (cursor에서 server.STREAM_BATCH_SIZE개씩 비동기로 읽고, 금지어/중복 검사는 CPU 스레드에서)
+# 묶음마다 감정 분석해서 scores/keywords 누적기에만 반영하고 필터를 통과한 문서 수 반환
+async def streamSourceAsync(code, source, scores, keywords=None, timings=None):
+    check_empathy = source == 'comments'
+    cursor = services.db[source_collections[source].name].find(
+        filterQuery(code, check_empathy, source), FILTER_PROJECTION).sort('날짜', -1)
+    seen = set()  # 묶음 사이의 중복 검사 (comment_filter.filter 참고)
+    kept = 0
+    seconds = {'filtering': 0.0, 'sentiment': 0.0, 'keywords': 0.0}
+    try:
+        while True:
+            started = time.perf_counter()
+            documents = await cursor.to_list(server.STREAM_BATCH_SIZE)
+            if not documents:
+                break
+            batch = await services.run_cpu(
+                lambda: list(comment_filter.filter(documents, check_empathy, source, code, seen)))
+            seconds['filtering'] += time.perf_counter() - started
+            if not batch:
+                continue
+            kept += len(batch)
+
+            started = time.perf_counter()
+            dates = [] if scores.half_life else None
+            results = await analyzeSentiments(batch, dates)
+            codes = sentiment_codes(results)
+            scores.add(source, codes, dates)
+            seconds['sentiment'] += time.perf_counter() - started
+
+            if keywords is not None:
+                started = time.perf_counter()
+                await services.run_cpu(keywords.add, [content for content, _ in results], codes, source == 'news')
+                seconds['keywords'] += time.perf_counter() - started
+    finally:
+        await cursor.close()
+
+    for stage, stage_seconds in seconds.items():
+        if stage != 'keywords' or keywords is not None:
+            recordStage(stage, source, stage_seconds, timings)
+    DOCUMENTS_KEPT.inc(kept, source=source)
+    return kept
+
+
+# server.analysisComments와 같음 (캐시 조회/저장과 API 요청은 비동기)
+async def analyzeSentiments(documents, row_dates=None):
+    comments = [cleanComment(doc.get('내용', '')) for doc in documents]
+    collection = services.db[sentiment_cache.collection.name]
+    classified = await sentiment_cache.get_many_async(comments, collection)
+    misses = list(dict.fromkeys(comment for comment in comments if comment not in classified))
+    results, from_api = await sentiment_classifier.classify_async(misses, services.dispatcher,
+                                                                run_cpu=services.run_cpu)
+    new_results, api_results = splitClassified(misses, results, from_api)
+    await sentiment_cache.put_many_async(api_results, collection)  # 로컬 모델 결과는 캐시하지 않음
+    classified.update(new_results)
+    return collectResults(documents, comments, classified, row_dates)
+
+
+# server.analyzeStock과 같은 과정
+async def analyzeStockAsync(title, timings=None):
+    with ANALYSES_IN_FLIGHT.track_inflight(), measureStage('total', timings=timings):
+        await crawlStock(title, timings)
+
+        # 댓글과 (뉴스 → 인베스팅)을 동시에 진행 (API 동시 요청 수와 속도 제한은 디스패처 하나가 함께 관리)
+        # 키워드 누적기에는 뉴스를 먼저 추가해야 하므로 뉴스와 인베스팅은 차례로
+        scores = ScoreAccumulator(SCORE_HALF_LIFE_HOURS)
+        keyword_rows = KeywordAccumulator(STOPWORDS)
+
+        async def keywordSources():
+            for source in ('news', 'investing'):
+                await streamSourceAsync(title, source, scores, keyword_rows, timings)
+
+        await asyncio.gather(streamSourceAsync(title, 'comments', scores, timings=timings), keywordSources())
+
+        with measureStage('ranking', timings=timings):
+            keywords = await services.run_cpu(rankAccumulatedKeywords, keyword_rows)
+
+        with measureStage('scoring', timings=timings):
+            payload = analysisPayload(scores, keywords)
+            await services.run_cpu(saveScoreHistory, title, payload)
+        return payload
+
+
+# 결과 캐시를 거쳐 분석 (server.result_cache를 함께 사용, 같은 종목의 동시 요청은 분석 하나를 기다림)
+# 오래된 결과는 바로 반환하면서 백그라운드에서 갱신
+async def cachedAnalysis(title, timings=None):
+    payload, state = result_cache.lookup(title)
+    if state == 'stale' and title not in services.inflight and services.analyses < ASYNC_MAX_ANALYSES:
+        startAnalysis(title)
+    if payload is not None:
+        return payload, False
+
+    task = services.inflight.get(title)
+    if task is not None:
+        return await asyncio.shield(task), False
+    if services.analyses >= ASYNC_MAX_ANALYSES:
+        raise TooManyAnalyses(f"{ASYNC_MAX_ANALYSES} analyses are already running")
+    return await asyncio.shield(startAnalysis(title, timings)), True
+
+
+def startAnalysis(title, timings=None):
+    async def run():
+        services.analyses += 1
+        try:
+            payload = await analyzeStockAsync(title, timings)
+            result_cache.put(title, payload)
+            return payload
+        finally:
+            services.analyses -= 1
+            services.inflight.pop(title, None)
+
+    task = asyncio.ensure_future(run())
+    services.inflight[title] = task
+    # 백그라운드 갱신 실패가 처리되지 않은 예외로 남지 않도록 확인
+    task.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+    return task
+
+
+async def sendResponse(send, status, body=b'', content_type='text/html; charset=utf-8'):
+    headers = [(b'content-length', str(len(body)).encode())]
+    if body:
+        headers.append((b'content-type', content_type.encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def sendJson(send, status, payload):
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode()
+    await sendResponse(send, status, body + b'\n', 'application/json')
+
+
+async def lifespan(receive, send):
+    global services
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            services = AsyncServices()
+            server.document_frequencies.start()
+            server.prewarm_scheduler.start()  # watchlist가 있으면 바로 사전 분석 시작
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            server.prewarm_scheduler.stop()
+            server.document_frequencies.stop()
+            if services is not None:
+                await services.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# ASGI 앱: Flask 서버와 같은 /, /favicon.ico, /<title> (?timings=1 포함)
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path']
+    if scope['method'] not in ('GET', 'HEAD'):
+        await sendResponse(send, 405)
+    elif path == '/':
+        await sendResponse(send, 200, b'Hello')
+    elif path == '/favicon.ico':
+        await sendResponse(send, 204)  # 내용이 없는 응답 반환
+    elif path.count('/') == 1 and len(path) > 1:
+        title = unquote(path[1:])
+        server.recordRequest(title)
+        query = parse_qs(scope.get('query_string', b'').decode())
+        timings = {} if query.get('timings', [''])[0] in ('1', 'true') else None
+        try:
+            payload, analyzed = await cachedAnalysis(title, timings)
+        except TooManyAnalyses as e:
+            await sendJson(send, 503, {'error': str(e)})
+            return
+        if timings is not None:
+            payload = {**payload, 'timings': timings if analyzed and timings else {'cached': True}}
+        await sendJson(send, 200, payload)
+    else:
+        await sendResponse(send, 404)
+
+
+def main():
+    import uvicorn
+    uvicorn.run(app, host='localhost', port=5000, lifespan='on', log_level='warning')
+
+if __name__ == '__main__':
+    main()
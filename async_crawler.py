@@ -0,0 +1,193 @@
+from collections import deque
+from functools import partial
+import asyncio
+import time
+import comments_crawler
+from comments_crawler import (CRAWLERS, CRAWLS_IN_FLIGHT, PAGES_FETCHED, RESCAN_INTERVALS, PageContentError,
+                              board_page_url, comment_records, discussion_page_url, initial_window, investing_records,
+                              news_page_url, news_records, notify_new_records, retention_threshold, symbol_registry)
+from crawl_checkpoint import CrawlCheckpoint, checkpoint_from_document, checkpoint_update, mark_rescan
+from mongo_buffer import write_records_async
+from page_parser import parse_board, parse_investing, parse_news
+
+# 소스별 페이지 파서
+PARSERS = {'comments': parse_board, 'news': parse_news, 'investing': parse_investing}
+
+# Cloudflare 챌린지 페이지 표시 (503은 서버 과부하와 구분하려고 본문까지 확인)
+CHALLENGE_MARKERS = (b'cf-chl', b'cf_chl', b'Just a moment...')
+
+
+# aiohttp로는 통과할 수 없는 차단/챌린지 응답인지 확인
+def is_challenge(response):
+    if response.status_code == 403:
+        return True
+    return response.status_code == 503 and any(marker in response.content for marker in CHALLENGE_MARKERS)
+
+
+# crawl_pages의 비동기 버전 (같은 창 크기 규칙, 처리는 페이지 순서대로)
+# fetch_page(page), process_page(page, data)는 코루틴
+async def crawl_pages_async(fetch_page, process_page, concurrency=None, initial=None, source=None,
+                            first_page=1, last_page=None):
+    concurrency = max(1, concurrency or comments_crawler.PAGE_CONCURRENCY)
+    window = min(concurrency, max(1, initial or concurrency))
+
+    async def fetch(page):
+        try:
+            data = await fetch_page(page)
+        except Exception:
+            PAGES_FETCHED.inc(source=source, status='error')
+            raise
+        PAGES_FETCHED.inc(source=source, status='empty' if data is None else 'ok')
+        return data
+
+    pending = deque()
+    next_page = first_page
+    try:
+        while True:
+            while len(pending) < window and (last_page is None or next_page <= last_page):
+                pending.append((next_page, asyncio.ensure_future(fetch(next_page))))
+                next_page += 1
+            if not pending:
+                return next_page
+
+            page, task = pending.popleft()
+            data = await task
+            if data is None or not await process_page(page, data):
+                return None  # 기준 날짜 이전 페이지나 이미 수집한 글에 도달하면 중단
+            window = min(window * 2, concurrency)
+    finally:
+        # 더 필요 없는 페이지 요청은 취소
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+
+
+# comments_crawler의 크롤러와 같은 규칙(체크포인트, 보관 기간, 중복 제거, 업서트)으로 수집하는 비동기 크롤러
+# db는 pymongo.AsyncMongoClient의 데이터베이스, session_pool은 async_http.AsyncSessionPool
+# HTML 파싱과 새 글 알림(IDF 갱신 등)은 executor(없으면 기본 스레드 풀)에서 실행해 이벤트 루프를 막지 않음
+# Cloudflare 차단/챌린지 페이지는 동기 크롤러와 같은 cloudscraper 세션 풀로 다시 받음
+# 페이지 요청이 실패하면 예외로 크롤링을 중단하고 체크포인트는 저장하지 않음 (None은 목록의 끝)
+class AsyncCrawler:
+    def __init__(self, db, session_pool, executor=None):
+        self.session_pool = session_pool
+        self.executor = executor
+        self.collections = {'comments': db.comments, 'news': db.news, 'investing': db.investing_comments}
+        self.checkpoints = db.crawl_checkpoints
+        self._ticker_locks = {}
+
+    def _ticker_lock(self, stock_code):
+        lock = self._ticker_locks.get(stock_code)
+        if lock is None:
+            lock = self._ticker_locks[stock_code] = asyncio.Lock()
+        return lock
+
+    async def _run_cpu(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    # 차단/챌린지 응답이면 comments_crawler의 cloudscraper 세션 풀로 다시 요청 (스레드에서 실행)
+    async def get(self, url):
+        response = await self.session_pool.get(url, headers=comments_crawler.headers)
+        if is_challenge(response):
+            response = await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(comments_crawler.session_pool.get, url, headers=comments_crawler.headers))
+        return response
+
+    # 페이지 본문 (실패하면 예외)
+    async def fetch_url(self, url):
+        response = await self.get(url)
+        response.raise_for_status()
+        return response.content
+
+    # comments_crawler.prepare_crawl과 같음
+    async def prepare_crawl(self, stock_code, source, collection, date_threshold):
+        checkpoint = None
+        if comments_crawler.INCREMENTAL_CRAWL:
+            checkpoint = checkpoint_from_document(
+                await self.checkpoints.find_one({'종목코드': stock_code, '소스': source}))
+        if checkpoint is None:
+            await collection.delete_many({'종목코드': stock_code})
+            return CrawlCheckpoint()
+        await collection.delete_many({'종목코드': stock_code, '날짜': {'$lt': date_threshold}})
+        return mark_rescan(checkpoint, RESCAN_INTERVALS.get(source))
+
+    # 인베스팅 종목 경로 (메모리에 없을 때만 스레드에서 검색)
+    async def discussion_slug(self, stock_code, stale_slug=None):
+        loop = asyncio.get_running_loop()
+        if stale_slug is not None:
+            return await loop.run_in_executor(self.executor, symbol_registry.refresh, stock_code, stale_slug)
+        return symbol_registry.cached(stock_code) or await loop.run_in_executor(
+            self.executor, symbol_registry.get, stock_code)
+
+    async def _fetch_investing(self, stock_code, target, page):
+        slug = target['slug']
+        response = await self.get(discussion_page_url(slug, page))
+        if response.status_code == 404:
+            # 종목 경로가 바뀌었는지 다시 확인하고 바뀌었으면 한 번 더 요청 (그대로면 마지막 페이지 뒤이므로 목록의 끝)
+            fresh_slug = await self.discussion_slug(stock_code, slug)
+            if fresh_slug == slug:
+                return None
+            target['slug'] = fresh_slug
+            response = await self.get(discussion_page_url(fresh_slug, page))
+        response.raise_for_status()
+        return response.content
+
+    async def crawl(self, stock_code, source, concurrency=None):
+        try:
+            collection = self.collections[source]
+            date_threshold = retention_threshold(source)
+            checkpoint = await self.prepare_crawl(stock_code, source, collection, date_threshold)
+            seen = set()
+
+            target = {}
+            if source == 'investing':
+                target['slug'] = await self.discussion_slug(stock_code)
+                if not target['slug']:
+                    print(f"Failed to find discussion URL for {stock_code}")
+                    return
+
+            async def fetch_page(page):
+                if source == 'investing':
+                    content = await self._fetch_investing(stock_code, target, page)
+                    if content is None:
+                        return None
+                else:
+                    url = board_page_url(stock_code, page) if source == 'comments' else news_page_url(stock_code, page)
+                    content = await self.fetch_url(url)
+                rows = await self._run_cpu(PARSERS[source], content)
+                if rows is None and source == 'comments':
+                    raise PageContentError(f"No table found on page {page} for stock {stock_code}")
+                return rows
+
+            async def process_page(page, rows):
+                if source == 'comments':
+                    records, more = comment_records(stock_code, rows, checkpoint, date_threshold, seen)
+                elif source == 'news':
+                    records, more = news_records(stock_code, rows, checkpoint, date_threshold, seen)
+                else:
+                    records, more = investing_records(stock_code, rows, checkpoint, date_threshold, seen,
+                                                      discussion_page_url(target['slug'], page))
+                written = await write_records_async(collection, records, comments_crawler.UPSERT_RECORDS)
+                if written:
+                    await self._run_cpu(notify_new_records, source, written)
+                return more
+
+            await crawl_pages_async(fetch_page, process_page, concurrency, initial_window(checkpoint), source)
+            if checkpoint.newest is not None:
+                await self.checkpoints.update_one({'종목코드': stock_code, '소스': source},
+                                                  checkpoint_update(checkpoint), upsert=True)
+        except Exception as e:
+            print(f"An error occurred in crawl_{source}: {e}")
+
+    # comments_crawler.crawl_all과 같음 (세 소스를 동시에, 같은 종목은 한 번에 하나씩)
+    async def crawl_all(self, stock_code, on_source_done=None, timings=None):
+        async def run(source):
+            started = time.perf_counter()
+            with CRAWLS_IN_FLIGHT.track_inflight(source=source):
+                await self.crawl(stock_code, source)
+            if timings is not None:
+                timings[source] = time.perf_counter() - started
+            if on_source_done is not None:
+                on_source_done(source)
+
+        async with self._ticker_lock(stock_code):
+            await asyncio.gather(*(run(source) for source in CRAWLERS))
@@ -0,0 +1,89 @@
+from collections import defaultdict
+import asyncio
+import json
+import aiohttp
+from http_pool import RETRY_STATUS, retry_delay
+
+
+class HTTPStatusError(Exception):
+    pass
+
+
+# 본문까지 읽은 응답 (requests.Response와 같은 이름의 속성/메서드만 제공)
+class AsyncResponse:
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPStatusError(f"{self.status_code} Error for url: {self.url}")
+
+
+# SessionPool의 비동기 버전 (aiohttp 세션 하나를 공유, 호스트별 동시 연결 수 제한, 재시도/백오프)
+# 연결 수는 max_per_host * 호스트 수를 넘지 않으므로 동시에 대기 중인 요청이 많아도 소켓/메모리가 늘지 않음
+class AsyncSessionPool:
+    errors = (aiohttp.ClientError, asyncio.TimeoutError)
+
+    def __init__(self, max_per_host=6, max_connections=100, max_retries=3, backoff=0.5, max_backoff=10,
+                 timeout=(5, 15), headers=None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        self._connector = aiohttp.TCPConnector(limit=max_connections, limit_per_host=max_per_host)
+        self._session = aiohttp.ClientSession(connector=self._connector, headers=headers, timeout=self.timeout)
+        self._counters = defaultdict(int)
+
+    def _count(self, name, amount=1):
+        self._counters[name] += amount  # 이벤트 루프 하나에서만 사용하므로 락이 필요 없음
+
+    def retry_delay(self, attempt, response):
+        return retry_delay(attempt, response, self.backoff, self.max_backoff)
+
+    # retries를 주면 이 요청만 재시도 횟수를 바꿈 (0이면 재시도 없이 응답/예외를 그대로 반환)
+    async def request(self, method, url, retries=None, **kwargs):
+        kwargs.pop('timeout', None)
+        max_retries = self.max_retries if retries is None else retries
+        for attempt in range(max_retries + 1):
+            response = None
+            error = None
+            self._count('requests')
+            try:
+                async with self._session.request(method, url, **kwargs) as raw:
+                    response = AsyncResponse(url, raw.status, raw.headers, await raw.read())
+            except self.errors as e:
+                error = e
+
+            if response is not None and response.status_code not in RETRY_STATUS:
+                return response
+
+            if attempt == max_retries:
+                self._count('failures')
+                if response is not None:
+                    return response  # 상태 코드 확인은 호출하는 쪽에서 raise_for_status로 처리
+                raise error
+
+            self._count('retries')
+            await asyncio.sleep(self.retry_delay(attempt, response))
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    def stats(self):
+        return {
+            'requests': self._counters.get('requests', 0),
+            'retries': self._counters.get('retries', 0),
+            'failures': self._counters.get('failures', 0),
+        }
+
+    async def close(self):
+        await self._session.close()
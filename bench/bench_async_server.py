@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+import aiohttp
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_sentiment_api import FakeSentimentAPI
+from replay_site import ReplaySite
+
+# 서버 모드별 실행 방법 (flask: 현재 server.py의 스레드 서버, asgi: asgi_server.py의 비동기 서버)
+MODES = ('flask', 'asgi')
+
+
+# 하위 프로세스에서 서버 실행 (크롤링 대상과 감정 분석 API를 로컬 재생 서버로 바꾼 뒤)
+def serve(args):
+    import comments_crawler
+    import server
+
+    comments_crawler.NAVER_BASE_URL = args.naver_base_url
+    comments_crawler.INVESTING_BASE_URL = args.investing_base_url
+    server.API_URL = args.api_url
+    server.sentiment_dispatcher.api_url = args.api_url
+    server.document_frequencies.collection = None  # 문서 빈도를 MongoDB에 합치지 않음 (메모리에만 유지)
+
+    if args.serve == 'flask':
+        server.app.run(host='127.0.0.1', port=args.port, debug=False, threaded=True)
+    else:
+        import uvicorn
+        import asgi_server
+        uvicorn.run(asgi_server.app, host='127.0.0.1', port=args.port, lifespan='on', log_level='warning')
+
+
+# /proc에서 읽은 프로세스 상태 (최대 상주 메모리 MiB, 스레드 수)
+def process_status(pid):
+    status = {}
+    with open(f'/proc/{pid}/status') as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            if name in ('VmHWM', 'VmRSS', 'Threads'):
+                status[name] = int(value.split()[0])
+    return status
+
+
+# 부하 중 서버 프로세스의 최대 스레드 수를 주기적으로 기록
+class ProcessSampler:
+    def __init__(self, pid, interval=0.1):
+        self.pid = pid
+        self.interval = interval
+        self.max_threads = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.max_threads = max(self.max_threads, process_status(self.pid).get('Threads', 0))
+            except OSError:
+                return
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+async def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(base_url + '/') as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not start")
+
+
+# 종목마다 요청 하나씩 동시에 clients개까지 보내고 (상태 코드, 지연 시간) 목록 반환
+async def load(base_url, codes, clients, timeout):
+    semaphore = asyncio.Semaphore(clients)
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        async def request(code):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    async with session.get(f"{base_url}/{code}") as response:
+                        await response.read()
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    status = None
+                return status, time.perf_counter() - started
+
+        return await asyncio.gather(*(request(code) for code in codes))
+
+
+def summarize(results, elapsed):
+    latencies = np.asarray([seconds for status, seconds in results if status == 200]) * 1000
+    summary = {
+        'ok': int(len(latencies)),
+        'failed': len(results) - int(len(latencies)),
+        'throughput': round(len(latencies) / elapsed, 2),
+    }
+    if len(latencies):
+        summary['p50_ms'] = round(float(np.percentile(latencies, 50)), 1)
+        summary['p95_ms'] = round(float(np.percentile(latencies, 95)), 1)
+        summary['max_ms'] = round(float(latencies.max()), 1)
+    return summary
+
+
+def run_mode(mode, args, site, site_url, api_url, index):
+    pages = [int(count) for count in args.pages.split(',')]
+    codes = [f"{index + 7}{i:05d}" for i in range(args.requests)]
+    for code in codes:
+        site.register(code, *pages)
+
+    process = subprocess.Popen([
+        sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(args.port),
+        '--naver-base-url', site_url, '--investing-base-url', site_url, '--api-url', api_url,
+    ], cwd=ROOT)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base_url))
+        idle = process_status(process.pid)
+        with ProcessSampler(process.pid) as sampler:
+            started = time.perf_counter()
+            results = asyncio.run(load(base_url, codes, args.clients, args.timeout))
+            elapsed = time.perf_counter() - started
+        status = process_status(process.pid)
+    finally:
+        process.terminate()
+        process.wait()
+
+    summary = summarize(results, elapsed)
+    summary.update({
+        'seconds': round(elapsed, 1),
+        'idle_rss_mib': round(idle['VmRSS'] / 1024, 1),
+        'peak_rss_mib': round(status['VmHWM'] / 1024, 1),
+        'max_threads': sampler.max_threads,
+    })
+    return summary
+
+
+# 같은 부하(서로 다른 종목 --requests개, 동시 --clients개)를 두 서버 모드에 차례로 걸어 처리량/지연 시간/메모리/스레드 수 비교
+# 크롤링 대상과 감정 분석 API는 로컬 재생 서버를 사용 (MongoDB는 MONGO_URI, 기본 로컬)
+def main():
+    parser = argparse.ArgumentParser(description='Flask 서버와 비동기(ASGI) 서버 부하 비교 (로컬 재생 서버 + 로컬 MongoDB)')
+    parser.add_argument('--modes', default=','.join(MODES), help=f"쉼표로 구분 ({', '.join(MODES)})")
+    parser.add_argument('--requests', type=int, default=300, help='분석할 종목 수 (종목마다 요청 하나)')
+    parser.add_argument('--clients', type=int, default=300, help='동시 요청 수')
+    parser.add_argument('--pages', default='4,2,2', help='종목별 페이지 수 (종목토론실,뉴스,인베스팅)')
+    parser.add_argument('--page-latency', type=float, default=0.2, help='페이지 응답 지연 (초)')
+    parser.add_argument('--api-latency', type=float, default=0.2, help='감정 분석 API 응답 지연 (초)')
+    parser.add_argument('--timeout', type=float, default=600, help='요청 하나의 최대 대기 시간 (초)')
+    parser.add_argument('--port', type=int, default=5055, help='서버 포트')
+    parser.add_argument('--output', help='결과를 JSON 한 줄로 덧붙일 파일 (회귀 추적용)')
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--naver-base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--investing-base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--api-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    site = ReplaySite(latency=args.page_latency)
+    site_url = site.start()
+    api = FakeSentimentAPI(latency=args.api_latency)
+    api_url = api.start()
+
+    report = {'time': datetime.now().isoformat(timespec='seconds'), 'args': vars(args), 'modes': {}}
+    try:
+        for index, mode in enumerate(args.modes.split(',')):
+            result = run_mode(mode, args, site, site_url, api_url, index)
+            report['modes'][mode] = result
+            print(f"[{mode}] {result['ok']} ok / {result['failed']} failed in {result['seconds']}s, "
+                  f"{result['throughput']}/s, p50 {result.get('p50_ms')} ms, p95 {result.get('p95_ms')} ms, "
+                  f"RSS {result['idle_rss_mib']} -> {result['peak_rss_mib']} MiB, max {result['max_threads']} threads")
+    finally:
+        site.stop()
+        api.stop()
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
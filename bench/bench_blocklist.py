@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comment_filter import compile_blocklist, load_blocklist
+from replay_site import WORDS
+
+BLOCKLIST_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'blocklist.txt')
+
+
+# 비교용 Aho-Corasick 오토마톤 (순수 파이썬, 금지어 수와 무관하게 글자당 한 번 전이)
+class AhoCorasick:
+    def __init__(self, words):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None]
+        for word in set(words):
+            node = 0
+            for ch in word:
+                if ch not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                    self.goto[node][ch] = len(self.goto) - 1
+                node = self.goto[node][ch]
+            self.out[node] = word
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                fail = self.fail[node]
+                while fail and ch not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(ch, 0)
+                if self.out[child] is None:
+                    self.out[child] = self.out[self.fail[child]]
+                queue.append(child)
+
+    def search(self, text):
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] is not None:
+                return out[node]
+        return None
+
+
+# 종목토론실 댓글 비슷한 문장 (일부는 금지어 포함)
+def make_comments(blocked, count, rng):
+    comments = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 30))]
+        if rng.random() < 0.05:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(blocked))
+        comments.append(' '.join(words))
+    return comments
+
+
+# 한글 음절 2~4자로 만든 가상 금지어
+def synthetic_words(count, rng):
+    syllables = [chr(code) for code in range(0xAC00, 0xAC00 + 2000)]
+    return [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def elapsed(search, comments):
+    started = time.perf_counter()
+    hits = sum(1 for comment in comments if search(comment))
+    return time.perf_counter() - started, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description='금지어 검사 비교 (정규식 alternation vs Aho-Corasick, 금지어 수별)')
+    parser.add_argument('--comments', type=int, default=20000, help='검사할 댓글 수')
+    parser.add_argument('--sizes', default='100,1000,10000', help='추가로 측정할 금지어 수 (쉼표 구분)')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    shipped = load_blocklist(BLOCKLIST_FILE)
+    comments = make_comments(shipped, args.comments, rng)
+    sizes = [len(shipped)] + [int(size) for size in args.sizes.split(',') if int(size) > len(shipped)]
+    for size in sizes:
+        words = shipped + synthetic_words(size - len(shipped), rng)
+        regex_time, regex_hits = elapsed(compile_blocklist(words).search, comments)
+        automaton_time, automaton_hits = elapsed(AhoCorasick(words).search, comments)
+        label = 'blocklist.txt' if size == len(shipped) else 'synthetic'
+        print(f"{size:>6} words ({label:<13}) regex {regex_time * 1e6 / len(comments):7.2f} us/comment | "
+              f"aho-corasick {automaton_time * 1e6 / len(comments):7.2f} us/comment | "
+              f"x{automaton_time / regex_time:.1f}, identical={regex_hits == automaton_hits} ({regex_hits} hits)")
+
+
+if __name__ == '__main__':
+    main()
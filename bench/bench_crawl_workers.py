@@ -0,0 +1,70 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from replay_site import ReplaySite
+
+
+# 여러 작업자 프로세스가 하나의 MongoDB 작업 큐를 나눠 처리하는지 확인 (로컬 MongoDB 필요, MONGO_URI로 변경 가능)
+# 재생 서버에 종목을 등록하고 작업을 넣은 뒤 crawl_worker.py를 --processes개로 실행해서
+# 모든 작업이 끝났는지, 같은 글이 중복 저장되지 않았는지, 처리 시간을 출력
+def main():
+    parser = argparse.ArgumentParser(description='분산 크롤링 작업자 점검 (로컬 재생 서버 + 로컬 MongoDB)')
+    parser.add_argument('--codes', type=int, default=20, help='크롤링할 종목 수')
+    parser.add_argument('--pages', default='12,4,4', help='종목별 페이지 수 (종목토론실,뉴스,인베스팅)')
+    parser.add_argument('--processes', type=int, default=4, help='작업자 프로세스 수')
+    parser.add_argument('--threads', type=int, default=1, help='프로세스별 작업자 스레드 수')
+    parser.add_argument('--page-latency', type=float, default=0.02, help='페이지 응답 지연 (초)')
+    args = parser.parse_args()
+
+    import comments_crawler
+    import crawl_worker
+
+    site = ReplaySite(latency=args.page_latency)
+    base_url = site.start()
+    pages = [int(count) for count in args.pages.split(',')]
+    codes = [f"9{i:05d}" for i in range(args.codes)]
+    for code in codes:
+        site.register(code, *pages)
+        for collection in (comments_crawler.collection_comments, comments_crawler.collection_news,
+                           comments_crawler.collection_investing, comments_crawler.collection_checkpoints):
+            collection.delete_many({'종목코드': code})
+
+    queue = crawl_worker.create_queue()
+    queue.collection.delete_many({'종목코드': {'$in': codes}})
+    task_ids = [queue.enqueue(code, source) for code in codes for source in comments_crawler.CRAWLERS]
+
+    started = time.perf_counter()
+    worker = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, 'crawl_worker.py'),
+        '--processes', str(args.processes), '--threads', str(args.threads), '--idle-exit', '3',
+        '--naver-base-url', base_url, '--investing-base-url', base_url,
+    ], cwd=ROOT)
+    statuses = queue.wait(task_ids, timeout=600)
+    elapsed = time.perf_counter() - started
+    worker.wait()
+    site.stop()
+
+    done = sum(1 for status in statuses.values() if status == 'done')
+    ranges = sum(doc.get('범위수', 0) for doc in queue.collection.find({'_id': {'$in': task_ids}}, {'범위수': 1}))
+    duplicates = 0
+    for collection in (comments_crawler.collection_comments, comments_crawler.collection_news,
+                       comments_crawler.collection_investing):
+        for doc in collection.aggregate([
+            {'$match': {'종목코드': {'$in': codes}}},
+            {'$group': {'_id': {'code': '$종목코드', 'hash': '$내용해시'}, 'count': {'$sum': 1}}},
+            {'$match': {'count': {'$gt': 1}}},
+        ]):
+            duplicates += doc['count'] - 1
+
+    print(f"{done}/{len(task_ids)} tasks done ({ranges} page ranges) in {elapsed:.1f}s "
+          f"with {args.processes}x{args.threads} workers, {site.requests} page requests, {duplicates} duplicates")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import argparse
+import os
+import random
+import sys
+import time
+import warnings
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_engine import KeywordCorpus
+
+STOPWORD_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'stopword.txt')
+WORDS = ['삼성전자', '주가', '상승', '하락', '외국인', '기관', '매수', '매도', '실적', '반도체', '배당', '목표가', '전망', '급등', '급락']
+
+
+def load_stopwords(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file.readlines()]
+
+
+# 기존 방식: 요청마다 불용어 파일을 다시 읽고 TfidfVectorizer를 다섯 번 학습
+def legacy_keywords(news_results, investing_results):
+    def extract_keywords(comments, top_n):
+        if not comments:
+            return []
+        tfidf = TfidfVectorizer(max_features=500, stop_words=load_stopwords(STOPWORD_FILE))
+        tfidf_matrix = tfidf.fit_transform(comments)
+        feature_array = tfidf.get_feature_names_out()
+        tfidf_sorting = tfidf_matrix.sum(axis=0).A1.argsort()[::-1]
+        return [str(feature_array[i]) for i in tfidf_sorting[:top_n]]
+
+    def extract_keywords_for_sentiment(comments, sentiment, top_n, exclude_keywords):
+        filtered_comments = [comment for comment, s in comments if s == sentiment]
+        if not filtered_comments:
+            return []
+        tfidf = TfidfVectorizer(max_features=500, stop_words=load_stopwords(STOPWORD_FILE))
+        tfidf_matrix = tfidf.fit_transform(filtered_comments)
+        feature_array = tfidf.get_feature_names_out()
+        tfidf_sorting = tfidf_matrix.sum(axis=0).A1.argsort()[::-1]
+        return [str(feature_array[i]) for i in tfidf_sorting if feature_array[i] not in exclude_keywords][:top_n]
+
+    all_results = news_results + investing_results
+    news_keywords = extract_keywords([comment for comment, _ in news_results], 10)
+    return {
+        'positive': extract_keywords_for_sentiment(all_results, 'positive', 5, news_keywords),
+        'neutral': extract_keywords_for_sentiment(all_results, 'neutral', 5, news_keywords),
+        'negative': extract_keywords_for_sentiment(all_results, 'negative', 5, news_keywords),
+        'total': extract_keywords([comment for comment, _ in all_results], 10),
+        'news': news_keywords
+    }
+
+
+# 새 방식: 한 번만 벡터화하고 행 마스크로 다섯 가지 순위를 계산
+def engine_keywords(news_results, investing_results, stopwords):
+    all_results = news_results + investing_results
+    corpus = KeywordCorpus([comment for comment, _ in all_results], stopwords)
+    sentiments = np.array([sentiment for _, sentiment in all_results])
+    rows = np.ones(len(all_results), dtype=bool)
+    news_keywords = corpus.top_keywords(np.arange(len(all_results)) < len(news_results), 10)
+    return {
+        'positive': corpus.top_keywords(rows & (sentiments == 'positive'), 5, news_keywords),
+        'neutral': corpus.top_keywords(rows & (sentiments == 'neutral'), 5, news_keywords),
+        'negative': corpus.top_keywords(rows & (sentiments == 'negative'), 5, news_keywords),
+        'total': corpus.top_keywords(rows, 10),
+        'news': news_keywords
+    }
+
+
+def make_results(count, rng, vocabulary):
+    return [[' '.join(rng.choice(vocabulary) for _ in range(rng.randint(3, 25))) + '.',
+             rng.choice(['positive', 'neutral', 'negative'])] for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='키워드 추출 방식 비교 (결과 일치 여부와 CPU 시간)')
+    parser.add_argument('--sizes', default='100,300,1000,3000')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    warnings.filterwarnings('ignore')  # 불용어 토큰화 경고
+
+    rng = random.Random(0)
+    vocabulary = WORDS + [f'단어{i}' for i in range(4000)]
+    stopwords = frozenset(load_stopwords(STOPWORD_FILE))
+
+    for size in (int(size) for size in args.sizes.split(',')):
+        results = make_results(size, rng, vocabulary)
+        news_results, investing_results = results[:size // 2], results[size // 2:]
+
+        started = time.process_time()
+        for _ in range(args.repeat):
+            expected = legacy_keywords(news_results, investing_results)
+        legacy = (time.process_time() - started) / args.repeat
+
+        started = time.process_time()
+        for _ in range(args.repeat):
+            actual = engine_keywords(news_results, investing_results, stopwords)
+        engine = (time.process_time() - started) / args.repeat
+
+        print(f"{size:>6} sentences: legacy {legacy * 1000:7.1f} ms, engine {engine * 1000:7.1f} ms, "
+              f"x{legacy / engine:.1f}, identical={actual == expected}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sentiment_api import FakeSentimentAPI, analyze
+from local_sentiment import MODES, LocalSentimentModel, SentimentClassifier, load_api_labels
+from sentiment_dispatcher import SentimentDispatcher
+
+WORDS = ['삼성', '주가', '상승', '하락', '실적', '반도체', '매수', '매도', '외인', '기관', '좋다', '나쁘다', '전망', '배당',
+         '개미', '물타기', '손절', '존버', '가즈아', '떡상', '떡락', '호재', '악재', '공매도']
+
+
+# 문장 1~3개짜리 가짜 댓글
+def make_comments(count, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 12))) + rng.choice('.!?')
+                     for _ in range(rng.randint(1, 3))) for _ in range(count)]
+
+
+# 가짜 API의 판정을 정답으로 사용
+def synthetic_labels(comments):
+    sentences = {}
+    for comment in comments:
+        for sentence in analyze(comment):
+            sentences[sentence['content']] = sentence['sentiment']
+    return list(sentences), list(sentences.values())
+
+
+# 문장 단위 정확도/처리량, hybrid 기준 확신도 이상인 문장 비율과 그 문장들의 정확도
+def evaluate_model(model, sentences, labels, min_confidence):
+    started = time.perf_counter()
+    predicted, confidence = model.predict(sentences)
+    elapsed = time.perf_counter() - started
+    correct = predicted == labels
+    confident = confidence >= min_confidence
+    print(f"local model: accuracy {correct.mean():.3f} on {len(sentences)} held-out sentences, "
+          f"{len(sentences) / elapsed:.0f} sentences/s")
+    if confident.any():
+        print(f"hybrid (confidence >= {min_confidence}): {confident.mean():.1%} answered locally "
+              f"with accuracy {correct[confident].mean():.3f}, "
+              f"expected overall accuracy {(correct & confident).sum() / len(sentences) + (~confident).mean():.3f}")
+
+
+# 가짜 API 서버를 띄워 모드별 처리 시간, API 요청 수, API 결과와의 일치율 비교
+def compare_modes(model, comments, latency, workers, rate, min_confidence):
+    expected = [[[sentence['content'], sentence['sentiment']] for sentence in analyze(comment)] for comment in comments]
+    for mode in MODES:
+        api = FakeSentimentAPI(latency=latency)
+        dispatcher = SentimentDispatcher(api.start(), {}, max_workers=workers, requests_per_second=rate)
+        classifier = SentimentClassifier(dispatcher, model, mode=mode, min_confidence=min_confidence)
+        started = time.perf_counter()
+        results, from_api = classifier.classify(comments)
+        elapsed = time.perf_counter() - started
+        api.stop()
+        rows = [(row, expected_row) for comment_results, expected_results in zip(results, expected)
+                for row, expected_row in zip(comment_results or [], expected_results)]
+        agreement = sum(row[1] == expected_row[1] for row, expected_row in rows) / max(len(rows), 1)
+        print(f"{mode:>7}: {elapsed:.2f}s, {api.requests} API requests, {sum(from_api)}/{len(comments)} comments "
+              f"from API, agreement {agreement:.3f}, {len(comments) / elapsed:.0f} comments/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 감정 분석 모델과 API 결과 비교 (정확도/처리량)')
+    parser.add_argument('--mongo-uri', help='지정하면 감정 분석 캐시에 쌓인 실제 API 결과로 평가 (없으면 가짜 API 결과)')
+    parser.add_argument('--comments', type=int, default=5000, help='가짜 댓글 수')
+    parser.add_argument('--test-ratio', type=float, default=0.2)
+    parser.add_argument('--min-confidence', type=float, default=0.8)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20)
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        sentences, labels = load_api_labels(MongoClient(args.mongo_uri)['stock_data'].sentiment_cache)
+    else:
+        comments = make_comments(args.comments)
+        sentences, labels = synthetic_labels(comments)
+
+    order = list(range(len(sentences)))
+    random.Random(1).shuffle(order)
+    split = int(len(order) * (1 - args.test_ratio))
+    train, test = order[:split], order[split:]
+
+    started = time.perf_counter()
+    model = LocalSentimentModel().fit([sentences[i] for i in train], [labels[i] for i in train])
+    print(f"trained on {len(train)} sentences in {time.perf_counter() - started:.2f}s")
+    evaluate_model(model, [sentences[i] for i in test], np.array([labels[i] for i in test]), args.min_confidence)
+
+    # 실제 API는 호출하지 않도록 가짜 API 결과로만 모드 비교
+    if not args.mongo_uri:
+        compare_modes(model, make_comments(args.comments // 5, seed=1), args.latency, args.workers, args.rate,
+                      args.min_confidence)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from page_parser import parse_board, parse_investing, parse_investing_quote, parse_news
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as file:
+        return file.read()
+
+
+# 기존 방식: BeautifulSoup(html.parser) + 행마다 select 네 번
+def legacy_board(source_code):
+    soup = BeautifulSoup(source_code, 'html.parser')
+    table = soup.find('table', {'class': 'type2'})
+    if not table:
+        return None
+    tb = table.select('tbody > tr')
+    if not tb:
+        return None
+    rows = []
+    for i in range(2, len(tb)):
+        if len(tb[i].select('td > span')) > 0:
+            date = tb[i].select('td > span')[0].text
+            comment = tb[i].select('td.title > a')[0]['title']
+            pos = tb[i].select('td > strong')[0].text
+            neg = tb[i].select('td > strong')[1].text
+            rows.append((date, comment, pos, neg))
+    return rows
+
+
+# 기존 방식: BeautifulSoup(lxml) + 문서 전체에서 .title/.date를 따로 선택한 뒤 순서대로 짝지음
+def legacy_news(source_code):
+    html = BeautifulSoup(source_code, 'lxml')
+    title_result = [title.get_text().strip() for title in html.select('.title')]
+    date_result = [date.get_text().strip() for date in html.select('.date')]
+    return list(zip(title_result, date_result))
+
+
+def legacy_investing(source_code):
+    soup = BeautifulSoup(source_code, 'lxml')
+    comments = soup.select('div.break-words.leading-5')
+    dates = soup.select('time')
+    if not comments or not dates:
+        return None
+    return [(comment.get_text().strip(), date['datetime']) for comment, date in zip(comments, dates)]
+
+
+def legacy_investing_search(source_code):
+    soup = BeautifulSoup(source_code, 'lxml')
+    first_result = soup.select_one('a.js-inner-all-results-quote-item')
+    if not first_result or not first_result.get('href'):
+        return None
+    name = first_result.select_one('span.third')
+    return first_result['href'], name.get_text().strip() if name else None
+
+
+PAGES = [
+    ('naver_board.html', legacy_board, parse_board),
+    ('naver_news.html', legacy_news, parse_news),
+    ('investing_commentary.html', legacy_investing, parse_investing),
+    ('investing_search.html', legacy_investing_search, parse_investing_quote),
+]
+
+
+# 초당 처리 페이지 수
+def pages_per_second(parse, source_code, seconds):
+    count = 0
+    started = time.perf_counter()
+    while True:
+        parse(source_code)
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return count / elapsed
+
+
+# 한 페이지를 파싱하는 동안 파이썬에서 할당된 최대 메모리 (bytes, libxml2 내부 메모리는 tracemalloc에 잡히지 않음)
+def peak_memory(parse, source_code):
+    tracemalloc.start()
+    parse(source_code)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='페이지 파서 비교 (결과 일치 여부, 초당 페이지 수, 최대 메모리 할당)')
+    parser.add_argument('--seconds', type=float, default=2.0, help='파서별 측정 시간')
+    args = parser.parse_args()
+
+    for name, legacy, fast in PAGES:
+        source_code = load_fixture(name)
+        identical = legacy(source_code) == fast(source_code)
+        legacy_rate = pages_per_second(legacy, source_code, args.seconds)
+        fast_rate = pages_per_second(fast, source_code, args.seconds)
+        legacy_peak = peak_memory(legacy, source_code)
+        fast_peak = peak_memory(fast, source_code)
+        print(f"{name:<28} legacy {legacy_rate:8.1f} pages/s, peak {legacy_peak / 1024:7.1f} KiB | "
+              f"lxml {fast_rate:8.1f} pages/s, peak {fast_peak / 1024:7.1f} KiB | "
+              f"x{fast_rate / legacy_rate:.1f}, identical={identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pymongo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sentiment_api import FakeSentimentAPI
+from replay_site import ReplaySite
+
+# 시나리오별 페이지 수 (종목토론실, 뉴스, 인베스팅)
+SCENARIOS = {
+    'quiet': (2, 1, 1),     # 글이 거의 없는 종목
+    'normal': (8, 3, 3),
+    'busy': (30, 10, 10),   # 토론이 활발한 종목
+}
+
+# 분석 단계 (server.analyzeStock이 timings에 기록하는 단계)
+STAGES = ['crawling', 'filtering', 'sentiment', 'keywords', 'ranking', 'scoring']
+
+
+# 메모리 MongoDB (mongomock) 사용, pymongo 최신 버전이 넘기는 인자 중 mongomock이 모르는 인자는 제거
+def use_memory_mongo():
+    import mongomock
+    from mongomock import collection as mongomock_collection
+
+    for name in ('add_insert', 'add_update', 'add_replace', 'add_delete'):
+        method = getattr(mongomock_collection.BulkOperationBuilder, name, None)
+        if method is None:
+            continue
+
+        def wrapper(self, *args, _method=method, **kwargs):
+            for key in ('sort', 'namespace'):
+                kwargs.pop(key, None)
+            return _method(self, *args, **kwargs)
+
+        setattr(mongomock_collection.BulkOperationBuilder, name, wrapper)
+
+    shared = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: shared
+
+
+def use_mongo(uri):
+    client_class = pymongo.MongoClient
+    pymongo.MongoClient = lambda *args, **kwargs: client_class(uri)
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    values = np.asarray(values) * 1000
+    return {
+        'p50': round(float(np.percentile(values, 50)), 1),
+        'p90': round(float(np.percentile(values, 90)), 1),
+        'p99': round(float(np.percentile(values, 99)), 1),
+        'max': round(float(values.max()), 1),
+    }
+
+
+class PipelineBenchmark:
+    def __init__(self, server, site, reset_between_runs=False):
+        self.server = server
+        self.site = site
+        self.reset_between_runs = reset_between_runs
+        self._codes = defaultdict(int)
+        self._lock = threading.Lock()
+
+    # 시나리오마다 처음 보는 종목코드를 발급 (캐시와 체크포인트의 영향을 받지 않도록)
+    def new_code(self, scenario):
+        with self._lock:
+            self._codes[scenario] += 1
+            code = f"{list(SCENARIOS).index(scenario) + 1}{self._codes[scenario]:05d}"
+        self.site.register(code, *SCENARIOS[scenario])
+        return code
+
+    # 이전 실행에서 쌓인 데이터 삭제 (메모리 MongoDB는 인덱스 없이 전체를 훑으므로 데이터가 쌓일수록 느려짐)
+    def reset(self):
+        if not self.reset_between_runs:
+            return
+        for collection in self.server.db.list_collection_names():
+            self.server.db[collection].delete_many({})
+
+    # 종목 하나 분석, 단계별 소요 시간(초) 반환
+    # 필터링과 감정 분석은 묶음마다 번갈아 진행하므로 진행 이벤트 간격 대신 analyzeStock이 기록한 단계/소스별 시간을 사용
+    def analyze(self, scenario):
+        code = self.new_code(scenario)
+        stage_ms = {}
+        started = time.perf_counter()
+        self.server.analyzeStock(code, timings=stage_ms)
+        finished = time.perf_counter()
+
+        timings = {'total': finished - started}
+        for stage in STAGES:
+            sources = stage_ms.get(stage, {})
+            # crawling은 소스별로 동시에 실행하므로 가장 늦게 끝난 소스의 시간, 나머지 단계는 소스별 시간을 합산
+            milliseconds = max(sources.values(), default=0) if stage == 'crawling' else sum(sources.values())
+            timings[stage] = milliseconds / 1000
+        return timings
+
+    # 같은 시나리오를 순서대로 runs번 실행해서 단계별 백분위 계산
+    def latency(self, scenario, runs):
+        samples = defaultdict(list)
+        for _ in range(runs):
+            self.reset()
+            for stage, seconds in self.analyze(scenario).items():
+                samples[stage].append(seconds)
+        return {stage: percentiles(samples[stage]) for stage in STAGES + ['total']}
+
+    # clients개의 클라이언트가 동시에 각자 runs번씩 분석할 때의 처리량 (분석/초)
+    def throughput(self, scenario, clients, runs):
+        self.reset()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            list(executor.map(lambda _: self.analyze(scenario), range(clients * runs)))
+        elapsed = time.perf_counter() - started
+        return round(clients * runs / elapsed, 2)
+
+    # 분석 한 번에 파이썬이 할당한 최대 메모리 (MiB)
+    def peak_memory(self, scenario):
+        self.reset()
+        tracemalloc.start()
+        self.analyze(scenario)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return round(peak / 1024 / 1024, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='분석 파이프라인 종단 간 벤치마크 (로컬 재생 서버 + 가짜 감정 분석 API)')
+    parser.add_argument('--scenarios', default='quiet,busy', help=f"쉼표로 구분 ({', '.join(SCENARIOS)})")
+    parser.add_argument('--runs', type=int, default=5, help='지연 시간 측정 횟수')
+    parser.add_argument('--clients', default='1,4', help='동시 클라이언트 수 (쉼표로 구분)')
+    parser.add_argument('--client-runs', type=int, default=2, help='클라이언트별 분석 횟수')
+    parser.add_argument('--page-latency', type=float, default=0.02, help='페이지 응답 지연 (초)')
+    parser.add_argument('--api-latency', type=float, default=0.05, help='감정 분석 API 응답 지연 (초)')
+    parser.add_argument('--mongo', default='memory',
+                        help="'memory'(mongomock, 실행마다 초기화하며 DB 단계 시간은 실제보다 큼) 또는 MongoDB URI")
+    parser.add_argument('--output', help='결과를 JSON 한 줄로 덧붙일 파일 (회귀 추적용)')
+    args = parser.parse_args()
+
+    # server를 가져오기 전에 MongoDB 연결 대상을 바꿔야 함
+    if args.mongo == 'memory':
+        use_memory_mongo()
+    else:
+        use_mongo(args.mongo)
+
+    import comments_crawler
+    import server
+
+    site = ReplaySite(latency=args.page_latency)
+    base_url = site.start()
+    api = FakeSentimentAPI(latency=args.api_latency)
+    comments_crawler.NAVER_BASE_URL = base_url
+    comments_crawler.INVESTING_BASE_URL = base_url
+    server.sentiment_dispatcher.api_url = api.start()
+    server.document_frequencies.collection = None  # 문서 빈도를 MongoDB에 합치지 않음 (메모리에만 유지)
+
+    benchmark = PipelineBenchmark(server, site, reset_between_runs=args.mongo == 'memory')
+    report = {'time': datetime.now().isoformat(timespec='seconds'), 'args': vars(args), 'scenarios': {}}
+    try:
+        for scenario in args.scenarios.split(','):
+            result = {
+                'latency_ms': benchmark.latency(scenario, args.runs),
+                'throughput': {clients: benchmark.throughput(scenario, int(clients), args.client_runs)
+                               for clients in args.clients.split(',')},
+                'peak_memory_mib': benchmark.peak_memory(scenario),
+            }
+            report['scenarios'][scenario] = result
+
+            print(f"[{scenario}] pages {SCENARIOS[scenario]}")
+            for stage, values in result['latency_ms'].items():
+                print(f"  {stage:<10} " + '  '.join(f"{name} {value:8.1f} ms" for name, value in values.items()))
+            print('  throughput ' + ', '.join(f"{clients} clients {rate}/s" for clients, rate in result['throughput'].items()))
+            print(f"  peak memory {result['peak_memory_mib']} MiB (python heap)")
+    finally:
+        site.stop()
+        api.stop()
+
+    report['max_rss_mib'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    report['requests'] = {'pages': site.requests, 'sentiment_api': api.requests}
+    print(f"max RSS {report['max_rss_mib']} MiB, {site.requests} page requests, {api.requests} sentiment API requests")
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
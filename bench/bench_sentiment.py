@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_sentiment_api import FakeSentimentAPI
+from sentiment_dispatcher import SentimentDispatcher
+
+WORDS = ['삼성', '주가', '상승', '하락', '실적', '반도체', '매수', '매도', '외인', '기관', '좋다', '나쁘다', '전망', '배당']
+
+
+def make_comments(count, seed=0):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))) + '. ' for _ in range(count)]
+
+
+# 기존 방식: 25개씩 고정으로 묶어 한 번에 하나씩 요청
+def run_sequential(api_url, comments):
+    results = []
+    for i in range(0, len(comments), 25):
+        response = requests.post(api_url, json={'content': ' '.join(comments[i:i + 25])})
+        if response.status_code == 200:
+            results.extend(response.json()['sentences'])
+    return results
+
+
+def run_dispatcher(api_url, comments, workers, rate):
+    dispatcher = SentimentDispatcher(api_url, {}, max_workers=workers, requests_per_second=rate)
+    results = dispatcher.classify(comments)
+    return [sentence for comment_results in results if comment_results for sentence in comment_results], dispatcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='감정 분석 요청 방식 비교 (가짜 API 서버 사용)')
+    parser.add_argument('--comments', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=20)
+    args = parser.parse_args()
+
+    comments = make_comments(args.comments)
+
+    for name in ('sequential', 'dispatcher'):
+        api = FakeSentimentAPI(latency=args.latency)
+        api_url = api.start()
+        started = time.perf_counter()
+        if name == 'sequential':
+            sentences = run_sequential(api_url, comments)
+            stats = {}
+        else:
+            sentences, stats = run_dispatcher(api_url, comments, args.workers, args.rate)
+        elapsed = time.perf_counter() - started
+        api.stop()
+        print(f"{name:>10}: {elapsed:.2f}s, {api.requests} requests, {len(sentences)} sentences, "
+              f"{len(comments) / elapsed:.0f} comments/s {stats}")
+
+
+if __name__ == '__main__':
+    main()
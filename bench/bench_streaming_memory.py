@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import use_memory_mongo
+from fake_sentiment_api import FakeSentimentAPI
+
+WORDS = ['삼성전자', '주가', '상승', '하락', '외국인', '기관', '개인', '매수', '매도', '실적', '반도체', '배당', '목표가',
+         '전망', '급등', '급락', '오늘', '내일', '장마감', '거래량', '공매도', '수급', '호재', '악재', '좋다', '나쁘다']
+
+
+# cursor 대신 쓰는 가짜 문서 생성기 (문서를 미리 만들어 두지 않으므로 입력 자체는 메모리를 차지하지 않음)
+# 최신 글부터 1분 간격, 내용은 문장 1~3개 (끝에 번호를 붙여 중복 없음)
+def make_documents(source, count, now, seed=0):
+    from mongo_buffer import content_hash
+
+    rng = random.Random(f'{source}:{seed}')
+    for i in range(count):
+        content = ' '.join(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 10))) + rng.choice('.!?')
+                           for _ in range(rng.randint(1, 3))) + f' {source}{i}'
+        yield {'내용': content, '내용해시': content_hash(content), '날짜': now - timedelta(minutes=i)}
+
+
+# 기존 방식: 소스별로 필터 결과 목록 → 감정 분석 결과 목록을 만든 뒤 키워드/점수 계산 (스트리밍 이전의 분석 경로)
+def run_lists(server, counts, now, code):
+    from keyword_engine import KeywordAccumulator
+    from scoring import ScoreAccumulator, sentiment_codes
+
+    data = {source: list(server.comment_filter.filter(make_documents(source, count, now), source == 'comments',
+                                                      source, code))
+            for source, count in counts.items()}
+    dates = {source: [] for source in counts}
+    results = {source: server.analysisComments(documents, row_dates=dates[source]) for source, documents in data.items()}
+    scores = ScoreAccumulator(server.SCORE_HALF_LIFE_HOURS)
+    for source, source_results in results.items():
+        scores.add(source, sentiment_codes(source_results), dates[source])
+    keyword_rows = KeywordAccumulator(server.STOPWORDS)
+    for source in ('news', 'investing'):
+        keyword_rows.add([content for content, _ in results[source]], sentiment_codes(results[source]),
+                         news=source == 'news')
+    return server.analysisPayload(scores, server.rankAccumulatedKeywords(keyword_rows))
+
+
+# 스트리밍 방식: server.analyzeStock과 같은 흐름 (묶음 단위로 감정 분석하고 누적기에만 반영)
+def run_stream(server, counts, now, code):
+    from keyword_engine import KeywordAccumulator
+    from scoring import ScoreAccumulator
+
+    scores = ScoreAccumulator(server.SCORE_HALF_LIFE_HOURS)
+    keyword_rows = KeywordAccumulator(server.STOPWORDS)
+    for source, count in counts.items():
+        passed = server.comment_filter.filter(make_documents(source, count, now), source == 'comments', source, code)
+        server.streamDocuments(passed, source, scores, keyword_rows if source != 'comments' else None)
+    return server.analysisPayload(scores, server.rankAccumulatedKeywords(keyword_rows))
+
+
+# 실행 중 파이썬이 할당한 최대 메모리 (MiB), 소요 시간, 결과
+def measure(run, server, counts, now, cache_entries):
+    from sentiment_cache import SentimentCache
+
+    # 실행마다 빈 메모리 캐시에서 시작 (MongoDB 캐시는 사용하지 않음, 메모리 LRU는 cache_entries개로 제한)
+    # 유사 중복 인덱스도 실행마다 새 종목코드로 빈 인덱스에서 시작 (이전 실행의 대표 문서와 비교하지 않도록)
+    server.sentiment_cache = SentimentCache(None, cache_entries)
+    code = f"bench-{run.__name__}-{sum(counts.values())}"
+    tracemalloc.start()
+    started = time.perf_counter()
+    payload = run(server, counts, now, code)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(peak / 1024 / 1024, 1), round(elapsed, 1), payload
+
+
+# 댓글 수에 비례하는 스트리밍 방식의 메모리 (두 실행의 최대 메모리 차이 / 댓글 수 차이, 댓글 하나당 바이트)
+# 문서 수와 함께 늘어나는 상태: 유사 중복 인덱스(종목/소스별 max_size개에서 멈춤), 뉴스/인베스팅 문장의 키워드 토큰 번호
+# (댓글은 키워드 추출에 쓰지 않으므로 댓글 수가 max_size를 넘은 뒤에는 0에 가까워야 함)
+def bytes_per_comment(runs):
+    if len(runs) < 2 or runs[-1]['comments'] == runs[0]['comments']:
+        return None
+    growth = (runs[-1]['stream']['peak_mib'] - runs[0]['stream']['peak_mib']) * 1024 * 1024
+    return round(growth / (runs[-1]['comments'] - runs[0]['comments']))
+
+
+# 댓글 수만 늘린 가짜 종목을 기존 방식(목록)과 스트리밍 방식으로 분석해서 최대 메모리 비교
+# 감정 분석은 지연 없는 가짜 API, 필터는 서버와 같은 설정 (유사 중복 검사 포함, 대표 서명은 저장하지 않음)
+def main():
+    parser = argparse.ArgumentParser(description='분석 파이프라인 최대 메모리 비교 (목록 방식 vs 스트리밍 방식)')
+    parser.add_argument('--comments', default='10000,50000,100000', help='종목토론실 글 수 (쉼표로 구분)')
+    parser.add_argument('--news', type=int, default=1000, help='뉴스 글 수')
+    parser.add_argument('--investing', type=int, default=1000, help='인베스팅 글 수')
+    parser.add_argument('--batch-size', type=int, help='스트리밍 묶음 크기 (기본 server.STREAM_BATCH_SIZE)')
+    parser.add_argument('--cache-entries', type=int, default=2000, help='감정 분석 메모리 캐시 크기')
+    parser.add_argument('--no-near-duplicates', action='store_true', help='유사 중복 검사 제외')
+    parser.add_argument('--output', help='결과를 JSON 한 줄로 덧붙일 파일 (회귀 추적용)')
+    args = parser.parse_args()
+
+    use_memory_mongo()
+    import server
+
+    api = FakeSentimentAPI(latency=0)
+    server.sentiment_dispatcher.api_url = api.start()
+    server.sentiment_dispatcher.limiter.rate = 0  # 초당 요청 수 제한 없음
+    server.document_frequencies.collection = None  # 문서 빈도를 MongoDB에 합치지 않음
+    # 유사 중복 검사는 서버와 같은 설정으로 하되 대표 서명은 MongoDB에 저장하지 않음
+    # (실제로는 MongoDB 서버의 메모리이고, 메모리 MongoDB는 삽입마다 TTL 인덱스를 전부 검사해서 글 수의 제곱만큼 느려짐)
+    server.near_duplicates.collection = None
+    if args.batch_size:
+        server.STREAM_BATCH_SIZE = args.batch_size
+    if args.no_near_duplicates:
+        server.comment_filter.near_duplicates = None
+
+    now = datetime.now()
+    report = {'time': now.isoformat(timespec='seconds'), 'args': vars(args), 'runs': []}
+    try:
+        for comments in (int(count) for count in args.comments.split(',')):
+            counts = {'comments': comments, 'news': args.news, 'investing': args.investing}
+            list_peak, list_seconds, list_payload = measure(run_lists, server, counts, now, args.cache_entries)
+            stream_peak, stream_seconds, stream_payload = measure(run_stream, server, counts, now, args.cache_entries)
+            report['runs'].append({
+                'comments': comments,
+                'lists': {'peak_mib': list_peak, 'seconds': list_seconds},
+                'stream': {'peak_mib': stream_peak, 'seconds': stream_seconds},
+                'same_result': list_payload == stream_payload,
+            })
+            print(f"{comments:>7} comments: lists {list_peak:7.1f} MiB {list_seconds:6.1f}s | "
+                  f"stream {stream_peak:7.1f} MiB {stream_seconds:6.1f}s | "
+                  f"same result {list_payload == stream_payload}")
+    finally:
+        api.stop()
+
+    report['stream_bytes_per_comment'] = bytes_per_comment(report['runs'])
+    if report['stream_bytes_per_comment'] is not None:
+        print(f"stream peak grows ~{report['stream_bytes_per_comment']} bytes per comment "
+              f"(near-duplicate index stops at {server.near_duplicates.max_size} per ticker/source)")
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+
+if __name__ == '__main__':
+    main()
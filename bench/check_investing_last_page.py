@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import use_memory_mongo, use_mongo
+from replay_site import ReplaySite
+
+
+# 글이 모두 보관 기간 안에 있는 종목의 인베스팅 토론 페이지를 마지막 페이지 뒤(404)까지 크롤링했을 때
+# 목록의 끝으로 처리해서 체크포인트를 저장하는지, 다음 크롤링이 기존 글을 지우지 않고 이어서 수집하는지,
+# 종목 검색을 반복하지 않는지 확인 (실패하면 AssertionError)
+def main():
+    parser = argparse.ArgumentParser(description='인베스팅 마지막 페이지 뒤 404 처리 점검 (로컬 재생 서버)')
+    parser.add_argument('--pages', type=int, default=3, help='인베스팅 토론 페이지 수 (그 뒤는 404)')
+    parser.add_argument('--mongo', default='memory', help="'memory'(mongomock) 또는 MongoDB URI")
+    args = parser.parse_args()
+
+    if args.mongo == 'memory':
+        use_memory_mongo()
+    else:
+        use_mongo(args.mongo)
+
+    import comments_crawler
+
+    code = '990001'
+    site = ReplaySite()
+    base_url = site.start()
+    comments_crawler.NAVER_BASE_URL = base_url
+    comments_crawler.INVESTING_BASE_URL = base_url
+    site.register(code, 1, 1, args.pages, investing_last=args.pages)
+    comments_crawler.collection_investing.delete_many({'종목코드': code})
+    comments_crawler.collection_checkpoints.delete_many({'종목코드': code})
+    comments_crawler.collection_symbols.delete_many({'종목코드': code})
+    comments_crawler.symbol_registry.reload()
+    searches = comments_crawler.symbol_registry.stats()['searches']
+
+    try:
+        next_page, _ = comments_crawler.crawl_investing(code, raise_errors=True)
+        assert next_page is None, f"crawl stopped at page {next_page} instead of the end of the listing"
+        checkpoint = comments_crawler.collection_checkpoints.find_one({'종목코드': code, '소스': 'investing'})
+        assert checkpoint is not None, "checkpoint was not saved after crawling past the last page"
+        stored = comments_crawler.collection_investing.count_documents({'종목코드': code})
+        assert stored > 0, "no posts were stored"
+
+        # 다음 크롤링은 체크포인트부터 이어서 수집 (기존 글을 지우고 다시 수집하지 않음)
+        next_page, _ = comments_crawler.crawl_investing(code, raise_errors=True)
+        assert next_page is None
+        assert comments_crawler.collection_investing.count_documents({'종목코드': code}) == stored
+        searched = comments_crawler.symbol_registry.stats()['searches'] - searches
+        assert searched == 1, f"symbol search ran {searched} times"
+    finally:
+        site.stop()
+    print(f"ok: {stored} posts from {args.pages} pages, checkpoint saved, {site.requests} page requests")
+
+
+if __name__ == '__main__':
+    main()
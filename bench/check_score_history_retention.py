@@ -0,0 +1,58 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import use_memory_mongo, use_mongo
+
+
+# 보관 기간이 지난 점수 기록과 시간/일 단위 집계 문서가 삭제되고 최근 기록은 남는지 확인 (실패하면 AssertionError)
+# 실제 MongoDB는 TTL 삭제가 1분 간격으로 실행되므로 --timeout초까지 기다림
+def main():
+    parser = argparse.ArgumentParser(description='점수 이력 보관 기간(TTL) 점검')
+    parser.add_argument('--mongo', default='memory', help="'memory'(mongomock) 또는 MongoDB URI")
+    parser.add_argument('--timeout', type=float, default=150, help='TTL 삭제를 기다리는 최대 시간(초)')
+    args = parser.parse_args()
+
+    if args.mongo == 'memory':
+        use_memory_mongo()
+    else:
+        use_mongo(args.mongo)
+
+    import pymongo
+    from score_history import ScoreHistory
+
+    db = pymongo.MongoClient()['score_history_check']
+    for name in ('score_history', 'score_rollups'):
+        db.drop_collection(name)
+    history = ScoreHistory(db, retention=timedelta(days=1))
+
+    code = '990004'
+    counts = {'positive': {'comments': 3}, 'negative': {'news': 1}}
+    now = datetime.now()
+    history.record(code, 40.0, counts, at=now - timedelta(days=3))
+    history.record(code, 60.0, counts, at=now)
+
+    deadline = time.monotonic() + args.timeout
+    while True:
+        old = {
+            'samples': history.collection.count_documents({'종목코드': code, '시각': {'$lt': now - timedelta(days=2)}}),
+            'rollups': history.rollups.count_documents({'종목코드': code, '구간': {'$lt': now - timedelta(days=2)}}),
+        }
+        if not any(old.values()) or time.monotonic() >= deadline:
+            break
+        time.sleep(5)
+
+    assert not any(old.values()), f"records older than the retention were kept: {old}"
+    assert history.collection.count_documents({'종목코드': code}) == 1
+    for unit in ('hour', 'day'):
+        recent = history.history(code, unit)
+        assert [point['last_score'] for point in recent] == [60.0], f"{unit} history is {recent}"
+    print("ok: records and rollups past the retention expired, recent ones kept")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import use_memory_mongo, use_mongo
+
+
+# 크롤링/감정 분석 없이 단계만 진행하는 분석 (단계 사이마다 progress를 호출하므로 중단 여부를 바로 알 수 있음)
+class SlowAnalysis:
+    def __init__(self, steps=100, delay=0.02):
+        self.steps = steps
+        self.delay = delay
+        self.started = 0
+        self.cancelled = threading.Event()
+
+    def __call__(self, title, progress=None, timings=None):
+        from server import AnalysisCancelled
+
+        self.started += 1
+        progress = progress or (lambda stage, **data: None)
+        try:
+            for _ in range(self.steps):
+                progress('crawling')
+                time.sleep(self.delay)
+        except AnalysisCancelled:
+            self.cancelled.set()
+            raise
+        return {'code': title, 'run': self.started}
+
+
+# 스트림이 시작한 분석에 오래된 결과의 백그라운드 갱신이 합류한 뒤 스트림 연결이 끊기면 분석이 중단되는지,
+# 중단된 뒤의 요청은 중단된 분석의 예외 대신 새 분석의 결과를 받는지 확인 (실패하면 AssertionError)
+def main():
+    parser = argparse.ArgumentParser(description='스트림 연결 종료 시 분석 중단 점검')
+    parser.add_argument('--mongo', default='memory', help="'memory'(mongomock) 또는 MongoDB URI")
+    args = parser.parse_args()
+
+    if args.mongo == 'memory':
+        use_memory_mongo()
+    else:
+        use_mongo(args.mongo)
+
+    import server
+
+    analysis = SlowAnalysis()
+    server.analyzeStock = analysis
+    code = '990002'
+
+    stream = server.streamAnalysisEvents(code)
+    assert next(stream)[0] == 'started'
+    assert next(stream)[0] == 'crawling'
+
+    # 오래된 결과의 백그라운드 갱신이 진행 중인 분석에 합류 (_refresh_later가 확인한 뒤에 스트림이 분석을 시작한 경우)
+    server.result_cache._refresh(code, lambda: analysis(code))
+    stream.close()  # 클라이언트 연결 종료
+    assert analysis.cancelled.wait(5), "analysis kept running after the last subscriber disconnected"
+
+    payload = server.result_cache.get(code, lambda: analysis(code))
+    assert payload['run'] == 2, f"request after cancellation got {payload}"
+    print(f"ok: analysis cancelled after disconnect, next request ran a fresh analysis ({analysis.started} runs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import re
+import threading
+import time
+
+# 문장 종결 부호 기준으로 문장 분리 (네이버 API 응답 형식 흉내)
+SENTENCE_PATTERN = re.compile(r'[^.!?]+[.!?]')
+
+
+def analyze(text):
+    sentences = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        raw = match.group(0)
+        content = raw.strip()
+        if not content:
+            continue
+        if '상승' in content or '좋' in content:
+            sentiment = 'positive'
+        elif '하락' in content or '나쁘' in content:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+        sentences.append({
+            'content': content,
+            'offset': match.start() + len(raw) - len(raw.lstrip()),
+            'length': len(content),
+            'sentiment': sentiment
+        })
+    return sentences
+
+
+# 지연 시간과 실패율을 조절할 수 있는 가짜 감정 분석 API 서버
+class FakeSentimentAPI:
+    def __init__(self, latency=0.05, max_chars=1000, fail_every=0):
+        self.latency = latency
+        self.max_chars = max_chars
+        self.fail_every = fail_every
+        self.requests = 0
+        self.characters = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self, host='127.0.0.1', port=0):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                text = body.get('content', '')
+                with api._lock:
+                    api.requests += 1
+                    api.characters += len(text)
+                    failing = api.fail_every and api.requests % api.fail_every == 0
+                time.sleep(api.latency)
+
+                if failing:
+                    status, payload = 503, {'error': 'unavailable'}
+                elif len(text) > api.max_chars:
+                    status, payload = 400, {'error': 'content too long'}
+                else:
+                    status, payload = 200, {'sentences': analyze(text)}
+
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}/sentiment-analysis/v1/analyze"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+import os
+import random
+import re
+import threading
+import time
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 글 내용을 새로 만들 때 쓰는 단어 (EUC-KR로 인코딩 가능한 단어만)
+WORDS = ['삼성전자', '주가', '상승', '하락', '외국인', '기관', '개인', '매수', '매도', '실적', '반도체', '배당', '목표가',
+         '전망', '급등', '급락', '오늘', '내일', '장마감', '시초가', '거래량', '공매도', '수급', '금리', '환율', '호재',
+         '악재', '손절', '익절', '존버', '추매', '물타기', '저점', '고점', '지지선', '저항선', '좋다', '나쁘다', '기대',
+         '걱정', '분기', '영업이익', '매출', '증권사', '리포트', '상향', '하향', '신고가', '코스피', '나스닥']
+
+BOARD_DATE = re.compile(r'\d{4}\.\d{2}\.\d{2} \d{2}:\d{2}')
+BOARD_TITLE = re.compile(r'title="[^"]*">[^<]*</a>')
+NEWS_TITLE = re.compile(r'(class="tit" target="_top">)[^<]*(</a>)')
+INVESTING_DATE = re.compile(r'datetime="[^"]*"')
+INVESTING_CONTENT = re.compile(r'(data-test="comment-content">)[^<]*(</div>)')
+SEARCH_LINK = re.compile(r'href="/equities/[^"]*" class="js-inner-all-results-quote-item')
+
+
+def load_fixture(name, encoding):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as file:
+        return file.read().decode(encoding)
+
+
+# 저장해 둔 페이지를 틀로 사용해서 종목/페이지마다 날짜와 내용만 바꿔 돌려주는 로컬 서버
+# 종목별 페이지 수는 register(code, board, news, investing)로 지정, 그 뒤 페이지는 오래된 글만 있는 페이지를 반환
+# investing_last를 주면 인베스팅 토론 페이지는 그 페이지까지만 있고 그 뒤는 404 (실제 사이트의 마지막 페이지 뒤)
+class ReplaySite:
+    def __init__(self, latency=0.0, default_pages=(2, 1, 1)):
+        self.latency = latency
+        self.default_pages = default_pages
+        self.requests = 0
+        self._pages = {}
+        self._investing_last = {}
+        self._rendered = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._templates = {
+            'board': load_fixture('naver_board.html', 'euc-kr'),
+            'news': load_fixture('naver_news.html', 'euc-kr'),
+            'investing': load_fixture('investing_commentary.html', 'utf-8'),
+            'search': load_fixture('investing_search.html', 'utf-8'),
+        }
+        self._now = datetime.now()
+
+    def register(self, code, board, news, investing, investing_last=None):
+        self._pages[code] = (board, news, investing)
+        if investing_last is not None:
+            self._investing_last[code] = investing_last
+
+    def _sentence(self, rng):
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 14)))
+
+    def _render(self, kind, code, page):
+        template = self._templates[kind]
+        if kind == 'search':
+            html = SEARCH_LINK.sub(f'href="/equities/{code}" class="js-inner-all-results-quote-item', template, count=1)
+            return html.encode('utf-8'), 'utf-8'
+
+        board_pages, news_pages, investing_pages = self._pages.get(code, self.default_pages)
+        limit = {'board': board_pages, 'news': news_pages, 'investing': investing_pages}[kind]
+        rng = random.Random(f'{kind}:{code}:{page}')
+        fresh = page <= limit
+        counter = iter(range(1000))
+
+        # 최신 페이지일수록 최근 글 (1분 간격), 지정한 페이지 수를 넘으면 40일 전 글
+        def date(fmt):
+            index = next(counter)
+            if fresh:
+                return (self._now - timedelta(minutes=(page - 1) * 40 + index)).strftime(fmt)
+            return (self._now - timedelta(days=40, minutes=index)).strftime(fmt)
+
+        if kind == 'board':
+            html = BOARD_DATE.sub(lambda m: date('%Y.%m.%d %H:%M'), template)
+
+            def title(match):
+                text = self._sentence(rng)
+                return f'title="{text}">{text}</a>'
+
+            html = BOARD_TITLE.sub(title, html)
+            return html.encode('euc-kr', 'xmlcharrefreplace'), 'euc-kr'
+        if kind == 'news':
+            html = BOARD_DATE.sub(lambda m: date('%Y.%m.%d %H:%M'), template)
+            html = NEWS_TITLE.sub(lambda m: m.group(1) + self._sentence(rng) + m.group(2), html)
+            return html.encode('euc-kr', 'xmlcharrefreplace'), 'euc-kr'
+        html = INVESTING_DATE.sub(lambda m: 'datetime="{}.000Z"'.format(date('%Y-%m-%dT%H:%M:%S')), template)
+        html = INVESTING_CONTENT.sub(lambda m: m.group(1) + self._sentence(rng) + m.group(2), html)
+        return html.encode('utf-8'), 'utf-8'
+
+    def page(self, kind, code, page=1):
+        key = (kind, code, page)
+        with self._lock:
+            rendered = self._rendered.get(key)
+        if rendered is None:
+            rendered = self._render(kind, code, page)
+            with self._lock:
+                self._rendered[key] = rendered
+        return rendered
+
+    def route(self, path):
+        url = urlsplit(path)
+        query = parse_qs(url.query)
+        if url.path == '/item/board.naver':
+            return self.page('board', query['code'][0], int(query['page'][0]))
+        if url.path == '/item/news_news.nhn':
+            return self.page('news', query['code'][0], int(query['page'][0]))
+        if url.path == '/search/':
+            return self.page('search', query['q'][0])
+        match = re.fullmatch(r'/equities/(\w+)-commentary/(\d+)', url.path)
+        if match:
+            page = int(match.group(2))
+            if page > self._investing_last.get(match.group(1), page):
+                return None
+            return self.page('investing', match.group(1), page)
+        return None
+
+    def start(self, host='127.0.0.1', port=0):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                time.sleep(site.latency)
+                rendered = site.route(self.path)
+                if rendered is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body, charset = rendered
+                self.send_response(200)
+                self.send_header('Content-Type', f'text/html; charset={charset}')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,121 @@
+from collections import Counter
+from mongo_buffer import HASH_FIELD, content_hash
+import os
+import re
+import threading
+
+NEAR_DUPLICATE_CHUNK = 2000  # 유사 중복 검사를 한 번에 하는 문서 수
+
+
+# 금지어 파일 읽기 (한 줄에 하나, 빈 줄과 #으로 시작하는 줄은 무시)
+def load_blocklist(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        words = [line.strip() for line in file.readlines()]
+    return [word for word in words if word and not word.startswith('#')]
+
+
+# 여러 금지어를 한 번에 찾는 정규식 (긴 단어부터 시도하므로 겹치는 단어는 긴 쪽으로 집계)
+# Aho-Corasick 오토마톤 대신 정규식을 쓰는 것은 의도한 것: 순수 파이썬 오토마톤은 글자마다 인터프리터를 거쳐서
+# blocklist.txt 규모(수십 개)에서는 C로 도는 정규식보다 약 10배 느림 (금지어가 천 개 가까이 돼야 역전, bench/bench_blocklist.py)
+def compile_blocklist(words):
+    if not words:
+        return None
+    words = sorted(set(words), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(word) for word in words))
+
+
+# 댓글 필터 (금지어, 중복 내용, 유사 중복) - 기간/공감 비율 조건은 MongoDB 조회에서 처리
+# 금지어 파일이 바뀌면 다음 필터링 때 다시 읽음, 규칙별로 걸러낸 문서 수를 누적
+# near_duplicates(NearDuplicateStore)를 넘기면 소스별 설정에 따라 유사 중복도 제거
+class CommentFilter:
+    def __init__(self, blocklist_file, near_duplicates=None):
+        self.blocklist_file = blocklist_file
+        self.near_duplicates = near_duplicates
+        self._pattern = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        self._drops = Counter()
+        self.reload()
+
+    # 금지어 파일을 다시 읽음 (파일이 바뀌지 않았으면 force=True일 때만)
+    def reload(self, force=False):
+        try:
+            mtime = os.stat(self.blocklist_file).st_mtime
+        except OSError as e:
+            print(f"An error occurred while reading blocklist: {e}")
+            return
+        if not force and mtime == self._mtime:
+            return
+        pattern = compile_blocklist(load_blocklist(self.blocklist_file))
+        with self._lock:
+            self._pattern = pattern
+            self._mtime = mtime
+
+    # 문서를 하나씩 검사해서 통과한 문서만 반환 (cursor를 그대로 넘기면 전부 메모리에 올리지 않음)
+    # check_blocklist=True면 금지어도 검사 (종목토론실 댓글용)
+    # 같은 조회 결과를 묶음으로 나눠서 여러 번 호출할 때는 seen(set)을 함께 넘겨야 묶음 사이의 중복도 걸러냄
+    def filter(self, documents, check_blocklist=False, source=None, code=None, seen=None):
+        passed = self._filter_exact(documents, check_blocklist, seen)
+        if self.near_duplicates is None or not self.near_duplicates.enabled(source):
+            return (doc for doc, _ in passed)
+        return self._filter_near(passed, source, code)
+
+    # 중복 내용 필터링 (결과 전체 기준)
+    # 내용해시가 저장된 문서는 (종목코드, 내용해시) 유니크 인덱스 때문에 한 종목의 조회 결과 안에서 겹치지 않으므로 검사하지 않고,
+    # 해시가 없는 예전 문서만 앞 64비트 정수로 seen에 보관 (문서 수만큼 늘어나는 상태를 두지 않도록)
+    # 예전 문서는 보관 기간이 지나면 조회 조건에서 빠지므로 seen도 결국 비게 됨
+    def _filter_exact(self, documents, check_blocklist, seen=None):
+        self.reload()
+        pattern = self._pattern
+        seen = set() if seen is None else seen
+        drops = Counter()
+        try:
+            for doc in documents:
+                content = doc.get('내용', '').strip()  # 앞뒤 공백 제거
+                digest = doc.pop(HASH_FIELD, None)
+                key = None
+                if digest is None:
+                    digest = content_hash(content)
+                    key = int(digest[:16], 16)
+                    if key in seen:
+                        drops['duplicate'] += 1
+                        continue
+
+                if check_blocklist:
+                    # 키워드 필터링
+                    match = pattern.search(content) if pattern is not None else None
+                    if match:
+                        drops[f'blocklist:{match.group()}'] += 1
+                        continue  # 불필요한 키워드가 포함된 내용은 건너뜀
+
+                if key is not None:
+                    seen.add(key)
+                yield doc, digest
+        finally:
+            with self._lock:
+                self._drops.update(drops)
+
+    # 유사 중복 제거 (NEAR_DUPLICATE_CHUNK개씩 모아서 MinHash 계산)
+    def _filter_near(self, passed, source, code):
+        def check(chunk):
+            keep = self.near_duplicates.deduplicate(
+                source, code, [doc.get('내용', '') for doc, _ in chunk], [digest for _, digest in chunk],
+                [doc.get('날짜') for doc, _ in chunk]
+            )
+            with self._lock:
+                self._drops['near_duplicate'] += keep.count(False)
+            return [doc for (doc, _), kept in zip(chunk, keep) if kept]
+
+        chunk = []
+        for item in passed:
+            chunk.append(item)
+            if len(chunk) >= NEAR_DUPLICATE_CHUNK:
+                yield from check(chunk)
+                chunk = []
+        if chunk:
+            yield from check(chunk)
+
+    # 규칙별로 걸러낸 문서 수 (누적)
+    def stats(self):
+        with self._lock:
+            return dict(self._drops)
@@ -1,20 +1,80 @@
-from bs4 import BeautifulSoup
 from pymongo import MongoClient
 from datetime import datetime, timedelta
-import cloudscraper
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import deque
+import os
+import threading
+from http_pool import SessionPool
+from mongo_buffer import HASH_FIELD, WriteBuffer, content_hash, ensure_hash_index
+from crawl_checkpoint import CrawlCheckpoint, ensure_checkpoint_index, load_checkpoint, mark_rescan, save_checkpoint
+from page_parser import parse_board, parse_investing, parse_investing_quote, parse_news
+from symbol_registry import SymbolRegistry
+from metrics import count_usage, registry, stats_families, submit_in_context
 import re
+import time
 
 # MongoDB 설정
-client = MongoClient("mongodb://localhost:27017")
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017')  # 작업자를 여러 호스트에서 실행할 때 지정
+client = MongoClient(MONGO_URI)
 db = client['stock_data']
 collection_news = db.news
 collection_comments = db.comments
 collection_investing = db.investing_comments
+collection_checkpoints = db.crawl_checkpoints
+collection_symbols = db.investing_symbols
 
 # 인덱스 설정 (이미 설정되어 있다면 필요 없음)
 collection_news.create_index('종목코드')
 collection_comments.create_index('종목코드')
 collection_investing.create_index('종목코드')
+for collection in (collection_news, collection_comments, collection_investing):
+    ensure_hash_index(collection)
+    collection.create_index([('종목코드', 1), ('날짜', -1)])  # 기간 조건 조회/삭제용
+ensure_checkpoint_index(collection_checkpoints)
+
+# DB 쓰기 설정
+WRITE_BATCH_SIZE = 500  # 페이지 단위로 모아 쓰되, 이 개수를 넘으면 바로 기록
+UPSERT_RECORDS = True  # (종목코드, 내용해시) 기준 업서트로 재시도 시 중복 방지
+INCREMENTAL_CRAWL = True  # 체크포인트 이후의 새 글만 수집 (False면 매번 삭제 후 전체 수집)
+
+# 소스별 수집/보관 기간 (일)
+RETENTION_DAYS = {'comments': 3, 'news': 5, 'investing': 10}
+
+# 증분 크롤링 중에도 이 간격마다 보관 기간 전체를 다시 수집해서 바뀌는 값(공감/비공감 수)을 갱신
+# 바뀌는 값이 없는 소스는 재수집하지 않음
+RESCAN_INTERVALS = {'comments': timedelta(minutes=30)}
+
+# 크롤링 대상 주소 (테스트 시 로컬 서버 주소로 교체 가능)
+NAVER_BASE_URL = 'https://finance.naver.com'
+INVESTING_BASE_URL = 'https://kr.investing.com'
+
+# 동시 크롤링 설정
+SOURCE_CONCURRENCY = 3  # 동시에 실행하는 소스(댓글/뉴스/인베스팅) 수
+PAGE_CONCURRENCY = 4  # 소스별로 동시에 가져오는 페이지 수 (1이면 순차 크롤링)
+HOST_CONCURRENCY = 6  # 호스트별 최대 동시 요청 수 (세션 풀 크기)
+
+# 종목별 크롤링 락 (같은 종목의 삭제/저장 과정이 섞이지 않도록 한 번에 하나만 크롤링)
+_ticker_locks = {}
+_ticker_locks_guard = threading.Lock()
+
+# 새로 저장된 레코드를 받는 함수 목록, listener(source, records) 형태로 호출 (서버의 IDF 저장소 갱신 등)
+record_listeners = []
+
+# 모든 요청이 공유하는 세션 풀 (keep-alive, 재시도/백오프 포함)
+session_pool = SessionPool(max_per_host=HOST_CONCURRENCY)
+
+# 크롤링 지표 (/metrics)
+PAGES_FETCHED = registry.counter('crawler_pages_fetched_total', 'Pages fetched by the crawler', ['source', 'status'])
+DOCUMENTS_INSERTED = registry.counter('crawler_documents_inserted_total', 'New documents stored by the crawler', ['source'])
+CRAWLS_IN_FLIGHT = registry.gauge('crawler_in_flight', 'Source crawls currently running', ['source'])
+registry.add_collector(lambda: stats_families(
+    'crawler_http', session_pool.stats(), 'Crawler HTTP session pool',
+    counters=('requests', 'retries', 'failures', 'sessions_created', 'session_reuses')
+))
+registry.add_collector(lambda: stats_families(
+    'investing_symbols', symbol_registry.stats(), 'Investing symbol registry',
+    counters=('hits', 'misses', 'searches', 'refreshes')
+))
 
 # HTML 정보 가져오기 및 headers 세팅
 headers = {
@@ -22,6 +82,31 @@ headers = {
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9'
 }
 
+def notify_new_records(source, records):
+    DOCUMENTS_INSERTED.inc(len(records), source=source)
+    for listener in record_listeners:
+        try:
+            listener(source, records)
+        except Exception as e:
+            print(f"An error occurred in record listener: {e}")
+
+def ticker_lock(stock_code):
+    with _ticker_locks_guard:
+        lock = _ticker_locks.get(stock_code)
+        if lock is None:
+            lock = threading.Lock()
+            _ticker_locks[stock_code] = lock
+    return lock
+
+# 소스별 보관 기간의 시작 시각
+def retention_threshold(source, now=None):
+    return (now or datetime.now()) - timedelta(days=RETENTION_DAYS[source])
+
+# 공감/비공감 수 변환 ('1,234' -> 1234, 빈 값은 0)
+def parse_count(text):
+    digits = text.strip().replace(',', '')
+    return int(digits) if digits.isdigit() else 0
+
 def is_valid_text(text):
     # 한글만 포함된 경우 유효
     return bool(re.search('[가-힣]', text))
@@ -29,181 +114,350 @@ def is_valid_text(text):
 def delete_comments(stock_code, collection):
     collection.delete_many({'종목코드': stock_code})
 
+# 기간이 지난 글만 삭제
+def delete_expired(stock_code, collection, date_threshold):
+    collection.delete_many({'종목코드': stock_code, '날짜': {'$lt': date_threshold}})
+
+# 증분 크롤링 준비: 체크포인트가 있으면 기간이 지난 글만 지우고, 없으면 전체 삭제 후 처음부터 수집
+# (저장 형식이 바뀌기 전의 체크포인트도 없는 것으로 취급하므로 예전 형식의 글은 새로 수집됨)
+# 재수집 간격이 지났으면 이미 수집한 글에서 멈추지 않고 보관 기간 전체를 다시 수집
+def prepare_crawl(stock_code, source, collection, date_threshold):
+    checkpoint = load_checkpoint(collection_checkpoints, stock_code, source) if INCREMENTAL_CRAWL else None
+    if checkpoint is None:
+        delete_comments(stock_code, collection)
+        return CrawlCheckpoint()
+    delete_expired(stock_code, collection, date_threshold)
+    return mark_rescan(checkpoint, RESCAN_INTERVALS.get(source))
+
+# 체크포인트가 있으면 첫 페이지만 요청하고, 새 글이 이어지면 동시 요청 수를 늘림
+def initial_window(checkpoint):
+    return 1 if checkpoint.latest is not None and not checkpoint.rescan else None
+
+# 페이지는 받았지만 목록을 읽을 수 없음 (차단 페이지 등)
+# 목록의 끝(None)과 구분해서 예외로 처리하므로 크롤링이 중단되고 체크포인트는 저장하지 않음 (다음 크롤링에서 다시 수집)
+class PageContentError(Exception):
+    pass
+
+# 크롤링을 맡은 작업의 임대를 잃어서 중단 (다른 작업자가 같은 범위를 다시 크롤링하므로 체크포인트는 저장하지 않음)
+class CrawlCancelled(Exception):
+    pass
+
 def fetch_url(url):
-    scraper = cloudscraper.create_scraper()
-    response = scraper.get(url, headers=headers)
+    response = session_pool.get(url, headers=headers)
     response.raise_for_status()
     response.encoding = 'utf-8'
     return response.content
 
-def crawl_news(stock_code):
+# 여러 페이지를 동시에 가져오되 처리는 페이지 순서대로 진행
+# fetch_page(page)는 페이지 데이터(목록의 끝이면 None)를, process_page(page, data)는 계속 진행할지 여부를 반환
+# 가져오기에 실패하면 fetch_page는 None이 아니라 예외를 던져야 함 (None이면 끝까지 수집한 것으로 보고 체크포인트를 저장)
+# initial을 주면 그 수만큼만 먼저 요청하고, 새 데이터가 나올 때마다 두 배씩 늘려 concurrency까지 키움
+# 가져온 페이지 수는 source별로 집계 (ok: 데이터 있음, empty: 데이터 없음, error: 예외), metrics.metered() 안이면 그 작업의 pages에도 더함
+# first_page~last_page 범위만 가져오고, 범위 끝까지 새 데이터가 이어지면 다음 페이지 번호를 반환 (끝났으면 None)
+# cancelled(threading.Event)가 설정되면 다음 페이지를 처리하기 전에, 또는 끝났다고 반환하기 전에 CrawlCancelled를 던짐
+def crawl_pages(fetch_page, process_page, concurrency=None, initial=None, source=None, first_page=1, last_page=None,
+                cancelled=None):
+    concurrency = max(1, concurrency or PAGE_CONCURRENCY)
+    window = min(concurrency, max(1, initial or concurrency))
+
+    def fetch(page):
+        count_usage('pages')
+        try:
+            data = fetch_page(page)
+        except Exception:
+            PAGES_FETCHED.inc(source=source, status='error')
+            raise
+        PAGES_FETCHED.inc(source=source, status='empty' if data is None else 'ok')
+        return data
+
+    def check_cancelled():
+        if cancelled is not None and cancelled.is_set():
+            raise CrawlCancelled(f"Crawl of {source} pages cancelled")
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        pending = deque()
+        next_page = first_page
+        while True:
+            while len(pending) < window and (last_page is None or next_page <= last_page):
+                pending.append((next_page, submit_in_context(executor, fetch, next_page)))
+                next_page += 1
+            check_cancelled()
+            if not pending:
+                return next_page
+
+            page, future = pending.popleft()
+            data = future.result()
+            if data is None or not process_page(page, data):
+                check_cancelled()
+                return None  # 기준 날짜 이전 페이지나 이미 수집한 글에 도달하면 중단
+            window = min(window * 2, concurrency)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def news_page_url(stock_code, page):
+    return f'{NAVER_BASE_URL}/item/news_news.nhn?code={stock_code}&page={page}'
+
+def board_page_url(stock_code, page):
+    return f"{NAVER_BASE_URL}/item/board.naver?code={stock_code}&page={page}"
+
+# 페이지 행 -> (저장할 새 레코드 목록, 다음 페이지로 계속할지)
+# seen은 이번 크롤링에서 이미 본 내용 (중복 필터링), 이전 크롤링에서 수집한 글에 도달하면 중단
+def news_records(stock_code, rows, checkpoint, date_threshold, seen):
+    records = []
+    reached_known = False
+    for title, date in rows:
+        news_date = datetime.strptime(date, '%Y.%m.%d %H:%M')
+        title_hash = content_hash(title)
+        if checkpoint.is_known(news_date, title_hash):
+            reached_known = True  # 이전 크롤링에서 수집한 뉴스부터는 건너뜀
+            break
+        if news_date >= date_threshold and is_valid_text(title):
+            record = {
+                '종목코드': stock_code,
+                '날짜': news_date,
+                '내용': title,
+                HASH_FIELD: title_hash
+            }
+            if title not in seen:  # 중복 뉴스 필터링
+
+                records.append(record)
+                seen.add(title)
+                checkpoint.observe(news_date, title_hash)
+    return records, bool(records) and not reached_known
+
+# 이미 수집한 댓글도 같은 페이지에 있으면 레코드로 반환 (업서트로 공감/비공감 수만 갱신), 다음 페이지로는 넘어가지 않음
+def comment_records(stock_code, rows, checkpoint, date_threshold, seen):
+    records = []
+    reached_known = False
+    for date_text, comment, pos, neg in rows:
+        date = datetime.strptime(date_text, '%Y.%m.%d %H:%M')
+        if date >= date_threshold:
+            comment_hash = content_hash(comment)
+            if not reached_known and checkpoint.is_known(date, comment_hash):
+                reached_known = True  # 이전 크롤링에서 수집한 댓글부터는 다음 페이지를 가져오지 않음
+            if is_valid_text(comment):
+                record = {
+                    '종목코드': stock_code,
+                    '내용': comment,
+                    '날짜': date,
+                    '공감': parse_count(pos),
+                    '비공감': parse_count(neg),
+                    HASH_FIELD: comment_hash
+                }
+                if comment not in seen:  # 중복 댓글 필터링
+
+                    records.append(record)
+                    seen.add(comment)
+                    checkpoint.observe(date, comment_hash)
+    return records, bool(records) and not reached_known
+
+# url은 글을 가져온 토론 페이지 주소 (링크 필드)
+def investing_records(stock_code, rows, checkpoint, date_threshold, seen, url):
+    records = []
+    reached_known = False
+    for comment_text, date in rows:
+        comment_date = datetime.strptime(date, '%Y-%m-%dT%H:%M:%S.%fZ')
+        comment_hash = content_hash(comment_text)
+        if checkpoint.is_known(comment_date, comment_hash):
+            reached_known = True  # 이전 크롤링에서 수집한 글부터는 건너뜀
+            break
+
+        if comment_text in seen or not is_valid_text(comment_text):
+            continue
+
+        if comment_date >= date_threshold:
+            record = {
+                '종목코드': stock_code,
+                '내용': comment_text,
+                '날짜': comment_date.replace(microsecond=0),
+                '링크': url,
+                HASH_FIELD: comment_hash
+            }
+            records.append(record)
+            seen.add(comment_text)
+            checkpoint.observe(comment_date, comment_hash)
+    return records, bool(records) and not reached_known
+
+def crawl_news(stock_code, concurrency=None, first_page=1, last_page=None, checkpoint=None, raise_errors=False,
+               cancelled=None):
     try:
-        today = datetime.now().strftime('%Y.%m.%d')
-        date_threshold = datetime.now() - timedelta(days=5)
-        delete_comments(stock_code, collection_news)
+        date_threshold = retention_threshold('news')
+        if checkpoint is None:
+            checkpoint = prepare_crawl(stock_code, 'news', collection_news, date_threshold)
 
-        page = 1
         unique_news = set()
-        while True:
-            news_url = f'https://finance.naver.com/item/news_news.nhn?code={stock_code}&page={page}'
-            source_code = fetch_url(news_url)
+        buffer = WriteBuffer(collection_news, WRITE_BATCH_SIZE, upsert=UPSERT_RECORDS,
+                             on_written=lambda records: notify_new_records('news', records))
+
+        def fetch_page(page):
+            source_code = fetch_url(news_page_url(stock_code, page))
             if source_code is None:
-                break
-            html = BeautifulSoup(source_code, "lxml")
-            titles = html.select('.title')
-            title_result = [title.get_text().strip() for title in titles]
-            links = html.select('.title a')
-            link_result = ['https://finance.naver.com' + link['href'] for link in links]
-            dates = html.select('.date')
-            date_result = [date.get_text().strip() for date in dates]
-
-            data_exists = False
-            for i in range(len(title_result)):
-                news_date = datetime.strptime(date_result[i], '%Y.%m.%d %H:%M')
-                if news_date >= date_threshold and is_valid_text(title_result[i]):
-                    record = {
-                        '종목코드': stock_code,
-                        '날짜': date_result[i],
-                        '내용': title_result[i]
-                    }
-                    if title_result[i] not in unique_news:  # 중복 뉴스 필터링
-
-                        collection_news.insert_one(record)
-                        unique_news.add(title_result[i])
-                        data_exists = True
-
-            if not data_exists:
-                break
-            page += 1
+                return None
+            return parse_news(source_code)
+
+        def process_page(page, rows):
+            records, more = news_records(stock_code, rows, checkpoint, date_threshold, unique_news)
+            for record in records:
+                buffer.add(record)
+            buffer.flush()  # 페이지 단위로 한 번에 기록
+            return more
+
+        with buffer:  # 크롤링이 끝나거나 오류가 나도 남은 레코드 기록
+            next_page = crawl_pages(fetch_page, process_page, concurrency, initial_window(checkpoint), 'news',
+                                    first_page, last_page, cancelled)
+        if next_page is None:
+            save_checkpoint(collection_checkpoints, stock_code, 'news', checkpoint)
+        return next_page, checkpoint
     except Exception as e:
         print(f"An error occurred in crawl_news: {e}")
+        if raise_errors:
+            raise
+        return None, checkpoint
 
-def crawl_comments(stock_code):
+def crawl_comments(stock_code, concurrency=None, first_page=1, last_page=None, checkpoint=None, raise_errors=False,
+                   cancelled=None):
     try:
-        date_threshold = datetime.now() - timedelta(days=3)
-        delete_comments(stock_code, collection_comments)
+        date_threshold = retention_threshold('comments')
+        if checkpoint is None:
+            checkpoint = prepare_crawl(stock_code, 'comments', collection_comments, date_threshold)
 
-        page_num = 1
         unique_comments = set()
-        while True:
-            comment_url = f"https://finance.naver.com/item/board.naver?code={stock_code}&page={page_num}"
-            source_code = fetch_url(comment_url)
+        buffer = WriteBuffer(collection_comments, WRITE_BATCH_SIZE, upsert=UPSERT_RECORDS,
+                             on_written=lambda records: notify_new_records('comments', records))
+
+        def fetch_page(page_num):
+            source_code = fetch_url(board_page_url(stock_code, page_num))
             if source_code is None:
-                break
-            soup = BeautifulSoup(source_code, 'html.parser')
-            table = soup.find('table', {'class': 'type2'})
-            if not table:
-                print(f"No table found on page {page_num} for stock {stock_code}")
-                break
-            tb = table.select('tbody > tr')
-            if not tb:
-                break
-
-            data_exists = False
-            for i in range(2, len(tb)):
-                if len(tb[i].select('td > span')) > 0:
-                    date = datetime.strptime(tb[i].select('td > span')[0].text, '%Y.%m.%d %H:%M')
-                    if date >= date_threshold:
-                        comment = tb[i].select('td.title > a')[0]['title']
-                        pos = tb[i].select('td > strong')[0].text
-                        neg = tb[i].select('td > strong')[1].text
-                        if is_valid_text(comment):
-                            record = {
-                                '종목코드': stock_code,
-                                '내용': comment,
-                                '날짜': date.strftime('%Y.%m.%d %H:%M'),
-                                '공감': pos,
-                                '비공감': neg
-                            }
-                            if comment not in unique_comments:  # 중복 댓글 필터링
-
-                                collection_comments.insert_one(record)
-                                unique_comments.add(comment)
-                                data_exists = True
-
-            if not data_exists:
-                break
-            page_num += 1
+                return None
+            rows = parse_board(source_code)
+            if rows is None:
+                raise PageContentError(f"No table found on page {page_num} for stock {stock_code}")
+            return rows
+
+        def process_page(page_num, rows):
+            records, more = comment_records(stock_code, rows, checkpoint, date_threshold, unique_comments)
+            for record in records:
+                buffer.add(record)
+            buffer.flush()  # 페이지 단위로 한 번에 기록
+            return more
+
+        with buffer:  # 크롤링이 끝나거나 오류가 나도 남은 레코드 기록
+            next_page = crawl_pages(fetch_page, process_page, concurrency, initial_window(checkpoint), 'comments',
+                                    first_page, last_page, cancelled)
+        if next_page is None:
+            save_checkpoint(collection_checkpoints, stock_code, 'comments', checkpoint)
+        return next_page, checkpoint
     except Exception as e:
         print(f"An error occurred in crawl_comments: {e}")
+        if raise_errors:
+            raise
+        return None, checkpoint
 
 def get_url_info(url):
     try:
-        scraper = cloudscraper.create_scraper()
-        response = scraper.get(url, headers=headers)
+        response = session_pool.get(url, headers=headers)
         response.raise_for_status()
-        response.encoding = 'utf-8'
-        return BeautifulSoup(response.content, 'lxml')
+        return response.content
     except Exception as e:
         print(f"An error occurred in get_url_info: {e}")
         return None
 
-def get_discussion_url(company_code):
-    try:
-        base_url = 'https://kr.investing.com/search/?q='
-        search_url = f"{base_url}{company_code}"
-        soup = get_url_info(search_url)
-        if soup is None:
-            return None
-        first_result = soup.select_one('a.js-inner-all-results-quote-item')
-        if first_result:
-            href = first_result['href']
-            discussion_url = f"https://kr.investing.com{href}-commentary"
-
-            return discussion_url
-        else:
-            print(f"Failed to find discussion URL for {company_code}")
-            return None
-    except Exception as e:
-        print(f"An error occurred in get_discussion_url: {e}")
+# 인베스팅 검색으로 종목 경로와 회사명 확인 (없으면 None)
+def search_investing_symbol(company_code):
+    source_code = get_url_info(f'{INVESTING_BASE_URL}/search/?q={company_code}')
+    if source_code is None:
         return None
+    return parse_investing_quote(source_code)
+
+# 종목코드 -> 인베스팅 종목 경로 (메모리 + MongoDB, 처음 보는 종목만 검색)
+# python symbol_registry.py symbols.csv로 미리 일괄 등록 가능
+symbol_registry = SymbolRegistry(collection_symbols, search_investing_symbol)
+
+def discussion_page_url(slug, page=None):
+    url = f"{INVESTING_BASE_URL}{slug}-commentary"
+    return url if page is None else f"{url}/{page}"
 
-def crawl_investing(stock_code):
+def crawl_investing(stock_code, concurrency=None, first_page=1, last_page=None, checkpoint=None, raise_errors=False,
+                    cancelled=None):
     try:
-        today = datetime.now()
-        date_threshold = today - timedelta(days=10)
-        delete_comments(stock_code, collection_investing)
-        discussion_url = get_discussion_url(stock_code)
-        if not discussion_url:
+        date_threshold = retention_threshold('investing')
+        if checkpoint is None:
+            checkpoint = prepare_crawl(stock_code, 'investing', collection_investing, date_threshold)
+        slug = symbol_registry.get(stock_code)
+        if not slug:
             print(f"Failed to find discussion URL for {stock_code}")
-            return
+            return None, checkpoint
+        target = {'slug': slug}
 
-        page = 1
         scraped_comments = set()
-        while True:
-            url = f"{discussion_url}/{page}"
-            soup = get_url_info(url)
-            if soup is None:
-                break
-            comments = soup.select('div.break-words.leading-5')
-            dates = soup.select('time')
-
-            if not comments or not dates:
-                break
-
-            data_exists = False
-            for comment, date in zip(comments, dates):
-                comment_text = comment.get_text().strip()
-                comment_date = datetime.strptime(date['datetime'], '%Y-%m-%dT%H:%M:%S.%fZ')
-
-                if comment_text in scraped_comments or not is_valid_text(comment_text):
-                    continue
-
-                if comment_date >= date_threshold:
-                    record = {
-                        '종목코드': stock_code,
-                        '내용': comment_text,
-                        '날짜': comment_date.strftime('%Y-%m-%d %H:%M:%S'),
-                        '링크': url
-                    }
-                    if comment_text not in scraped_comments:  # 중복 댓글 필터링
-
-                        collection_investing.insert_one(record)
-                        scraped_comments.add(comment_text)
-                        data_exists = True
-
-            if not data_exists:
-                break
-            page += 1
+        buffer = WriteBuffer(collection_investing, WRITE_BATCH_SIZE, upsert=UPSERT_RECORDS,
+                             on_written=lambda records: notify_new_records('investing', records))
+
+        # 토론 페이지가 404면 종목 경로가 바뀌었는지 다시 확인하고, 바뀌었으면 새 경로로 한 번 더 요청
+        # 경로가 그대로면 마지막 페이지 뒤를 요청한 것이므로 목록의 끝(None)
+        # 그 밖의 실패는 예외를 그대로 던져 크롤링을 중단 (체크포인트를 저장하지 않아야 빠진 페이지가 남지 않음)
+        def fetch_page(page):
+            slug = target['slug']
+            response = session_pool.get(discussion_page_url(slug, page), headers=headers)
+            if response.status_code == 404:
+                fresh_slug = symbol_registry.refresh(stock_code, slug)
+                if fresh_slug == slug:
+                    return None
+                target['slug'] = fresh_slug
+                response = session_pool.get(discussion_page_url(fresh_slug, page), headers=headers)
+            response.raise_for_status()
+            return parse_investing(response.content)
+
+        def process_page(page, rows):
+            records, more = investing_records(stock_code, rows, checkpoint, date_threshold, scraped_comments,
+                                              discussion_page_url(target['slug'], page))
+            for record in records:
+                buffer.add(record)
+            buffer.flush()  # 페이지 단위로 한 번에 기록
+            return more
+
+        with buffer:  # 크롤링이 끝나거나 오류가 나도 남은 레코드 기록
+            next_page = crawl_pages(fetch_page, process_page, concurrency, initial_window(checkpoint), 'investing',
+                                    first_page, last_page, cancelled)
+        if next_page is None:
+            save_checkpoint(collection_checkpoints, stock_code, 'investing', checkpoint)
+        return next_page, checkpoint
     except Exception as e:
         print(f"An error occurred in crawl_investing: {e}")
+        if raise_errors:
+            raise
+        return None, checkpoint
+
+# 소스별 크롤링 함수
+# crawler(stock_code, concurrency, first_page, last_page, checkpoint, raise_errors, cancelled) -> (다음 페이지 또는 None, 체크포인트)
+# 체크포인트를 넘기면 이어서 수집하는 것으로 보고 기존 글을 지우지 않음, 전체 수집이 끝나면(None) 체크포인트 저장
+CRAWLERS = {'comments': crawl_comments, 'news': crawl_news, 'investing': crawl_investing}
+
+# 세 가지 소스를 동시에 크롤링
+# concurrent=False면 기존처럼 소스와 페이지를 하나씩 순서대로 처리
+# 같은 종목을 동시에 크롤링하려 하면 앞선 크롤링이 끝날 때까지 기다림
+# on_source_done(source)를 넘기면 소스별 크롤링이 끝나는 순서대로 호출
+# timings(dict)를 넘기면 소스별 크롤링 소요 시간(초)을 기록
+def crawl_all(stock_code, concurrent=True, on_source_done=None, timings=None):
+    def run(source, concurrency=None):
+        started = time.perf_counter()
+        with CRAWLS_IN_FLIGHT.track_inflight(source=source):
+            CRAWLERS[source](stock_code, concurrency=concurrency)
+        if timings is not None:
+            timings[source] = time.perf_counter() - started
+
+    with ticker_lock(stock_code):
+        if not concurrent:
+            for source in CRAWLERS:
+                run(source, concurrency=1)
+                if on_source_done is not None:
+                    on_source_done(source)
+            return
+
+        with ThreadPoolExecutor(max_workers=SOURCE_CONCURRENCY) as executor:
+            futures = {submit_in_context(executor, run, source): source for source in CRAWLERS}
+            for future in as_completed(futures):
+                future.result()
+                if on_source_done is not None:
+                    on_source_done(futures[future])
@@ -0,0 +1,99 @@
+from datetime import datetime
+
+# 저장 형식 버전 (날짜를 문자열에서 datetime으로 바꾸면서 2로 올림)
+# 버전이 다른 체크포인트는 없는 것으로 취급해 전체를 다시 수집
+SCHEMA_VERSION = 2
+
+
+# 종목/소스별 크롤링 체크포인트
+# latest: 이미 저장된 가장 최신 글의 날짜, boundary: 그 날짜에 올라온 글들의 내용해시
+# rescanned_at: 보관 기간 전체를 마지막으로 다시 수집한 시각
+# rescan=True면 이미 수집한 글에서 멈추지 않고 보관 기간 끝까지 다시 수집 (공감/비공감 수 갱신용)
+class CrawlCheckpoint:
+    def __init__(self, latest=None, boundary=(), rescanned_at=None):
+        self.latest = latest
+        self.boundary = set(boundary)
+        self.newest = latest
+        self.newest_hashes = set(boundary)
+        self.rescanned_at = rescanned_at
+        self.rescan = False
+
+    # 이전 크롤링에서 이미 수집한 글인지 확인 (목록은 최신순으로 정렬되어 있음)
+    def is_known(self, date, hash_value):
+        if self.latest is None or self.rescan:
+            return False
+        if date < self.latest:
+            return True
+        return date == self.latest and hash_value in self.boundary
+
+    # 이번 크롤링에서 수집한 글을 반영
+    def observe(self, date, hash_value):
+        if self.newest is None or date > self.newest:
+            self.newest = date
+            self.newest_hashes = {hash_value}
+        elif date == self.newest:
+            self.newest_hashes.add(hash_value)
+
+
+# 진행 중인 체크포인트를 문서로 변환 (작업 큐에서 페이지 범위를 나눠 이어서 수집할 때 사용)
+def checkpoint_state(checkpoint):
+    return {
+        '최신날짜': checkpoint.latest,
+        '경계해시': sorted(checkpoint.boundary),
+        '수집최신날짜': checkpoint.newest,
+        '수집경계해시': sorted(checkpoint.newest_hashes),
+        '재수집시각': checkpoint.rescanned_at,
+        '재수집': checkpoint.rescan,
+    }
+
+
+def restore_checkpoint(state):
+    checkpoint = CrawlCheckpoint(state.get('최신날짜'), state.get('경계해시', []), state.get('재수집시각'))
+    checkpoint.newest = state.get('수집최신날짜')
+    checkpoint.newest_hashes = set(state.get('수집경계해시', []))
+    checkpoint.rescan = state.get('재수집', False)
+    return checkpoint
+
+
+def ensure_checkpoint_index(collection):
+    collection.create_index([('종목코드', 1), ('소스', 1)], unique=True)
+
+
+# 저장된 체크포인트 문서 -> CrawlCheckpoint (없거나 형식이 다르면 None)
+def checkpoint_from_document(doc):
+    if doc is None or doc.get('스키마', 1) != SCHEMA_VERSION:
+        return None
+    return CrawlCheckpoint(doc.get('최신날짜'), doc.get('경계해시', []), doc.get('재수집시각'))
+
+
+# 마지막 전체 재수집 후 interval(timedelta)이 지났으면 이번 크롤링을 재수집으로 표시
+def mark_rescan(checkpoint, interval, now=None):
+    if interval is None or checkpoint.latest is None:
+        return checkpoint
+    now = now or datetime.now()
+    checkpoint.rescan = checkpoint.rescanned_at is None or now - checkpoint.rescanned_at >= interval
+    return checkpoint
+
+
+# 이번 크롤링에서 수집한 가장 최신 글을 저장하는 update 문서
+def checkpoint_update(checkpoint):
+    now = datetime.now()
+    values = {
+        '최신날짜': checkpoint.newest,
+        '경계해시': sorted(checkpoint.newest_hashes),
+        '스키마': SCHEMA_VERSION,
+        '갱신시각': now
+    }
+    if checkpoint.rescan or checkpoint.latest is None:
+        values['재수집시각'] = now  # 보관 기간 전체를 수집했음
+    return {'$set': values}
+
+
+def load_checkpoint(collection, stock_code, source):
+    return checkpoint_from_document(collection.find_one({'종목코드': stock_code, '소스': source}))
+
+
+def save_checkpoint(collection, stock_code, source, checkpoint):
+    if checkpoint.newest is None:
+        return
+    collection.update_one({'종목코드': stock_code, '소스': source}, checkpoint_update(checkpoint), upsert=True)
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import os
+import socket
+import time
+import uuid
+
+# 작업 상태
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+# 작업자 ID (호스트:프로세스:임의값)
+def new_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+# MongoDB 컬렉션 기반 크롤링 작업 큐 (여러 프로세스/호스트의 작업자가 같은 컬렉션을 공유)
+# 작업 하나 = (종목코드, 소스)의 페이지 범위 [시작페이지, 시작페이지 + 페이지수 - 1]
+# 범위를 다 가져왔는데 새 글이 이어지면 같은 문서를 다음 범위로 바꿔 다시 대기열에 넣음 (진행 중인 체크포인트도 함께 저장)
+# 작업자는 lease 초 동안 작업을 임대하고 heartbeat로 연장, 작업자가 죽어서 임대가 만료되면 다른 작업자가 다시 가져감
+# 임대할 때마다 새 임대토큰을 발급하고 heartbeat/complete/fail은 그 토큰이 그대로일 때만 반영 (다시 임대된 작업을 덮어쓰지 않음)
+# 범위마다 가져온 페이지 수를 작업 문서에 더함 (작업을 등록한 서버가 사용량으로 기록)
+# 실패하거나 임대가 만료된 작업은 max_attempts번까지 retry_delay * 2^(시도-1)초 뒤에 재시도
+# (종목코드, 소스)마다 진행 중인 작업은 하나만 존재 (활성 필드에 부분 고유 인덱스)
+class CrawlTaskQueue:
+    def __init__(self, collection, lease=60, max_attempts=3, retry_delay=5, pages_per_task=10,
+                 retention=timedelta(days=1)):
+        self.collection = collection
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.pages_per_task = pages_per_task
+
+        self.collection.create_index([('종목코드', 1), ('소스', 1)], unique=True,
+                                     partialFilterExpression={'활성': True})
+        self.collection.create_index([('상태', 1), ('실행시각', 1)])
+        # 끝난 작업은 retention이 지나면 MongoDB가 자동으로 삭제
+        self.collection.create_index('완료시각', expireAfterSeconds=int(retention.total_seconds()))
+
+    # 작업 등록 후 작업 ID 반환 (같은 종목/소스의 작업이 이미 대기/실행 중이면 그 작업 ID)
+    def enqueue(self, stock_code, source):
+        now = datetime.now()
+        task = {
+            '종목코드': stock_code,
+            '소스': source,
+            '상태': QUEUED,
+            '활성': True,
+            '시작페이지': 1,
+            '페이지수': self.pages_per_task,
+            '시도': 0,
+            '범위수': 0,
+            '실행시각': now,
+            '등록시각': now,
+        }
+        for _ in range(3):
+            try:
+                return self.collection.insert_one(task).inserted_id
+            except DuplicateKeyError:
+                existing = self.collection.find_one({'종목코드': stock_code, '소스': source, '활성': True}, {'_id': 1})
+                if existing is not None:
+                    return existing['_id']
+                task.pop('_id', None)  # 그 사이에 끝났으면 다시 등록
+        raise RuntimeError(f"Failed to enqueue crawl task for {stock_code}/{source}")
+
+    # 임대 만료 후에도 재시도 횟수를 다 쓴 작업은 실패 처리
+    def _fail_exhausted(self, now):
+        self.collection.update_many(
+            {'활성': True, '상태': RUNNING, '임대만료': {'$lt': now}, '시도': {'$gte': self.max_attempts}},
+            {'$set': {'상태': FAILED, '오류': 'lease expired', '완료시각': now}, '$unset': {'활성': '', '작업자': '', '임대토큰': ''}}
+        )
+
+    # 실행할 작업 하나를 임대 (없으면 None), 대기 중인 작업과 임대가 만료된 작업 중 오래된 것부터
+    def claim(self, worker):
+        now = datetime.now()
+        self._fail_exhausted(now)
+        return self.collection.find_one_and_update(
+            {
+                '활성': True,
+                '시도': {'$lt': self.max_attempts},
+                '$or': [
+                    {'상태': QUEUED, '실행시각': {'$lte': now}},
+                    {'상태': RUNNING, '임대만료': {'$lt': now}},
+                ],
+            },
+            {
+                '$set': {'상태': RUNNING, '작업자': worker, '임대토큰': uuid.uuid4().hex,
+                         '임대만료': now + timedelta(seconds=self.lease), '시작시각': now},
+                '$inc': {'시도': 1},
+            },
+            sort=[('실행시각', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    # 이 작업자가 임대한 그대로인 작업 (임대가 만료되어 다른 작업자가 가져갔으면 토큰이 바뀜)
+    @staticmethod
+    def _leased(task, worker):
+        return {'_id': task['_id'], '작업자': worker, '임대토큰': task['임대토큰'], '상태': RUNNING}
+
+    # 임대 연장, 다른 작업자에게 넘어간 작업이면 False
+    def heartbeat(self, task, worker):
+        result = self.collection.update_one(
+            self._leased(task, worker),
+            {'$set': {'임대만료': datetime.now() + timedelta(seconds=self.lease)}}
+        )
+        return result.matched_count == 1
+
+    # 범위 처리 완료: next_page가 None이면 작업 끝, 아니면 다음 범위를 대기열에 넣음
+    # pages는 이 범위에서 가져온 페이지 수, 다른 작업자에게 넘어간 작업이면 아무것도 바꾸지 않고 False
+    def complete(self, task, worker, next_page=None, checkpoint=None, pages=0):
+        now = datetime.now()
+        if next_page is None:
+            update = {
+                '$set': {'상태': DONE, '완료시각': now},
+                '$unset': {'활성': '', '작업자': '', '임대토큰': '', '임대만료': '', '체크포인트': ''},
+                '$inc': {'범위수': 1, '가져온페이지수': pages},
+            }
+        else:
+            update = {
+                '$set': {'상태': QUEUED, '시작페이지': next_page, '실행시각': now, '시도': 0, '체크포인트': checkpoint},
+                '$unset': {'작업자': '', '임대토큰': '', '임대만료': ''},
+                '$inc': {'범위수': 1, '가져온페이지수': pages},
+            }
+        result = self.collection.update_one(self._leased(task, worker), update)
+        return result.matched_count == 1
+
+    # 범위 처리 실패: 재시도 횟수가 남았으면 잠시 뒤 다시 대기열로, 아니면 실패 처리
+    def fail(self, task, worker, error, pages=0):
+        now = datetime.now()
+        if task['시도'] >= self.max_attempts:
+            update = {
+                '$set': {'상태': FAILED, '오류': str(error), '완료시각': now},
+                '$unset': {'활성': '', '작업자': '', '임대토큰': '', '임대만료': ''},
+                '$inc': {'가져온페이지수': pages},
+            }
+        else:
+            delay = self.retry_delay * 2 ** (task['시도'] - 1)
+            update = {
+                '$set': {'상태': QUEUED, '오류': str(error), '실행시각': now + timedelta(seconds=delay)},
+                '$unset': {'작업자': '', '임대토큰': '', '임대만료': ''},
+                '$inc': {'가져온페이지수': pages},
+            }
+        result = self.collection.update_one(self._leased(task, worker), update)
+        return result.matched_count == 1
+
+    # 작업들이 지금까지 가져온 페이지 수 합계
+    def fetched_pages(self, task_ids):
+        return sum(doc.get('가져온페이지수', 0)
+                   for doc in self.collection.find({'_id': {'$in': list(task_ids)}}, {'가져온페이지수': 1}))
+
+    # 작업들이 끝날 때까지 대기 (on_done(task_id, 상태)는 작업이 끝나는 순서대로 호출)
+    # 반환값: {작업 ID: 상태}, timeout이 지나면 끝나지 않은 작업의 상태는 그대로 반환
+    def wait(self, task_ids, timeout=None, on_done=None, poll_interval=0.2):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        statuses = {}
+        finished = set()
+        while True:
+            documents = self.collection.find({'_id': {'$in': list(task_ids)}}, {'상태': 1})
+            if self._observe(documents, statuses, finished, on_done) == len(set(task_ids)):
+                return statuses
+            if deadline is not None and time.monotonic() >= deadline:
+                return statuses
+            time.sleep(poll_interval)
+
+    # wait와 같지만 비동기 MongoDB 컬렉션(collection, 같은 작업 컬렉션)으로 조회하면서 이벤트 루프를 막지 않음
+    async def wait_async(self, collection, task_ids, timeout=None, on_done=None, poll_interval=0.2):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        statuses = {}
+        finished = set()
+        while True:
+            documents = await collection.find({'_id': {'$in': list(task_ids)}}, {'상태': 1}).to_list()
+            if self._observe(documents, statuses, finished, on_done) == len(set(task_ids)):
+                return statuses
+            if deadline is not None and time.monotonic() >= deadline:
+                return statuses
+            await asyncio.sleep(poll_interval)
+
+    # 조회한 상태를 반영하고 지금까지 끝난 작업 수 반환
+    def _observe(self, documents, statuses, finished, on_done):
+        for doc in documents:
+            statuses[doc['_id']] = doc['상태']
+            if doc['상태'] in (DONE, FAILED) and doc['_id'] not in finished:
+                finished.add(doc['_id'])
+                if on_done is not None:
+                    on_done(doc['_id'], doc['상태'])
+        return len(finished)
+
+    def stats(self):
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for doc in self.collection.aggregate([{'$group': {'_id': '$상태', 'count': {'$sum': 1}}}]):
+            counts[doc['_id']] = doc['count']
+        return counts
@@ -0,0 +1,152 @@
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+import comments_crawler
+from crawl_checkpoint import checkpoint_state, restore_checkpoint
+from crawl_queue import CrawlTaskQueue, new_worker_id
+from idf_store import DocumentFrequencyStore
+from metrics import metered
+
+# 작업 큐 설정 (서버와 같은 값을 사용해야 함)
+TASK_LEASE = 60  # 작업 임대 시간(초), 작업자가 죽으면 이 시간이 지난 뒤 다른 작업자가 가져감
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_DELAY = 5
+PAGES_PER_TASK = 10  # 작업 하나에서 가져오는 최대 페이지 수
+
+# 문서 빈도(키워드 idf) 공유 설정 (서버와 같은 값을 사용해야 함)
+IDF_BUCKETS = 2 ** 20
+IDF_SAVE_EVERY = 5000  # 이 문서 수가 쌓이면 바로 MongoDB에 합침
+IDF_SYNC_INTERVAL = 300  # 이 시간(초)마다 새 빈도를 합치고 전체 빈도를 다시 읽음
+STOPWORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopword.txt')
+
+
+def create_queue():
+    return CrawlTaskQueue(comments_crawler.db.crawl_tasks, TASK_LEASE, TASK_MAX_ATTEMPTS, TASK_RETRY_DELAY, PAGES_PER_TASK)
+
+
+# 서버와 작업자가 MongoDB에서 공유하는 문서 빈도 저장소
+def create_document_frequencies(stop_words, min_df=2):
+    return DocumentFrequencyStore(None, IDF_BUCKETS, stop_words, IDF_SAVE_EVERY, comments_crawler.db.idf_counts,
+                                  min_df, IDF_SYNC_INTERVAL)
+
+
+# 크롤링 작업자: 작업 큐에서 (종목코드, 소스, 페이지 범위)를 임대해서 크롤링
+# 작업을 처리하는 동안 lease / 3초마다 임대를 연장, 임대를 잃으면(다른 작업자가 가져갔거나 lease 동안 연장하지 못하면)
+# 다음 페이지를 처리하기 전에 크롤링을 중단하고 결과는 큐에 반영하지 않음 (같은 종목을 두 작업자가 함께 크롤링하지 않도록)
+class CrawlWorker:
+    def __init__(self, queue, worker_id=None, poll_interval=1.0):
+        self.queue = queue
+        self.worker_id = worker_id or new_worker_id()
+        self.poll_interval = poll_interval
+        self.processed = 0
+
+    def _heartbeat(self, task, finished, lost):
+        renewed = time.monotonic()
+        while not finished.wait(self.queue.lease / 3):
+            try:
+                if self.queue.heartbeat(task, self.worker_id):
+                    renewed = time.monotonic()
+                    continue
+            except Exception as e:
+                print(f"An error occurred while renewing crawl task {task['_id']}: {e}")
+                if time.monotonic() - renewed < self.queue.lease:
+                    continue
+            print(f"Lost lease on crawl task {task['_id']} ({task['종목코드']}/{task['소스']})")
+            lost.set()
+            return
+
+    def run_task(self, task):
+        crawler = comments_crawler.CRAWLERS[task['소스']]
+        checkpoint = restore_checkpoint(task['체크포인트']) if task.get('체크포인트') else None
+        first_page = task['시작페이지']
+        last_page = first_page + task['페이지수'] - 1
+
+        finished = threading.Event()
+        lost = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task, finished, lost), daemon=True)
+        heartbeat.start()
+        try:
+            with comments_crawler.CRAWLS_IN_FLIGHT.track_inflight(source=task['소스']), metered() as usage:
+                next_page, checkpoint = crawler(task['종목코드'], first_page=first_page, last_page=last_page,
+                                                checkpoint=checkpoint, raise_errors=True, cancelled=lost)
+        except Exception as e:
+            self.queue.fail(task, self.worker_id, e, usage.get('pages'))
+            return False
+        finally:
+            finished.set()
+            heartbeat.join()
+
+        state = checkpoint_state(checkpoint) if next_page is not None else None
+        return self.queue.complete(task, self.worker_id, next_page, state, usage.get('pages'))
+
+    # 작업을 계속 처리 (stop 이벤트가 설정되거나, idle_exit초 동안 할 일이 없거나, max_tasks개를 처리하면 종료)
+    def run(self, stop=None, idle_exit=None, max_tasks=None):
+        idle_since = time.monotonic()
+        while stop is None or not stop.is_set():
+            if max_tasks is not None and self.processed >= max_tasks:
+                return
+            task = self.queue.claim(self.worker_id)
+            if task is None:
+                if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    return
+                time.sleep(self.poll_interval)
+                continue
+            self.run_task(task)
+            self.processed += 1
+            idle_since = time.monotonic()
+
+
+def run_process(threads, idle_exit, naver_base_url, investing_base_url):
+    if naver_base_url:
+        comments_crawler.NAVER_BASE_URL = naver_base_url
+    if investing_base_url:
+        comments_crawler.INVESTING_BASE_URL = investing_base_url
+    queue = create_queue()
+    # 새로 저장한 글은 서버와 같은 문서 빈도(idf)에 반영
+    with open(STOPWORD_FILE, 'r', encoding='utf-8') as file:
+        document_frequencies = create_document_frequencies(frozenset(line.strip() for line in file))
+    comments_crawler.record_listeners.append(
+        lambda source, records: document_frequencies.add_documents([record['내용'] for record in records])
+    )
+    document_frequencies.start(read=False)  # 작업자는 idf를 조회하지 않으므로 합치기만 함
+    workers = [CrawlWorker(queue) for _ in range(threads)]
+    runners = [threading.Thread(target=worker.run, kwargs={'idle_exit': idle_exit}) for worker in workers]
+    try:
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+    finally:
+        document_frequencies.stop()
+        document_frequencies.flush()
+    print(f"Crawl worker process finished: {sum(worker.processed for worker in workers)} tasks")
+
+
+# 독립 실행용 진입점: python crawl_worker.py --processes 4 --threads 2
+# MongoDB 주소는 MONGO_URI 환경 변수로 지정 (서버와 같은 DB를 사용)
+def main():
+    parser = argparse.ArgumentParser(description='크롤링 작업자 (MongoDB 작업 큐에서 작업을 가져와 실행)')
+    parser.add_argument('--processes', type=int, default=1, help='실행할 작업자 프로세스 수')
+    parser.add_argument('--threads', type=int, default=1, help='프로세스별 작업자 스레드 수')
+    parser.add_argument('--idle-exit', type=float, help='이 시간(초) 동안 할 일이 없으면 종료 (기본은 계속 실행)')
+    parser.add_argument('--naver-base-url', help='네이버 금융 주소 (테스트용 로컬 서버 등)')
+    parser.add_argument('--investing-base-url', help='인베스팅 주소 (테스트용 로컬 서버 등)')
+    args = parser.parse_args()
+
+    process_args = (args.threads, args.idle_exit, args.naver_base_url, args.investing_base_url)
+    if args.processes == 1:
+        run_process(*process_args)
+        return
+    # MongoClient는 fork 후 공유하면 안 되므로 새 인터프리터로 실행
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=run_process, args=process_args) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import random
+import threading
+import time
+import cloudscraper
+import requests
+
+# 재시도 대상 상태 코드
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# 재시도 대기 시간 (Retry-After 헤더가 있으면 우선 사용, 없으면 지수 백오프 + 지터)
+def retry_delay(attempt, response, backoff=0.5, max_backoff=10):
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return min(float(retry_after), max_backoff)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds()
+                    return min(max(delay, 0), max_backoff)
+                except (TypeError, ValueError):
+                    pass
+    delay = min(backoff * (2 ** attempt), max_backoff)
+    return delay * (0.5 + random.random() / 2)
+
+
+# 호스트 하나에 대한 세션 묶음 (세션 하나 = keep-alive 연결 하나)
+class _HostPool:
+    def __init__(self, max_sessions):
+        self.semaphore = threading.BoundedSemaphore(max_sessions)
+        self.idle = []
+        self.sessions = []
+
+
+# 호스트별로 세션을 재사용하는 스레드 안전한 세션 풀
+# 요청 하나가 세션 하나를 독점하므로 호스트별 동시 연결 수는 max_per_host를 넘지 않음
+class SessionPool:
+    def __init__(self, max_per_host=6, max_retries=3, backoff=0.5, max_backoff=10,
+                 timeout=(5, 15), session_factory=None):
+        self.max_per_host = max_per_host
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.session_factory = session_factory or cloudscraper.create_scraper
+        self._lock = threading.Lock()
+        self._hosts = {}
+        self._counters = defaultdict(int)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _host_pool(self, host):
+        with self._lock:
+            pool = self._hosts.get(host)
+            if pool is None:
+                pool = _HostPool(self.max_per_host)
+                self._hosts[host] = pool
+            return pool
+
+    # 세션을 빌려오고 사용이 끝나면 반납
+    @contextmanager
+    def session(self, url):
+        pool = self._host_pool(urlsplit(url).netloc)
+        pool.semaphore.acquire()
+        try:
+            with self._lock:
+                session = pool.idle.pop() if pool.idle else None
+            if session is None:
+                session = self.session_factory()
+                with self._lock:
+                    pool.sessions.append(session)
+                self._count('sessions_created')
+            else:
+                self._count('session_reuses')
+            try:
+                yield session
+            finally:
+                with self._lock:
+                    pool.idle.append(session)
+        finally:
+            pool.semaphore.release()
+
+    def retry_delay(self, attempt, response):
+        return retry_delay(attempt, response, self.backoff, self.max_backoff)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            error = None
+            self._count('requests')
+            with self.session(url) as session:
+                try:
+                    response = session.request(method, url, **kwargs)
+                except (requests.Timeout, requests.ConnectionError) as e:
+                    error = e
+
+            if response is not None and response.status_code not in RETRY_STATUS:
+                return response
+
+            if attempt == self.max_retries:
+                self._count('failures')
+                if response is not None:
+                    return response  # 상태 코드 확인은 호출하는 쪽에서 raise_for_status로 처리
+                raise error
+
+            self._count('retries')
+            if response is not None:
+                response.close()
+            time.sleep(self.retry_delay(attempt, response))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    # 세션/연결 재사용 통계
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            sessions = [session for pool in self._hosts.values() for session in pool.sessions]
+
+        connections = 0
+        pooled_requests = 0
+        for session in sessions:
+            for adapter in list(session.adapters.values()):
+                pools = getattr(adapter.poolmanager, 'pools', None)
+                if pools is None:
+                    continue
+                for key in list(pools.keys()):
+                    connection_pool = pools.get(key)
+                    if connection_pool is None:
+                        continue
+                    connections += connection_pool.num_connections
+                    pooled_requests += connection_pool.num_requests
+
+        checkouts = counters.get('sessions_created', 0) + counters.get('session_reuses', 0)
+        return {
+            'requests': counters.get('requests', 0),
+            'retries': counters.get('retries', 0),
+            'failures': counters.get('failures', 0),
+            'sessions_created': counters.get('sessions_created', 0),
+            'session_reuses': counters.get('session_reuses', 0),
+            'session_reuse_rate': counters.get('session_reuses', 0) / checkouts if checkouts else 0,
+            'connections_opened': connections,
+            'connection_reuse_rate': 1 - connections / pooled_requests if pooled_requests else 0,
+        }
+
+    def close(self):
+        with self._lock:
+            sessions = [session for pool in self._hosts.values() for session in pool.sessions]
+            self._hosts = {}
+        for session in sessions:
+            session.close()
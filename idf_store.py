@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+import zlib
+import numpy as np
+from pymongo import UpdateOne
+from sklearn.feature_extraction.text import CountVectorizer
+
+
+# 종목 전체에서 누적되는 문서 빈도(df) 저장소
+# 단어는 해시 버킷으로 매핑하므로 어휘 크기와 관계없이 메모리가 고정됨 (기본 2^20개 버킷, 4MB)
+# collection(MongoDB)을 넘기면 여러 프로세스(서버, crawl_worker 작업자)가 같은 빈도를 공유:
+#   start()로 띄운 백그라운드 스레드가 새 문서의 빈도를 sync_interval초마다 (save_every개 문서가 쌓이면 바로) $inc로 합치고
+#   sync_interval초마다 전체 빈도를 다시 읽음 (크롤링/요청 스레드에서는 MongoDB에 쓰거나 읽지 않음)
+#   합치기와 다시 읽기는 _sync_lock으로 한 번에 하나씩만 실행 (합치는 중인 빈도가 두 번 세어지지 않도록)
+#   start()를 부르지 않아도 처음 문서를 추가하거나 조회할 때 스레드를 띄움 (WSGI 서버 등 진입점과 관계없이 공유, stop() 뒤에는 띄우지 않음)
+# collection이 없으면 .npz 스냅샷 파일 하나에 저장 (프로세스 하나에서만 사용, 여러 프로세스가 같은 파일을 쓰면 서로 덮어씀)
+# 문서 빈도가 min_df 미만인 드문 버킷은 idf를 0으로 조회해서 키워드 특징에서 제외 (해시 충돌로 쌓이는 잡음도 함께 제외)
+# 빈도와 문서 수는 줄이지 않음: 보관 기간이 지나 삭제된 글도 계속 세므로, idf는 보관 중인 글이 아니라
+#   지금까지 수집한 전체 글 기준 (df와 문서 수가 함께 누적되므로 비율은 유지되고, 삭제된 글을 다시 토큰화할 필요가 없음)
+class DocumentFrequencyStore:
+    def __init__(self, path=None, n_buckets=2 ** 20, stop_words=(), save_every=5000, collection=None, min_df=2,
+                 sync_interval=300, chunk_size=4096):
+        self.path = path
+        self.n_buckets = n_buckets
+        self.save_every = save_every
+        self.collection = collection
+        self.min_df = min_df
+        self.sync_interval = sync_interval
+        self.chunk_size = chunk_size
+        self.document_frequency = np.zeros(n_buckets, dtype=np.uint32)
+        self.n_documents = 0
+        self._pending = np.zeros(n_buckets, dtype=np.uint32)  # MongoDB에 아직 합치지 않은 빈도
+        self._pending_documents = 0
+        self._unsaved = 0
+        self._pushed_at = time.monotonic()
+        self._synced_at = None
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()  # save_every개 문서가 쌓이면 sync_interval을 기다리지 않고 합침
+        self._thread = None
+        # KeywordCorpus와 같은 전처리/토큰화/불용어 처리
+        vectorizer = CountVectorizer(stop_words=list(stop_words) or None)
+        self._preprocess = vectorizer.build_preprocessor()
+        self._tokenize = vectorizer.build_tokenizer()
+        self._stop = vectorizer.get_stop_words() or frozenset()
+        if collection is None and path and os.path.exists(path):
+            self.load(path)
+
+    def buckets(self, terms):
+        return np.fromiter((zlib.crc32(term.encode('utf-8')) for term in terms), dtype=np.uint64,
+                           count=len(terms)) % self.n_buckets
+
+    # 새로 수집한 문서를 반영 (문서마다 단어는 한 번만 셈, 등장한 버킷만 갱신)
+    # MongoDB에 합치는 것은 백그라운드 스레드가 하므로 여기서는 빈도만 쌓음
+    def add_documents(self, texts):
+        if not texts:
+            return
+        self._autostart()
+        terms = []
+        for text in texts:
+            terms.extend({word for word in self._tokenize(self._preprocess(text)) if word not in self._stop})
+        buckets, counts = np.unique(self.buckets(terms), return_counts=True)
+        buckets = buckets.astype(np.intp)
+        counts = counts.astype(np.uint32)
+        with self._lock:
+            if self.collection is not None:
+                self._pending[buckets] += counts
+                self._pending_documents += len(texts)
+                should_wake = self._pending_documents >= self.save_every
+                should_save = False
+            else:
+                self.document_frequency[buckets] += counts
+                self.n_documents += len(texts)
+                self._unsaved += len(texts)
+                should_wake = False
+                should_save = self.path and self.save_every and self._unsaved >= self.save_every
+        if should_wake:
+            self._wakeup.set()
+        if should_save:
+            self.save()
+
+    # smooth idf: log((1 + N) / (1 + df)) + 1 (TfidfTransformer와 같은 식)
+    # 빈도가 min_df 미만인 버킷은 0 (아직 한 번도 세지 않은 버킷은 다른 프로세스가 방금 수집한 새 단어일 수 있어서 그대로 계산)
+    def idf(self, terms):
+        self._autostart()
+        buckets = self.buckets(terms).astype(np.intp)
+        with self._lock:
+            df = self.document_frequency[buckets].astype(np.float64) + self._pending[buckets]
+            n_documents = self.n_documents + self._pending_documents
+        idf = np.log((n_documents + 1.0) / (df + 1.0)) + 1.0
+        idf[(df > 0) & (df < self.min_df)] = 0.0
+        return idf
+
+    def total_documents(self):
+        self._autostart()
+        with self._lock:
+            return self.n_documents + self._pending_documents
+
+    # 아직 합치지 않은 빈도를 MongoDB에 더함 (버킷 chunk_size개를 문서 하나로 묶어서 $inc)
+    # 쓰는 동안에도 idf 조회에 보이도록 _pending에 남겨 두고, 쓰기가 끝나면 document_frequency로 옮김
+    def push(self):
+        if self.collection is None:
+            return
+        with self._sync_lock:
+            self._push()
+
+    def _push(self):
+        with self._lock:
+            pending, n_documents = self._pending.copy(), self._pending_documents
+            self._pushed_at = time.monotonic()
+        if not n_documents:
+            return
+        buckets = np.flatnonzero(pending)
+        operations = [UpdateOne({'_id': 'meta'}, {'$inc': {'문서수': n_documents},
+                                                  '$setOnInsert': {'버킷수': self.n_buckets}}, upsert=True)]
+        for chunk in np.unique(buckets // self.chunk_size):
+            chunk_buckets = buckets[(buckets // self.chunk_size) == chunk]
+            increments = {f'빈도.{bucket % self.chunk_size}': int(pending[bucket]) for bucket in chunk_buckets}
+            operations.append(UpdateOne({'_id': int(chunk)}, {'$inc': increments}, upsert=True))
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            print(f"An error occurred while saving document frequencies: {e}")
+            return  # _pending에 그대로 남아 있으므로 다음에 다시 합침
+        # 다음에 다시 읽을 때까지는 합친 빈도를 메모리에도 반영 (다시 읽으면 MongoDB의 전체 빈도로 교체)
+        # 쓰는 동안 추가된 빈도는 _pending에 남음
+        with self._lock:
+            self._pending[buckets] -= pending[buckets]
+            self._pending_documents -= n_documents
+            self.document_frequency[buckets] += pending[buckets]
+            self.n_documents += n_documents
+
+    # MongoDB의 전체 빈도를 다시 읽음 (sync_interval초가 지나지 않았으면 force=True일 때만)
+    def refresh(self, force=False):
+        if self.collection is None:
+            return
+        if not force and self._synced_at is not None and time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        with self._sync_lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            self._synced_at = time.monotonic()
+            meta = self.collection.find_one({'_id': 'meta'})
+            if meta is None:
+                return
+            if meta.get('버킷수') != self.n_buckets:
+                print(f"Shared document frequencies have {meta.get('버킷수')} buckets, "
+                      f"expected {self.n_buckets}; ignoring them")
+                return
+            document_frequency = np.zeros(self.n_buckets, dtype=np.uint32)
+            for doc in self.collection.find({'_id': {'$ne': 'meta'}}):
+                offset = doc['_id'] * self.chunk_size
+                frequencies = doc.get('빈도', {})
+                indices = np.fromiter(map(int, frequencies.keys()), dtype=np.intp, count=len(frequencies))
+                document_frequency[offset + indices] = np.fromiter(frequencies.values(), dtype=np.uint32,
+                                                                   count=len(frequencies))
+            with self._lock:
+                self.document_frequency = document_frequency
+                self.n_documents = int(meta.get('문서수', 0))
+        except Exception as e:
+            print(f"An error occurred while reading document frequencies: {e}")
+
+    # 새 빈도를 합치는 백그라운드 스레드 (sync_interval초마다, save_every개 문서가 쌓이면 바로)
+    # read=True이면 시작하자마자 전체 빈도를 읽고 이후 sync_interval초마다 다시 읽음 (idf를 조회하지 않는 작업자는 False)
+    def start(self, read=True):
+        if self.collection is None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._sync_loop, args=(read,), name='idf-sync', daemon=True)
+            self._thread.start()
+
+    def _autostart(self):
+        if self._thread is None and self.collection is not None and not self._stopped.is_set():
+            self.start()
+
+    # 스레드를 멈춤 (남은 빈도는 flush()로 합침)
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _sync_loop(self, read):
+        while True:
+            if read:
+                self.refresh()
+            self._wakeup.wait(max(0.0, self.sync_interval - (time.monotonic() - self._pushed_at)))
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            self.push()
+
+    def save(self, path=None):
+        path = path or self.path
+        with self._lock:
+            document_frequency = self.document_frequency.copy()
+            n_documents = self.n_documents
+            self._unsaved = 0
+        temporary = f"{path}.tmp.npz"
+        np.savez(temporary, document_frequency=document_frequency, n_documents=n_documents)
+        os.replace(temporary, path)  # 저장 중에 읽어도 깨진 파일이 보이지 않도록 교체
+
+    # 저장하지 않은 변경이 있으면 MongoDB에 합치거나 스냅샷 저장 (종료 시 호출)
+    def flush(self):
+        if self.collection is not None:
+            self.push()
+        elif self.path and self._unsaved:
+            self.save()
+
+    # 버킷 수가 다른 스냅샷(설정 변경 전 파일)은 경고만 출력하고 무시
+    def load(self, path=None):
+        with np.load(path or self.path) as snapshot:
+            document_frequency = snapshot['document_frequency']
+            if len(document_frequency) != self.n_buckets:
+                print(f"IDF snapshot has {len(document_frequency)} buckets, expected {self.n_buckets}; "
+                      f"ignoring it")
+                return
+            with self._lock:
+                self.document_frequency = document_frequency.astype(np.uint32)
+                self.n_documents = int(snapshot['n_documents'])
+                self._unsaved = 0
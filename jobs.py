@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import queue
+import threading
+import time
+import uuid
+
+
+class QueueFull(Exception):
+    pass
+
+
+# 오래 걸리는 분석 작업 하나의 상태
+class Job:
+    def __init__(self, code):
+        self.id = uuid.uuid4().hex
+        self.code = code
+        self.status = 'queued'
+        self.stage = None
+        self.step = 0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    def to_dict(self, total_steps):
+        data = {
+            'job_id': self.id,
+            'code': self.code,
+            'status': self.status,
+            'progress': {'stage': self.stage, 'step': self.step, 'total_steps': total_steps},
+        }
+        if self.status == 'done':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = self.error
+        return data
+
+
+# 제한된 작업자 수로 분석 작업을 처리하는 작업 큐
+# 큐가 가득 차면 QueueFull, 끝난 작업은 retention 초 동안 조회 가능
+class JobQueue:
+    def __init__(self, run, stages, workers=2, max_queued=50, retention=600):
+        self.run = run  # run(code, progress) -> 결과
+        self.stages = list(stages)
+        self.workers = workers
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'analysis-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                job.status = 'running'
+
+                def progress(stage, **data):
+                    if stage in self.stages:
+                        job.stage = stage
+                        job.step = self.stages.index(stage) + 1
+
+                job.result = self.run(job.code, progress)
+                job.step = len(self.stages)
+                job.status = 'done'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished = time.time()
+                self._queue.task_done()
+
+    # 보관 기간이 지난 완료 작업 정리
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and now - job.finished > self.retention]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def submit(self, code):
+        self._start()
+        self._expire()
+        job = Job(code)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFull(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+        return job
+
+    def get(self, job_id):
+        self._expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def describe(self, job):
+        return job.to_dict(len(self.stages))
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            'queued': statuses.count('queued'),
+            'running': statuses.count('running'),
+            'done': statuses.count('done'),
+            'failed': statuses.count('failed'),
+            'workers': self.workers,
+        }
@@ -0,0 +1,172 @@
+from array import array
+from collections import defaultdict
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.preprocessing import normalize
+
+
+# 문장을 토큰화해서 단어 번호만 누적 (문장 문자열은 보관하지 않으므로 묶음 단위로 추가해도 메모리는 단어 수에만 비례)
+# 단어 번호는 처음 등장한 순서대로 부여, KeywordCorpus.from_tokens로 말뭉치 생성
+class TokenBuffer:
+    __slots__ = ('_preprocess', '_tokenize', '_stop', 'vocabulary', 'token_ids', 'lengths')
+
+    def __init__(self, stop_words):
+        # TfidfVectorizer와 같은 전처리/토큰화/불용어 처리
+        vectorizer = CountVectorizer(stop_words=list(stop_words))
+        self._preprocess = vectorizer.build_preprocessor()
+        self._tokenize = vectorizer.build_tokenizer()
+        self._stop = vectorizer.get_stop_words() or frozenset()
+        self.vocabulary = defaultdict()
+        self.vocabulary.default_factory = self.vocabulary.__len__
+        self.token_ids = array('q')
+        self.lengths = array('q')  # 문장별 단어 수
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, texts):
+        preprocess, tokenize, stop = self._preprocess, self._tokenize, self._stop
+        for text in texts:
+            words = [word for word in tokenize(preprocess(text)) if word not in stop]
+            self.lengths.append(len(words))
+            self.token_ids.extend(map(self.vocabulary.__getitem__, words))
+
+
+# 키워드 추출 대상 문장과 감정 코드를 묶음 단위로 누적 (종목마다 뉴스 문장을 먼저 모두 추가한 뒤 다른 소스를 추가)
+# 문장마다 뉴스 여부와 묶음 번호(group, 여러 종목을 한 말뭉치로 모을 때 종목 순서)를 함께 보관
+class KeywordAccumulator:
+    __slots__ = ('tokens', 'codes', 'news', 'groups')
+
+    def __init__(self, stop_words):
+        self.tokens = TokenBuffer(stop_words)
+        self.codes = array('b')
+        self.news = array('b')
+        self.groups = array('i')
+
+    def add(self, texts, codes, news=False, group=0):
+        self.tokens.add(texts)
+        self.codes.frombytes(np.asarray(codes, dtype=np.int8).tobytes())
+        self.news.frombytes(bytes([news]) * len(codes))
+        self.groups.frombytes(np.full(len(codes), group, dtype=np.int32).tobytes())
+
+    def news_rows(self):
+        return np.frombuffer(self.news, dtype=np.int8).astype(bool)
+
+    def group_rows(self, group):
+        return np.frombuffer(self.groups, dtype=np.int32) == group
+
+    def corpus(self, max_features=500, idf=None):
+        return KeywordCorpus.from_tokens(self.tokens, max_features, idf)
+
+
+# 문장 묶음을 한 번만 토큰화/벡터화하고, 행 마스크로 고른 부분 집합별 TF-IDF 상위 키워드를 계산
+# 부분 집합마다 TfidfVectorizer(max_features=...)를 새로 학습한 것과 같은 순위를 반환
+# idf(terms)를 넘기면 부분 집합에서 idf를 다시 계산하지 않고 전역 문서 빈도(DocumentFrequencyStore.idf)를 조회해서 사용
+class KeywordCorpus:
+    def __init__(self, texts, stop_words, max_features=500, idf=None):
+        tokens = TokenBuffer(stop_words)
+        tokens.add(texts)
+        self._build(tokens, max_features, idf)
+
+    # 이미 토큰화한 문장(TokenBuffer)으로 생성
+    @classmethod
+    def from_tokens(cls, tokens, max_features=500, idf=None):
+        corpus = cls.__new__(cls)
+        corpus._build(tokens, max_features, idf)
+        return corpus
+
+    def _build(self, tokens, max_features, idf):
+        self.max_features = max_features
+        self.size = len(tokens)
+        lengths = np.frombuffer(tokens.lengths, dtype=np.int64).astype(np.intp)
+        token_ids = np.frombuffer(tokens.token_ids, dtype=np.int64).astype(np.intp)
+        vocabulary = tokens.vocabulary
+        vocabulary_size = max(len(vocabulary), 1)
+
+        # 문장별 (단어, 개수)를 문장 안에서 처음 등장한 순서대로 정리
+        keys = np.repeat(np.arange(self.size, dtype=np.intp), lengths) * vocabulary_size + token_ids
+        unique_keys, first_seen, counts = np.unique(keys, return_index=True, return_counts=True)
+        order = np.argsort(first_seen, kind='stable')
+        unique_keys = unique_keys[order]
+        rows = unique_keys // vocabulary_size
+
+        # 단어 번호를 알파벳순으로 변환 (행 안의 순서는 그대로)
+        terms = sorted(vocabulary, key=vocabulary.__getitem__)
+        alphabetical = np.array(sorted(range(len(terms)), key=terms.__getitem__), dtype=np.intp)
+        remap = np.empty(len(terms), dtype=np.intp)
+        remap[alphabetical] = np.arange(len(terms))
+        self.features = np.array(terms, dtype=object)[alphabetical] if terms else np.array([], dtype=object)
+        self.indices = remap[unique_keys % vocabulary_size] if len(terms) else np.array([], dtype=np.intp)
+        self.values = counts[order].astype(np.float64)
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=self.size)))).astype(np.intp)
+        self.global_idf = idf(self.features) if idf is not None and len(self.features) else None
+
+    # 부분 집합의 TF-IDF 행렬과 단어 목록 (TfidfVectorizer.fit_transform과 같은 행렬)
+    def tfidf(self, rows):
+        row_ids = np.arange(self.size)[rows]
+        starts = self.indptr[row_ids]
+        lengths = self.indptr[row_ids + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return None, None
+
+        entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        columns = self.indices[entries]
+        data = self.values[entries]
+        row_of = np.repeat(np.arange(len(row_ids)), lengths)
+
+        # 부분 집합 안에서 단어가 처음 등장한 순서 (TfidfVectorizer가 행 안의 값을 저장하는 순서)
+        rank = np.full(len(self.features), total, dtype=np.intp)
+        np.minimum.at(rank, columns, np.arange(total))
+        present = np.flatnonzero(rank < total)
+
+        # 전역 idf가 0인 단어(전체 문서 빈도가 min_df 미만인 드문 단어)는 제외
+        keep = present
+        if self.global_idf is not None:
+            keep = present[self.global_idf[present] > 0]
+            if len(keep) == 0:
+                return None, None
+
+        # max_features: 전체 빈도가 높은 단어만 남김
+        if len(keep) > self.max_features:
+            term_frequency = np.bincount(columns, weights=data, minlength=len(self.features))[keep]
+            keep = keep[np.sort((-term_frequency).argsort()[:self.max_features])]
+        if len(keep) < len(present):
+            kept = np.zeros(len(self.features), dtype=bool)
+            kept[keep] = True
+            selected = kept[columns]
+            columns, data, row_of = columns[selected], data[selected], row_of[selected]
+
+        new_index = np.zeros(len(self.features), dtype=np.intp)
+        new_index[keep] = np.arange(len(keep))
+        order = np.argsort(row_of * total + rank[columns])
+        row_indptr = np.concatenate(([0], np.cumsum(np.bincount(row_of, minlength=len(row_ids)))))
+        columns = new_index[columns[order]]
+
+        # TfidfTransformer(smooth_idf=True, norm='l2')와 같은 계산
+        if self.global_idf is not None:
+            idf = self.global_idf[keep]
+        else:
+            document_frequency = np.bincount(columns, minlength=len(keep)).astype(np.float64) + 1.0
+            idf = np.full_like(document_frequency, len(row_ids) + 1)
+            idf /= document_frequency
+            np.log(idf, out=idf)
+            idf += 1.0
+        data = data[order] * idf[columns]
+        matrix = csr_matrix((data, columns, row_indptr), shape=(len(row_ids), len(keep)))
+        return normalize(matrix, copy=False), self.features[keep]
+
+    def top_keywords(self, rows, top_n, exclude=()):
+        matrix, features = self.tfidf(rows)
+        if matrix is None:
+            return []
+
+        # 각 단어의 TF-IDF 점수를 합산해 정렬
+        scores = np.asarray(matrix.sum(axis=0)).ravel()
+        names = features[scores.argsort()[::-1]]
+
+        # 이미 추출된 키워드 제외
+        if len(exclude):
+            names = names[~np.isin(names, list(exclude))]
+        return [str(name) for name in names[:top_n]]
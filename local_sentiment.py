@@ -0,0 +1,210 @@
+from collections import defaultdict
+from pymongo import MongoClient
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+import argparse
+import os
+import re
+import threading
+import time
+import joblib
+import numpy as np
+
+# 분류 방식
+# api: 모두 외부 API로 분석 (API가 실패한 댓글만 로컬 모델로 대신 분석)
+# local: 모두 로컬 모델로 분석
+# hybrid: 로컬 모델로 먼저 분석하고 확신도가 낮은 댓글만 API로 확인
+MODES = ('api', 'local', 'hybrid')
+
+# 문장 종결 부호/줄바꿈 기준으로 문장 분리 (API가 돌려주는 문장 단위와 맞춤)
+SENTENCE_PATTERN = re.compile(r'[^.!?\n]+[.!?]*')
+
+
+def split_sentences(comment):
+    return [match.group(0).strip() for match in SENTENCE_PATTERN.finditer(comment) if match.group(0).strip()]
+
+
+# 감정 분석 캐시 컬렉션에 쌓인 API 결과를 (문장 목록, 감정 목록) 학습 데이터로 변환 (같은 문장은 한 번만)
+def load_api_labels(collection, limit=0):
+    labels = {}
+    for doc in collection.find({}, {'결과': 1, '_id': 0}).limit(limit):
+        for content, sentiment in doc.get('결과') or []:
+            labels[content.strip()] = sentiment
+    return list(labels), list(labels.values())
+
+
+# CPU만 사용하는 문장 감정 분류 모델 (글자 n-gram 해싱 + 선형 분류기)
+# 어휘 사전 없이 해시 버킷으로 특징을 만들기 때문에 모델 크기가 고정되고 학습/예측이 모두 희소 행렬 연산 한 번으로 끝남
+class LocalSentimentModel:
+    def __init__(self, n_features=2 ** 18, ngram_range=(1, 3), alpha=1e-5, max_iter=20):
+        self.vectorizer = HashingVectorizer(analyzer='char_wb', ngram_range=ngram_range, n_features=n_features,
+                                            alternate_sign=False)
+        self.classifier = SGDClassifier(loss='log_loss', alpha=alpha, max_iter=max_iter, tol=None, random_state=0)
+        self.trained_sentences = 0
+
+    def fit(self, sentences, labels):
+        self.classifier.fit(self.vectorizer.transform(sentences), labels)
+        self.trained_sentences = len(sentences)
+        return self
+
+    # 문장 목록 -> (감정 배열, 확신도 배열)
+    def predict(self, sentences):
+        if not sentences:
+            return np.array([], dtype=object), np.array([], dtype=float)
+        probabilities = self.classifier.predict_proba(self.vectorizer.transform(sentences))
+        best = probabilities.argmax(axis=1)
+        return self.classifier.classes_[best], probabilities[np.arange(len(best)), best]
+
+    # 댓글 목록 -> 댓글별 [[문장, 감정], ...]과 댓글별 확신도 (댓글 안에서 가장 낮은 문장 확신도)
+    def classify(self, comments):
+        sentences = [split_sentences(comment) for comment in comments]
+        sentiments, confidence = self.predict([sentence for comment in sentences for sentence in comment])
+        ends = np.cumsum([len(comment) for comment in sentences])
+        results = []
+        comment_confidence = np.ones(len(comments))
+        start = 0
+        for index, (comment, end) in enumerate(zip(sentences, ends)):
+            results.append([[sentence, str(sentiment)] for sentence, sentiment in zip(comment, sentiments[start:end])])
+            if end > start:
+                comment_confidence[index] = confidence[start:end].min()
+            start = end
+        return results, comment_confidence
+
+    def save(self, path):
+        temporary = f"{path}.tmp"
+        joblib.dump(self, temporary)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+# 외부 API 디스패처와 로컬 모델을 mode에 따라 조합하는 분류기
+# classify()는 디스패처와 같은 순서/형식의 결과와 함께 댓글별로 API 결과인지 여부를 반환 (API 결과만 캐시에 저장)
+class SentimentClassifier:
+    def __init__(self, dispatcher, model=None, mode='api', min_confidence=0.8):
+        if mode not in MODES:
+            raise ValueError(f"Unknown sentiment mode {mode!r}, expected one of {', '.join(MODES)}")
+        if mode != 'api' and model is None:
+            print(f"Local sentiment model is not available, using the API instead of {mode} mode")
+            mode = 'api'
+        self.dispatcher = dispatcher
+        self.model = model
+        self.mode = mode
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _predict(self, comments):
+        started = time.perf_counter()
+        results, confidence = self.model.classify(comments)
+        self._count('local_seconds', time.perf_counter() - started)
+        return results, confidence
+
+    # 로컬 모델로 먼저 처리: (댓글별 결과, API로 보낼 댓글 인덱스)
+    def _route(self, comments, on_batch):
+        if self.mode == 'api':
+            return [None] * len(comments), list(range(len(comments)))
+        results, confidence = self._predict(comments)
+        if self.mode == 'local':
+            pending = []
+        else:
+            pending = [index for index in range(len(comments)) if confidence[index] < self.min_confidence]
+        answered = sorted(set(range(len(comments))) - set(pending))
+        self._count('local', len(answered))
+        if answered and on_batch is not None:
+            on_batch(answered, [results[index] for index in answered])
+        return results, pending
+
+    # API 묶음 결과의 인덱스를 원래 댓글 인덱스로 바꿔 전달
+    def _api_on_batch(self, pending, on_batch):
+        if on_batch is None:
+            return None
+        return lambda indices, batch_results: on_batch([pending[index] for index in indices], batch_results)
+
+    # API 결과 반영, API가 실패한 댓글은 로컬 모델 결과로 대체 (hybrid는 이미 예측한 결과를 그대로 사용, 모델이 없으면 None)
+    def _merge(self, comments, results, pending, api_results, on_batch):
+        from_api = [False] * len(comments)
+        self._count('api', len(pending))
+        failed = []
+        for index, comment_results in zip(pending, api_results):
+            if comment_results is None:
+                failed.append(index)
+            else:
+                results[index] = comment_results
+                from_api[index] = True
+        if failed and self.model is not None:
+            if self.mode == 'api':
+                fallback, _ = self._predict([comments[index] for index in failed])
+                for index, comment_results in zip(failed, fallback):
+                    results[index] = comment_results
+            self._count('fallback', len(failed))
+            if on_batch is not None:
+                on_batch(failed, [results[index] for index in failed])
+        return results, from_api
+
+    # on_batch(indices, batch_results)는 디스패처와 같이 결과가 나오는 순서대로 호출
+    # 반환값: (댓글별 결과 목록, 댓글별 API 결과 여부), 분석하지 못한 댓글의 결과는 None
+    def classify(self, comments, on_batch=None):
+        if not comments:
+            return [], []
+        results, pending = self._route(comments, on_batch)
+        api_results = []
+        if pending:
+            api_results = self.dispatcher.classify([comments[index] for index in pending],
+                                                   self._api_on_batch(pending, on_batch))
+        return self._merge(comments, results, pending, api_results, on_batch)
+
+    # classify와 같지만 API는 비동기 디스패처(dispatcher)로 요청
+    # run_cpu(function, *args)는 로컬 모델 예측을 이벤트 루프 밖(스레드 풀)에서 실행하는 코루틴 함수 (없으면 루프에서 바로 실행)
+    async def classify_async(self, comments, dispatcher, on_batch=None, run_cpu=None):
+        if not comments:
+            return [], []
+        if run_cpu is None:
+            async def run_cpu(function, *args):
+                return function(*args)
+        results, pending = await run_cpu(self._route, comments, on_batch)
+        api_results = []
+        if pending:
+            api_results = await dispatcher.classify([comments[index] for index in pending],
+                                                    self._api_on_batch(pending, on_batch))
+        return await run_cpu(self._merge, comments, results, pending, api_results, on_batch)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            'mode': self.mode,
+            'local': counters.get('local', 0),
+            'api': counters.get('api', 0),
+            'fallback': counters.get('fallback', 0),
+            'local_seconds': counters.get('local_seconds', 0.0),
+        }
+
+
+# 감정 분석 캐시에 쌓인 API 결과로 로컬 모델을 학습해 저장 (서버를 재시작하면 반영)
+def main():
+    parser = argparse.ArgumentParser(description='로컬 감정 분석 모델 학습 (감정 분석 캐시의 API 결과 사용)')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         'sentiment_model.joblib'))
+    parser.add_argument('--limit', type=int, default=0, help='읽을 캐시 문서 수 (0이면 전체)')
+    args = parser.parse_args()
+
+    sentences, labels = load_api_labels(MongoClient(args.mongo_uri)['stock_data'].sentiment_cache, args.limit)
+    if len(set(labels)) < 2:
+        print(f"Not enough labeled sentences to train ({len(sentences)} sentences, {len(set(labels))} classes)")
+        return
+    started = time.perf_counter()
+    model = LocalSentimentModel().fit(sentences, labels)
+    model.save(args.output)
+    print(f"Trained on {len(sentences)} sentences in {time.perf_counter() - started:.1f}s -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
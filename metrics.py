@@ -0,0 +1,236 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import bisect
+import contextvars
+import threading
+
+# 기본 히스토그램 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# 라벨별 값을 가진 지표의 공통 부분
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _labels(self, key):
+        return dict(zip(self.labels, key))
+
+    # [(이름, 라벨, 값), ...]
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, self._labels(key), value) for key, value in sorted(values.items())]
+
+
+# 증가만 하는 누적 값
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+# 현재 값 (진행 중인 작업 수 등)
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    # with 블록 안에 있는 동안 1 증가
+    @contextmanager
+    def track_inflight(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+# 구간별 관측 횟수 + 합계 (소요 시간 분포)
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+
+        samples = []
+        for key, (counts, total) in sorted(values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', {**labels, 'le': _format_value(bound)}, cumulative))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, cumulative))
+        return samples
+
+
+# 지표 모음, render()는 Prometheus 텍스트 형식으로 출력
+# 이미 통계를 따로 모으는 객체는 collector로 등록해서 조회 시점의 값을 출력
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"{name} is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._register(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labels, buckets)
+
+    # collector()는 [(이름, 종류, 설명, [(라벨, 값), ...]), ...]를 반환
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                print(f"An error occurred in metrics collector: {e}")
+                continue
+            for name, type, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+# stats() 딕셔너리를 지표로 변환 (counters에 있는 항목은 누적 값(아직 없으면 0), 나머지 숫자는 현재 값)
+def stats_families(prefix, stats, description, counters=()):
+    families = [(f"{prefix}_{key}_total", 'counter', f"{description}: {key}", [({}, stats.get(key, 0))])
+                for key in counters]
+    for key, value in stats.items():
+        if key in counters or isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        families.append((f"{prefix}_{key}", 'gauge', f"{description}: {key}", [({}, value)]))
+    return families
+
+
+# 작업 하나가 직접 보낸 요청 수 (with metered() as usage: 안에서 실행한 코드만 셈)
+# 다른 스레드로 넘기는 작업은 submit_in_context로 넘겨야 같은 계수기에 더해짐 (다른 요청이 보낸 요청은 섞이지 않음)
+class Usage:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self._counts[name] += amount
+
+    def get(self, name):
+        with self._lock:
+            return self._counts.get(name, 0)
+
+
+_current_usage = contextvars.ContextVar('current_usage', default=None)
+
+
+@contextmanager
+def metered():
+    usage = Usage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+# 지금 실행 중인 작업의 계수기에 더함 (metered() 밖이면 아무것도 하지 않음)
+def count_usage(name, amount=1):
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.add(name, amount)
+
+
+# executor.submit과 같지만 현재 context(계수기 포함)를 작업 스레드로 넘김
+def submit_in_context(executor, function, *args):
+    return executor.submit(contextvars.copy_context().run, function, *args)
+
+
+# 프로세스 전체에서 공유하는 기본 지표 모음
+registry = MetricsRegistry()
@@ -0,0 +1,124 @@
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+import hashlib
+import threading
+
+HASH_FIELD = '내용해시'
+DUPLICATE_KEY_ERROR = 11000
+
+
+# 내용 해시 계산 (앞뒤 공백 제거 후 sha1)
+def content_hash(content):
+    return hashlib.sha1(content.strip().encode('utf-8')).hexdigest()
+
+
+# 멱등 업서트용 (종목코드, 내용해시) 고유 인덱스 생성
+# 해시가 없는 기존 문서는 partialFilterExpression으로 제외
+def ensure_hash_index(collection):
+    collection.create_index(
+        [('종목코드', 1), (HASH_FIELD, 1)],
+        unique=True,
+        partialFilterExpression={HASH_FIELD: {'$exists': True}}
+    )
+
+
+# 다시 수집할 때마다 최신 값으로 덮어쓰는 필드 (공감/비공감 수는 글이 올라온 뒤에도 계속 바뀜)
+MUTABLE_FIELDS = ('공감', '비공감')
+
+
+# 레코드 목록 -> bulk_write 작업 목록
+# upsert면 (종목코드, 내용해시) 기준으로 처음 기록할 때만 $setOnInsert, MUTABLE_FIELDS는 항상 $set
+def write_operations(records, upsert=False):
+    if not upsert:
+        return [InsertOne(record) for record in records]
+
+    operations = []
+    for record in records:
+        key = {'종목코드': record['종목코드'], HASH_FIELD: record.get(HASH_FIELD) or content_hash(record['내용'])}
+        values = {field: value for field, value in record.items() if field not in key and field not in MUTABLE_FIELDS}
+        update = {'$setOnInsert': values}
+        changes = {field: record[field] for field in MUTABLE_FIELDS if field in record}
+        if changes:
+            update['$set'] = changes
+        operations.append(UpdateOne(key, update, upsert=True))
+    return operations
+
+
+# bulk_write 결과 -> (기록된 수, 새로 기록된 레코드 인덱스)
+def written_records(result, count, upsert=False):
+    written = result.inserted_count + result.upserted_count
+    return written, list(result.upserted_ids) if upsert else range(count)
+
+
+# 고유 인덱스 중복은 이미 기록된 레코드이므로 무시하고 (기록된 수, 새로 기록된 레코드 인덱스) 반환, 다른 오류는 다시 발생
+def written_records_from_error(error, count, upsert=False):
+    errors = [item for item in error.details.get('writeErrors', []) if item.get('code') != DUPLICATE_KEY_ERROR]
+    if errors:
+        raise error
+    written = error.details.get('nInserted', 0) + error.details.get('nUpserted', 0)
+    if upsert:
+        return written, [upserted['index'] for upserted in error.details.get('upserted', [])]
+    duplicated = {item['index'] for item in error.details.get('writeErrors', [])}
+    return written, [index for index in range(count) if index not in duplicated]
+
+
+# 비동기 MongoDB 컬렉션에 레코드를 한 번에 기록하고 새로 기록된 레코드만 반환 (WriteBuffer.flush와 같은 규칙)
+async def write_records_async(collection, records, upsert=False):
+    if not records:
+        return []
+    try:
+        result = await collection.bulk_write(write_operations(records, upsert), ordered=False)
+    except BulkWriteError as e:
+        _, new_indices = written_records_from_error(e, len(records), upsert)
+    else:
+        _, new_indices = written_records(result, len(records), upsert)
+    return [records[index] for index in new_indices]
+
+
+# 레코드를 모아서 한 번에 쓰는 버퍼
+# upsert=True면 (종목코드, 내용해시) 기준으로 업서트하므로 재시도해도 중복 행이 생기지 않음
+# on_written(records)를 넘기면 실제로 새로 기록된 레코드만 전달 (이미 있던 레코드는 제외)
+class WriteBuffer:
+    def __init__(self, collection, batch_size=500, upsert=False, on_written=None):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.upsert = upsert
+        self.on_written = on_written
+        self.written = 0
+        self.flushes = 0
+        self._records = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 정상 종료든 예외든 남은 레코드는 반드시 기록
+        self.flush()
+        return False
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            full = len(self._records) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            records, self._records = self._records, []
+        if not records:
+            return 0
+
+        try:
+            result = self.collection.bulk_write(write_operations(records, self.upsert), ordered=False)
+        except BulkWriteError as e:
+            written, new_indices = written_records_from_error(e, len(records), self.upsert)
+        else:
+            written, new_indices = written_records(result, len(records), self.upsert)
+
+        self.written += written
+        self.flushes += 1
+        if self.on_written is not None and new_indices:
+            self.on_written([records[index] for index in new_indices])
+        return written
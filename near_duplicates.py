@@ -0,0 +1,278 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+import numpy as np
+
+SHINGLE_MULTIPLIER = np.uint64(0x100000001B3)
+CHUNK_SHINGLES = 16384  # 한 번에 MinHash를 계산하는 n-gram 수 (임시 배열이 num_perm × 8바이트 × n-gram 수, 기본 8MiB)
+
+
+# splitmix64로 n-gram 해시를 고르게 섞은 뒤 상위 32비트만 사용
+def _mix(values):
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return (values ^ (values >> np.uint64(31))) >> np.uint64(32)
+
+
+# 문서별 문자 n-gram 해시 (공백은 하나로 합치고 소문자로 변환)
+# 반환값: (해시 배열, 문서별 시작 위치), n보다 짧은 문서는 문서 전체를 n-gram 하나로 취급
+def shingle_hashes(texts, ngram):
+    normalized = [' '.join(text.lower().split()) for text in texts]
+    lengths = np.array([len(text) for text in normalized], dtype=np.int64)
+    codes = np.frombuffer(''.join(normalized).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+
+    # 모든 위치의 n-gram 해시를 한 번에 계산 (문서 경계를 넘는 n-gram은 아래에서 제외)
+    windows = max(len(codes) - ngram + 1, 0)
+    rolling = np.zeros(windows, dtype=np.uint64)
+    for k in range(ngram):
+        rolling = rolling * SHINGLE_MULTIPLIER + codes[k:k + windows]
+
+    counts = np.maximum(lengths - ngram + 1, 1)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    positions = np.repeat(offsets - starts, counts) + np.arange(int(counts.sum()))
+    hashes = np.zeros(len(positions), dtype=np.uint64)
+    full = np.repeat(lengths >= ngram, counts)
+    hashes[full] = rolling[positions[full]]
+    for i in np.flatnonzero(lengths < ngram):
+        value = 0
+        for code in codes[offsets[i]:offsets[i] + lengths[i]]:
+            value = (value * int(SHINGLE_MULTIPLIER) + int(code)) & 0xFFFFFFFFFFFFFFFF
+        hashes[starts[i]] = value
+    return _mix(hashes), starts
+
+
+# 문서별 MinHash 서명 (num_perm개의 multiply-shift 해시 (a*x + b) >> 32의 최솟값), shape = (문서 수, num_perm)
+def minhash_signatures(texts, num_perm=64, ngram=3, seed=1):
+    if not len(texts):
+        return np.empty((0, num_perm), dtype=np.uint64)
+    random = np.random.RandomState(seed)
+    a = (random.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1))[:, None]
+    b = random.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)[:, None]
+
+    hashes, starts = shingle_hashes(texts, ngram)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    ends = np.append(starts[1:], len(hashes))
+    first = 0
+    while first < len(texts):
+        # 문서 경계에 맞춰 CHUNK_SHINGLES개 정도씩 나눠서 계산
+        last = max(int(np.searchsorted(ends, starts[first] + CHUNK_SHINGLES, side='right')), first + 1)
+        chunk = hashes[starts[first]:ends[last - 1]]
+        values = np.multiply(a, chunk)
+        values += b
+        # >> 32는 단조 증가이므로 최솟값을 먼저 구한 뒤 시프트
+        minimums = np.minimum.reduceat(values, starts[first:last] - starts[first], axis=1)
+        signatures[first:last] = (minimums >> np.uint64(32)).T
+        first = last
+    return signatures
+
+
+# 유사도 기준값에 가장 가까운 LSH 밴드 구성 (밴드 수, 밴드당 행 수)
+def band_layout(num_perm, threshold):
+    layouts = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    # 후보를 놓치지 않도록 기준값보다 약간 낮은 쪽을 선택 (후보는 서명 비교로 다시 확인)
+    return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - (threshold - 0.1)))
+
+
+# MinHash + LSH 밴딩 기반 유사 중복 인덱스
+# 대표 문서만 인덱스에 남기고, 대표와 추정 자카드 유사도가 threshold 이상이면 중복으로 판단
+# 대표마다 서명(uint32 num_perm개), 밴드 키(uint64 밴드 수만큼), 내용해시 앞 64비트, 글 날짜를 numpy 배열의 한 행으로 보관
+# (대표 하나에 약 400바이트, 밴드마다 dict를 두면 대표 하나에 1KB 이상)
+# 기존 대표는 밴드별로 정렬한 키에서 searchsorted로 찾고, 같은 묶음에서 새로 생긴 대표끼리만 묶음 동안 dict로 비교
+# prune()으로 보관 기간이 지난 대표를 지우고 개수를 제한
+class NearDuplicateIndex:
+    def __init__(self, threshold=0.8, num_perm=64, ngram=3):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.ngram = ngram
+        self.bands, self.rows = band_layout(num_perm, threshold)
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.keys = np.empty((0, self.bands), dtype=np.uint64)
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.dates = np.empty(0, dtype='datetime64[us]')
+        self.pruned_at = None
+        self._sorted = None  # 밴드별 (정렬 순서, 정렬한 키), 대표가 바뀌면 다시 계산
+
+    def __len__(self):
+        return len(self.hashes)
+
+    # 문서별 밴드 키 (밴드 안의 행 값을 64비트 다항식 해시로 합침, 충돌은 서명 비교로 다시 확인)
+    def band_keys(self, signatures):
+        bands = signatures[:, :self.bands * self.rows].reshape(len(signatures), self.bands, self.rows)
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for row in range(self.rows):
+            keys = keys * SHINGLE_MULTIPLIER + bands[:, :, row]
+        return keys
+
+    def add_many(self, signatures, keys, digests, dates):
+        self.signatures = np.concatenate((self.signatures, signatures))
+        self.keys = np.concatenate((self.keys, keys))
+        self.hashes = np.concatenate((self.hashes, digests))
+        self.dates = np.concatenate((self.dates, np.asarray(dates, dtype='datetime64[us]')))
+        self._sorted = None
+
+    # 문서마다 같은 밴드에 걸린 기존 대표 중 가장 비슷한 대표 번호 (없으면 -1)
+    def _find(self, signatures, keys):
+        found = np.full(len(signatures), -1, dtype=np.intp)
+        if not len(self) or not len(signatures):
+            return found
+        if self._sorted is None:
+            order = np.argsort(self.keys, axis=0, kind='stable')  # 같은 키는 먼저 추가된 대표가 앞
+            self._sorted = order, np.take_along_axis(self.keys, order, axis=0)
+        order, sorted_keys = self._sorted
+
+        candidates = np.full(keys.shape, -1, dtype=np.intp)
+        for band in range(self.bands):
+            positions = np.minimum(np.searchsorted(sorted_keys[:, band], keys[:, band]), len(self) - 1)
+            hit = sorted_keys[positions, band] == keys[:, band]
+            candidates[hit, band] = order[positions[hit], band]
+        similarity = np.count_nonzero(self.signatures[candidates] == signatures[:, None, :], axis=2)
+        similarity[candidates < 0] = -1
+        best = similarity.argmax(axis=1)
+        rows = np.arange(len(signatures))
+        matched = similarity[rows, best] >= self.threshold * self.num_perm
+        found[matched] = candidates[rows, best][matched]
+        return found
+
+    # 문서마다 유지 여부와 새로 대표가 된 문서의 위치 반환 (처음 나온 문서를 대표로 남기고, 대표와 비슷한 문서는 False)
+    # 대표 문서 자신(같은 내용해시)은 다시 들어와도 유지
+    def deduplicate(self, signatures, hashes, dates):
+        keys = self.band_keys(signatures)
+        digests = np.array([int(digest[:16], 16) for digest in hashes], dtype=np.uint64)
+        found = self._find(signatures, keys)
+        existing = found >= 0
+        keep = np.ones(len(signatures), dtype=bool)
+        keep[existing] = self.hashes[found[existing]] == digests[existing]
+
+        # 기존 대표와 겹치지 않는 문서끼리는 앞에서부터 차례로 비교
+        added = []
+        buckets = [{} for _ in range(self.bands)]
+        for i in np.flatnonzero(~existing):
+            band_keys = keys[i].tolist()
+            candidates = {bucket[key] for bucket, key in zip(buckets, band_keys) if key in bucket}
+            best, best_similarity = None, self.threshold
+            for candidate in candidates:
+                similarity = np.count_nonzero(signatures[candidate] == signatures[i]) / self.num_perm
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+            if best is None:
+                for bucket, key in zip(buckets, band_keys):
+                    bucket.setdefault(key, i)
+                added.append(int(i))
+            else:
+                keep[i] = digests[best] == digests[i]
+        if added:
+            self.add_many(signatures[added], keys[added], digests[added], [dates[i] for i in added])
+        return keep.tolist(), added
+
+    # 날짜가 date_threshold 이전인 대표를 지우고 최신 max_size개만 남김 (남은 대표의 순서는 유지)
+    def prune(self, date_threshold, max_size=None):
+        alive = np.flatnonzero(self.dates >= np.datetime64(date_threshold, 'us'))
+        if max_size is not None and len(alive) > max_size:
+            alive = np.sort(alive[np.argsort(self.dates[alive], kind='stable')[len(alive) - max_size:]])
+        if len(alive) < len(self):
+            self.signatures = self.signatures[alive]
+            self.keys = self.keys[alive]
+            self.hashes = self.hashes[alive]
+            self.dates = self.dates[alive]
+            self._sorted = None
+        return len(self)
+
+
+# 소스/종목별 유사 중복 인덱스 모음 (설정에 따라 MongoDB에 대표 문서 서명을 저장해 크롤링 사이에도 유지)
+# settings: {소스: {'threshold': 0.8, 'ngram': 3, 'persist': True} 또는 None(사용 안 함)}
+# 소스마다 n-gram 크기와 기준값이 달라 서명을 서로 비교할 수 없으므로 인덱스는 소스마다 따로 둠 (같은 소스 안의 유사 중복만 제거)
+# retention_days: {소스: 보관 일수}, 글 날짜가 보관 기간을 지난 대표는 메모리와 MongoDB에서 지움 (없는 소스는 ttl)
+# 저장하지 않는 소스(persist=False)도 인덱스는 프로세스 안에 남으므로 같은 기준으로 지우고, 인덱스마다 대표는 max_size개까지만 유지
+# 전체 인덱스의 대표 수가 max_entries를 넘으면 가장 오래 사용하지 않은 인덱스부터 메모리에서 내림 (저장한 서명은 다시 읽음)
+class NearDuplicateStore:
+    def __init__(self, settings, collection=None, num_perm=64, ttl=timedelta(days=7), max_indexes=200,
+                 retention_days=None, max_size=5000, max_entries=100000, prune_interval=timedelta(hours=1)):
+        self.settings = settings
+        self.collection = collection
+        self.num_perm = num_perm
+        self.ttl = ttl
+        self.max_indexes = max_indexes
+        self.retention_days = retention_days or {}
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.prune_interval = prune_interval
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+        if self.collection is not None:
+            self.collection.create_index([('소스', 1), ('종목코드', 1)])
+            # 만료시각(글 날짜 + 보관 기간)이 지나면 MongoDB가 자동으로 삭제
+            self.collection.create_index('만료시각', expireAfterSeconds=0)
+
+    def enabled(self, source):
+        return bool(self.settings.get(source))
+
+    def _persisted(self, source):
+        return self.collection is not None and self.settings[source].get('persist', False)
+
+    def _retention(self, source):
+        days = self.retention_days.get(source)
+        return self.ttl if days is None else timedelta(days=days)
+
+    def _index(self, source, code, now):
+        key = (source, code)
+        index = self._indexes.get(key)
+        if index is None:
+            setting = self.settings[source]
+            index = NearDuplicateIndex(setting.get('threshold', 0.8), self.num_perm, setting.get('ngram', 3))
+            if self._persisted(source):
+                documents = self.collection.find(
+                    {'소스': source, '종목코드': code, '만료시각': {'$gt': now}},
+                    {'서명': 1, '내용해시': 1, '날짜': 1, '_id': 0}
+                ).sort('날짜', -1).limit(self.max_size)
+                documents = list(documents)[::-1]
+                if documents:
+                    signatures = np.frombuffer(b''.join(doc['서명'] for doc in documents), dtype=np.uint32)
+                    signatures = signatures.reshape(len(documents), self.num_perm)
+                    digests = np.array([int(doc['내용해시'][:16], 16) for doc in documents], dtype=np.uint64)
+                    index.add_many(signatures, index.band_keys(signatures), digests, [doc['날짜'] for doc in documents])
+            index.pruned_at = now
+            self._indexes[key] = index
+        self._indexes.move_to_end(key)
+        return index
+
+    # 인덱스 수와 전체 대표 수를 제한 (가장 오래 사용하지 않은 인덱스부터, 방금 사용한 인덱스는 남김)
+    def _evict(self):
+        entries = sum(len(index) for index in self._indexes.values())
+        while len(self._indexes) > 1 and (len(self._indexes) > self.max_indexes or entries > self.max_entries):
+            _, index = self._indexes.popitem(last=False)
+            entries -= len(index)
+
+    # 유지할 문서면 True인 목록 반환 (dates: 문서별 글 날짜, 없으면 지금 시각)
+    def deduplicate(self, source, code, texts, hashes, dates=None):
+        if not self.enabled(source) or not texts:
+            return [True] * len(texts)
+
+        now = datetime.now()
+        retention = self._retention(source)
+        dates = [date or now for date in dates] if dates is not None else [now] * len(texts)
+        signatures = minhash_signatures(texts, self.num_perm, self.settings[source].get('ngram', 3))
+        with self._lock:
+            index = self._index(source, code, now)
+            keep, added = index.deduplicate(signatures, hashes, dates)
+            records = [
+                {'소스': source, '종목코드': code, '내용해시': hashes[i], '서명': signatures[i].tobytes(),
+                 '날짜': dates[i], '저장시각': now, '만료시각': dates[i] + retention}
+                for i in added
+            ]
+            # 보관 기간이 지난 대표는 prune_interval마다 지우고, 개수가 넘치면 최신 90%만 남김 (매번 다시 만들지 않도록)
+            if now - index.pruned_at >= self.prune_interval:
+                index.prune(now - retention, self.max_size)
+                index.pruned_at = now
+            elif len(index) > self.max_size:
+                index.prune(now - retention, self.max_size * 9 // 10)
+            self._evict()
+
+        if records and self._persisted(source):
+            try:
+                self.collection.insert_many(records, ordered=False)
+            except Exception as e:
+                print(f"An error occurred while saving near-duplicate signatures: {e}")
+        return keep
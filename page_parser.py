@@ -0,0 +1,97 @@
+from bs4.dammit import UnicodeDammit
+from lxml import etree, html as lxml_html
+
+
+# 클래스 이름 일치 조건 (CSS의 .name과 같음)
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 미리 컴파일한 XPath 선택자
+BOARD_TABLE = etree.XPath(f"(//table[{_has_class('type2')}])[1]")
+BOARD_ROWS = etree.XPath(".//tbody/tr")
+NEWS_ROWS = etree.XPath(f"//tr[td[{_has_class('title')}] and td[{_has_class('date')}]]")
+NEWS_TITLE = etree.XPath(f"td[{_has_class('title')}][1]")
+NEWS_DATE = etree.XPath(f"td[{_has_class('date')}][1]")
+INVESTING_COMMENTS = etree.XPath(f"//div[{_has_class('break-words')} and {_has_class('leading-5')}]")
+INVESTING_DATES = etree.XPath("//time")
+INVESTING_QUOTE_ITEM = etree.XPath(f"(//a[{_has_class('js-inner-all-results-quote-item')}])[1]")
+INVESTING_QUOTE_NAME = etree.XPath(f"span[{_has_class('third')}]")
+
+
+# 응답 본문(bytes)을 BeautifulSoup과 같은 방식으로 디코딩한 뒤 lxml로 파싱
+def parse_document(content):
+    if isinstance(content, bytes):
+        content = UnicodeDammit(content, is_html=True).unicode_markup
+    if not content or not content.strip():
+        return None
+    return lxml_html.document_fromstring(content)
+
+
+# 종목토론실 페이지: [(날짜, 제목, 공감, 비공감), ...] (문자열 그대로), 표나 행이 없으면 None
+# 행마다 td의 자식 요소를 한 번만 훑어서 날짜(span), 제목(td.title > a), 공감/비공감(strong)을 찾음
+def parse_board(content):
+    document = parse_document(content)
+    if document is None:
+        return None
+    tables = BOARD_TABLE(document)
+    if not tables:
+        return None
+    rows = BOARD_ROWS(tables[0])
+    if not rows:
+        return None
+
+    results = []
+    for row in rows[2:]:  # 앞의 두 행은 머리글
+        date = title = None
+        counts = []
+        for cell in row.iter('td'):
+            is_title = 'title' in (cell.get('class') or '').split()
+            for child in cell:
+                if child.tag == 'span':
+                    if date is None:
+                        date = child.text_content()
+                elif child.tag == 'strong':
+                    counts.append(child.text_content())
+                elif child.tag == 'a' and is_title and title is None:
+                    title = child.get('title')
+        if date is not None and title is not None and len(counts) >= 2:
+            results.append((date, title, counts[0], counts[1]))
+    return results
+
+
+# 뉴스 목록 페이지: [(제목, 날짜), ...] (앞뒤 공백 제거), 제목과 날짜를 같은 행에서 읽음
+def parse_news(content):
+    document = parse_document(content)
+    if document is None:
+        return []
+    results = []
+    for row in NEWS_ROWS(document):
+        title = NEWS_TITLE(row)[0].text_content().strip()
+        date = NEWS_DATE(row)[0].text_content().strip()
+        results.append((title, date))
+    return results
+
+
+# 인베스팅 토론 페이지: [(내용, datetime 속성), ...], 글이나 시간이 없으면 None
+def parse_investing(content):
+    document = parse_document(content)
+    if document is None:
+        return None
+    comments = INVESTING_COMMENTS(document)
+    dates = INVESTING_DATES(document)
+    if not comments or not dates:
+        return None
+    return [(comment.text_content().strip(), date.get('datetime')) for comment, date in zip(comments, dates)]
+
+
+# 인베스팅 검색 결과의 첫 번째 종목: (링크, 회사명), 없으면 None (회사명을 찾지 못하면 None)
+def parse_investing_quote(content):
+    document = parse_document(content)
+    if document is None:
+        return None
+    items = INVESTING_QUOTE_ITEM(document)
+    if not items or not items[0].get('href'):
+        return None
+    names = INVESTING_QUOTE_NAME(items[0])
+    return items[0].get('href'), names[0].text_content().strip() if names else None
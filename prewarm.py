@@ -0,0 +1,174 @@
+from collections import deque
+import heapq
+import math
+import threading
+import time
+from metrics import metered
+
+
+# 요청 빈도 기반 사전 분석 스케줄러
+# 종목별 인기도는 요청마다 1씩 더하고 half_life 초마다 절반으로 줄어드는 점수
+# 점수가 min_score 이상인 상위 max_codes개 종목(+ watchlist)을 인기도에 따라 min_interval~max_interval 간격으로 다시 분석
+# 갱신 하나가 직접 보낸 (페이지 요청 수, 감정 분석 API 호출 수)를 metrics.metered()로 세어 그 종목의 비용으로 기록 (사용자 요청은 섞이지 않음)
+# 갱신 전에 예상 비용(그 종목의 마지막 비용, 처음이면 다른 종목의 평균 또는 default_cost)을 예약해서
+# 최근 1분 동안의 비용 합이 pages_per_minute / api_calls_per_minute를 넘을 것 같으면 다음 갱신을 미룸
+class PrewarmScheduler:
+    def __init__(self, refresh, watchlist=(), max_codes=20, min_score=1.5, half_life=3600,
+                 min_interval=240, max_interval=1800, pages_per_minute=120, api_calls_per_minute=60, enabled=True,
+                 default_cost=(20, 10)):
+        self.refresh = refresh  # refresh(code), 예외는 기록만 하고 다음 주기에 다시 시도
+        self.watchlist = list(dict.fromkeys(watchlist))
+        self.max_codes = max_codes
+        self.min_score = min_score
+        self.half_life = half_life
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.pages_per_minute = pages_per_minute
+        self.api_calls_per_minute = api_calls_per_minute
+        self.enabled = enabled
+        self.default_cost = default_cost
+
+        self._scores = {}  # 종목코드: (점수, 마지막 갱신 시각)
+        self._costs = {}  # 종목코드: 마지막 갱신의 (페이지 수, API 호출 수)
+        self._spent = deque()  # 최근 1분 동안의 [시각, 페이지 수, API 호출 수] (진행 중인 갱신은 예상 비용)
+        self._heap = []  # (다음 갱신 시각, 종목코드)
+        self._scheduled = set()
+        self._counters = {'refreshes': 0, 'failures': 0, 'budget_waits': 0}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        with self._condition:
+            for code in self.watchlist:
+                self._schedule(code, time.monotonic())
+
+    def _decayed(self, code, now):
+        score, updated = self._scores.get(code, (0.0, now))
+        return score * math.pow(0.5, (now - updated) / self.half_life)
+
+    # 점수가 min_score 이상인 상위 max_codes개 종목 (인기 순)
+    def _popular(self, now):
+        scores = {code: self._decayed(code, now) for code in self._scores}
+        return sorted((code for code, score in scores.items() if score >= self.min_score),
+                      key=lambda code: scores[code], reverse=True)[:self.max_codes]
+
+    # 인기도가 높을수록 짧은 간격 (watchlist는 항상 min_interval)
+    def _interval(self, code, now):
+        if code in self.watchlist:
+            return self.min_interval
+        score = self._decayed(code, now)
+        return min(self.max_interval, max(self.min_interval, self.max_interval / max(score, 1e-9)))
+
+    def _schedule(self, code, due):
+        if code not in self._scheduled:
+            self._scheduled.add(code)
+            heapq.heappush(self._heap, (due, code))
+            self._condition.notify()
+
+    # 사용자 요청 기록 (새로 인기 종목이 되면 다음 갱신 예약)
+    # 처음 기록할 때 스레드를 띄움 (start()를 부르지 않는 WSGI 서버에서도 watchlist와 인기 종목을 갱신, stop() 뒤에는 띄우지 않음)
+    def record(self, code):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._condition:
+            self._scores[code] = (self._decayed(code, now) + 1, now)
+            if self._scores[code][0] >= self.min_score:
+                # 방금 요청으로 분석된 결과가 있으므로 첫 갱신은 한 주기 뒤
+                self._schedule(code, now + self._interval(code, now))
+            if self._thread is not None or self._stopped:
+                return
+        self.start()
+
+    # 갱신 한 번의 예상 비용 (처음 갱신하는 종목은 다른 종목 비용의 평균, 기록이 없으면 default_cost)
+    def _estimate(self, code):
+        if code in self._costs:
+            return self._costs[code]
+        if not self._costs:
+            return self.default_cost
+        costs = list(self._costs.values())
+        return (math.ceil(sum(cost[0] for cost in costs) / len(costs)),
+                math.ceil(sum(cost[1] for cost in costs) / len(costs)))
+
+    # 최근 1분 동안 쓴 예산에 이번 갱신의 예상 비용을 더하면 예산을 넘는 경우 기다려야 할 시간(초)
+    # 최근 1분 동안 쓴 비용이 없으면 예상 비용이 예산보다 커도 실행 (한 번에 예산을 넘는 종목도 갱신되도록)
+    def _budget_wait(self, code, now):
+        while self._spent and now - self._spent[0][0] >= 60:
+            self._spent.popleft()
+        pages = sum(spent[1] for spent in self._spent)
+        api_calls = sum(spent[2] for spent in self._spent)
+        cost_pages, cost_calls = self._estimate(code)
+        over = ((pages and pages + cost_pages > self.pages_per_minute)
+                or (api_calls and api_calls + cost_calls > self.api_calls_per_minute))
+        if not over:
+            return 0
+        return 60 - (now - self._spent[0][0])
+
+    # reservation은 _spent에 미리 넣어 둔 예상 비용, 끝나면 실제 비용으로 바꿈
+    def _run_once(self, code, reservation):
+        with metered() as usage:
+            try:
+                self.refresh(code)
+                failed = False
+            except Exception as e:
+                print(f"An error occurred while prewarming {code}: {e}")
+                failed = True
+        cost = (usage.get('pages'), usage.get('api_calls'))
+        with self._condition:
+            self._costs[code] = cost
+            reservation[1:] = cost
+            self._counters['failures' if failed else 'refreshes'] += 1
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    self._condition.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                if self._stopped:
+                    return
+                now = time.monotonic()
+                due, code = heapq.heappop(self._heap)
+                self._scheduled.discard(code)
+                if code not in self.watchlist and code not in self._popular(now):
+                    continue  # 인기가 식은 종목은 더 이상 갱신하지 않음 (다시 요청되면 예약)
+                wait = self._budget_wait(code, now)
+                if wait > 0:
+                    self._counters['budget_waits'] += 1
+                    self._schedule(code, now + wait)
+                    continue
+                reservation = [now, *self._estimate(code)]
+                self._spent.append(reservation)
+
+            self._run_once(code, reservation)
+            with self._condition:
+                now = time.monotonic()
+                self._schedule(code, now + self._interval(code, now))
+
+    def start(self):
+        if not self.enabled:
+            return
+        with self._condition:
+            if self._thread is not None:
+                return
+            self._stopped = False
+            self._thread = threading.Thread(target=self._work, name='prewarm-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def stats(self):
+        now = time.monotonic()
+        with self._condition:
+            counters = dict(self._counters)
+            counters['hot_codes'] = len(set(self.watchlist) | set(self._popular(now)))
+            while self._spent and now - self._spent[0][0] >= 60:
+                self._spent.popleft()
+            counters['pages_last_minute'] = sum(spent[1] for spent in self._spent)
+            counters['api_calls_last_minute'] = sum(spent[2] for spent in self._spent)
+            counters['scheduled'] = len(self._heap)
+        return counters
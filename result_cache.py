@@ -0,0 +1,214 @@
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+
+# 분석 결과 캐시 (TTL + stale-while-revalidate + 동일 키 요청 합치기)
+# ttl 안에는 캐시를 그대로 반환하고, stale_ttl 안에는 이전 결과를 반환하면서 백그라운드에서 다시 계산
+# 같은 키를 동시에 요청하면 계산은 한 번만 하고 나머지 요청은 그 결과를 기다림
+class ResultCache:
+    def __init__(self, ttl=300, stale_ttl=1800, max_entries=1000, refresh_workers=2):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._waiting = defaultdict(int)  # 키별로 진행 중인 계산의 결과를 기다리는 요청 수
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers)
+        self._counters = defaultdict(int)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # 계산을 시작하거나 이미 진행 중인 계산에 합류 (leader면 직접 계산해야 함)
+    # waiting=True면 합류한 요청이 결과를 끝까지 기다리는 것으로 셈 (기다리는 요청이 있으면 abandon()이 계산을 버리지 않음)
+    # abandon()으로 버린 계산은 _inflight에서 빠지므로 그 뒤에 온 요청은 새 계산을 시작
+    def _join(self, key, waiting=True):
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._counters['coalesced'] += 1
+                if waiting:
+                    self._waiting[key] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _compute(self, key, future, compute):
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self._finish(key, future)
+
+    # 계산이 끝나면 _inflight에서 제거 (버려진 계산이면 이미 같은 키로 새 계산이 등록되어 있을 수 있음)
+    def _finish(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                self._waiting.pop(key, None)
+
+    def _compute_in_background(self, key, future, compute):
+        try:
+            self._compute(key, future, compute)
+        except BaseException:
+            pass  # 예외는 future로 전달됨
+
+    # 이미 계산 중이면 결과를 기다리지 않으므로 기다리는 요청으로 세지 않음
+    def _refresh(self, key, compute):
+        future, leader = self._join(key, waiting=False)
+        if not leader:
+            return
+        try:
+            self._compute(key, future, compute)
+        except Exception as e:
+            print(f"An error occurred while refreshing {key}: {e}")
+
+    def get(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._count('hits')
+                return value
+            if age < self.ttl + self.stale_ttl:
+                # 오래된 결과를 먼저 반환하고 백그라운드에서 갱신
+                self._count('stale_hits')
+                self._refresh_later(key, compute)
+                return value
+
+        self._count('misses')
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        return self._compute(key, future, compute)
+
+    def _refresh_later(self, key, compute):
+        with self._lock:
+            refreshing = key in self._inflight
+        if not refreshing:
+            self._refresher.submit(self._refresh, key, compute)
+
+    # 여러 키를 get()과 같은 기준으로 조회 → {키: 값}
+    # 캐시에 없고 계산 중도 아닌 키만 모아 compute_many(keys) → {키: 값}으로 한 번에 계산하고,
+    # 다른 요청이 계산 중인 키는 그 결과를 기다림 (오래된 값의 백그라운드 갱신은 compute(key))
+    def get_many(self, keys, compute_many, compute):
+        values = {}
+        leaders = {}
+        followers = {}
+        for key in keys:
+            value, state = self.lookup(key)
+            if state == 'stale':
+                self._refresh_later(key, lambda key=key: compute(key))
+            if state is not None:
+                values[key] = value
+                continue
+            future, leader = self._join(key)
+            (leaders if leader else followers)[key] = future
+
+        # 직접 맡은 키를 먼저 계산한 뒤 다른 요청의 결과를 기다림 (서로의 키를 기다리며 멈추지 않도록)
+        if leaders:
+            try:
+                computed = compute_many(list(leaders))
+                for key, future in leaders.items():
+                    self._store(key, computed[key])
+                    future.set_result(computed[key])
+                    values[key] = computed[key]
+            except BaseException as e:
+                for future in leaders.values():
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+            finally:
+                for key, future in leaders.items():
+                    self._finish(key, future)
+        for key, future in followers.items():
+            values[key] = future.result()
+        return {key: values[key] for key in keys}
+
+    # 같은 키를 계산 중이면 그 계산의 Future, 아니면 새 스레드에서 계산을 시작하고 Future를 바로 반환
+    # 반환값: (Future, 새로 시작했는지 여부), 합류한 쪽은 기다리는 요청으로 세지 않음 (결과를 끝까지 기다리지 않을 수 있으므로)
+    def start(self, key, compute):
+        future, leader = self._join(key, waiting=False)
+        if leader:
+            self._count('misses')
+            threading.Thread(target=self._compute_in_background, args=(key, future, compute), daemon=True).start()
+        return future, leader
+
+    # 진행 중인 계산의 결과를 기다리는 요청(get/refresh/get_many로 합류한 요청)이 없으면 그 계산을 버리고 True
+    # 확인과 제거를 같은 락 안에서 하므로, 버린 뒤에 온 요청은 버려진 계산의 결과(예외) 대신 새 계산을 시작
+    # 버린 계산은 호출한 쪽이 예외 등으로 중단해야 함
+    def abandon(self, key):
+        with self._lock:
+            if self._waiting.get(key, 0) or key not in self._inflight:
+                return False
+            del self._inflight[key]
+            self._waiting.pop(key, None)
+            return True
+
+    # 신선한(ttl 이내) 캐시 값만 반환, 없으면 None
+    def peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    # get()과 같은 기준으로 상태만 확인: (값, 'fresh' 또는 'stale'), 없거나 만료되면 (None, None) (통계도 get()과 같이 셈)
+    # 계산과 백그라운드 갱신은 호출하는 쪽에서 처리 (비동기 서버)
+    def lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._count('hits')
+                return value, 'fresh'
+            if age < self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                return value, 'stale'
+        self._count('misses')
+        return None, None
+
+    # 저장된 뒤 지난 시간(초), 없으면 None
+    def age(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        return time.monotonic() - entry[1] if entry is not None else None
+
+    # 캐시 상태와 관계없이 지금 다시 계산해서 저장 (같은 키를 계산 중이면 그 결과를 기다림)
+    def refresh(self, key, compute):
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        return self._compute(key, future, compute)
+
+    def put(self, key, value):
+        self._store(key, value)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+            stats['inflight'] = len(self._inflight)
+        return stats
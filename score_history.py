@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+# 집계 단위별 구간 시작 시각
+ROLLUP_UNITS = {
+    'hour': lambda at: at.replace(minute=0, second=0, microsecond=0),
+    'day': lambda at: at.replace(hour=0, minute=0, second=0, microsecond=0),
+}
+
+
+# 종목별 점수 기록 (분석할 때마다 시계열 컬렉션에 한 건씩 저장)
+# 저장할 때 시간/일 단위 집계 문서도 $inc/$min/$max로 함께 갱신하므로 이력 조회는 집계 문서만 읽음
+# 기록과 집계 문서는 retention이 지나면 MongoDB가 TTL로 삭제 (집계 문서는 구간 시작 시각 기준)
+class ScoreHistory:
+    def __init__(self, db, collection='score_history', rollup_collection='score_rollups', retention=timedelta(days=90)):
+        self.retention = retention
+        self.collection = self._time_series(db, collection)
+        self.rollups = db[rollup_collection]
+        self.rollups.create_index([('종목코드', ASCENDING), ('단위', ASCENDING), ('구간', ASCENDING)], unique=True)
+        self.rollups.create_index('구간', expireAfterSeconds=int(self.retention.total_seconds()))
+
+    # MongoDB 시계열 컬렉션 생성 (이미 있거나 지원하지 않는 서버면 일반 컬렉션 + 인덱스 사용)
+    # 시계열 컬렉션은 expireAfterSeconds로, 일반 컬렉션은 시각 TTL 인덱스로 만료
+    def _time_series(self, db, name):
+        expire = int(self.retention.total_seconds())
+        try:
+            db.create_collection(name, timeseries={'timeField': '시각', 'metaField': '종목코드', 'granularity': 'minutes'},
+                                 expireAfterSeconds=expire)
+        except (CollectionInvalid, OperationFailure, NotImplementedError, TypeError):
+            pass
+        except Exception as e:
+            print(f"An error occurred while creating score history collection: {e}")
+        collection = db[name]
+        try:
+            collection.create_index([('종목코드', ASCENDING), ('시각', ASCENDING)])
+            if not self._is_time_series(collection):
+                collection.create_index('시각', expireAfterSeconds=expire)
+        except Exception as e:
+            print(f"An error occurred while creating score history index: {e}")
+        return collection
+
+    @staticmethod
+    def _is_time_series(collection):
+        try:
+            return 'timeseries' in collection.options()
+        except Exception:
+            return False  # 컬렉션 옵션을 조회할 수 없는 서버 (mongomock 등)
+
+    # sentiment_count: {감정: {소스: 개수}} (분석 응답의 sentiment_count 형식)
+    def record(self, code, score, sentiment_count, at=None):
+        at = at or datetime.now()
+        self.collection.insert_one({'종목코드': code, '시각': at, '점수': score, '감정수': sentiment_count})
+
+        counts = {f'감정수.{sentiment}.{source}': count
+                  for sentiment, sources in sentiment_count.items() for source, count in sources.items()}
+        self.rollups.bulk_write([
+            UpdateOne(
+                {'종목코드': code, '단위': unit, '구간': start(at)},
+                {
+                    '$inc': {'횟수': 1, '점수합계': score, **counts},
+                    '$min': {'최저점수': score},
+                    '$max': {'최고점수': score, '마지막시각': at},
+                },
+                upsert=True
+            )
+            for unit, start in ROLLUP_UNITS.items()
+        ], ordered=False)
+        # 마지막 점수는 가장 늦은 시각의 기록만 반영
+        for unit, start in ROLLUP_UNITS.items():
+            self.rollups.update_one({'종목코드': code, '단위': unit, '구간': start(at), '마지막시각': at},
+                                    {'$set': {'마지막점수': score}})
+
+    # unit 단위 집계를 오래된 순으로 반환 (since 이후 구간만)
+    def history(self, code, unit='hour', since=None):
+        query = {'종목코드': code, '단위': unit}
+        if since is not None:
+            query['구간'] = {'$gte': ROLLUP_UNITS[unit](since)}
+        history = []
+        for doc in self.rollups.find(query, {'_id': 0}).sort('구간', ASCENDING):
+            history.append({
+                'time': doc['구간'].isoformat(),
+                'average_score': round(doc['점수합계'] / doc['횟수'], 1),
+                'min_score': doc['최저점수'],
+                'max_score': doc['최고점수'],
+                'last_score': doc.get('마지막점수'),
+                'samples': doc['횟수'],
+                'sentiment_count': doc.get('감정수', {}),
+            })
+        return history
@@ -0,0 +1,87 @@
+from datetime import datetime
+import numpy as np
+
+# 감정 코드 (감정 문자열 대신 int8 배열로 계산)
+SENTIMENTS = ('negative', 'neutral', 'positive')
+SENTIMENT_CODES = {sentiment: code for code, sentiment in enumerate(SENTIMENTS)}
+
+# 데이터 소스 별 가중치 (소스 가중치, 감정별 가중치 [부정, 중립, 긍정])
+SOURCE_WEIGHTS = {
+    'comments': (1, (0.8, 1, 1.2)),
+    'news': (4, (0.7, 1, 1.3)),
+    'investing': (2, (0.7, 1, 1.2)),
+}
+# 감정별 가중치는 소수 첫째 자리까지이므로 10배한 정수로 계산 (개수만으로 계산할 때 반올림 오차가 없음)
+WEIGHT_SCALE = 10
+
+
+# [[내용, 감정], ...] -> 감정 코드 배열
+def sentiment_codes(results):
+    return np.fromiter((SENTIMENT_CODES[row[1]] for row in results), dtype=np.int8, count=len(results))
+
+
+# 감정별 개수 (부정, 중립, 긍정)
+def sentiment_counts(codes):
+    return np.bincount(codes, minlength=len(SENTIMENTS))
+
+
+# 글 날짜 기준 시간 감쇠 가중치 (half_life 시간마다 절반, 날짜가 없거나 미래면 1)
+def decay_weights(dates, half_life, now=None):
+    now = now or datetime.now()
+    ages = np.fromiter(((now - date).total_seconds() / 3600 if date is not None else 0 for date in dates),
+                       dtype=float, count=len(dates))
+    return np.power(0.5, np.maximum(ages, 0) / half_life)
+
+
+# 소스 하나의 (가중 합, 가능한 최소, 가능한 최대)
+# sums: 감정별 개수(정수 계산) 또는 감정별 가중치 합, amount: 문장 수 또는 가중치 합
+def source_totals(source, sums, amount):
+    source_weight, sentiment_weights = SOURCE_WEIGHTS[source]
+    sentiment_weights = np.rint(np.asarray(sentiment_weights) * WEIGHT_SCALE).astype(np.int64) * source_weight
+    return (sums @ sentiment_weights).item(), amount * int(sentiment_weights.min()), amount * int(sentiment_weights.max())
+
+
+def normalize(total, low, high):
+    if high == low:
+        return 0
+    return int(100 * (total - low) // (high - low))
+
+
+# 문장 목록 없이 소스별 감정 개수(와 시간 감쇠 가중치 합)만 누적하는 점수 계산기
+# score()는 소스별 (가중치 합)을 가능한 최소/최대 점수 사이에서 정규화한 0~100 점수 (가중치가 없으면 감정별 개수만으로 정수 계산)
+# 결과를 묶음 단위로 add()해도 메모리는 문장 수와 관계없이 일정
+# half_life(시간)를 주면 add()에 넘긴 글 날짜로 가중치 계산 (기준 시각은 now, 기본은 생성 시각)
+class ScoreAccumulator:
+    __slots__ = ('half_life', 'now', 'counts', 'weighted', 'amounts')
+
+    def __init__(self, half_life=None, now=None):
+        self.half_life = half_life
+        self.now = now or datetime.now()
+        self.counts = {source: np.zeros(len(SENTIMENTS), dtype=np.int64) for source in SOURCE_WEIGHTS}
+        self.weighted = {source: np.zeros(len(SENTIMENTS)) for source in SOURCE_WEIGHTS}
+        self.amounts = dict.fromkeys(SOURCE_WEIGHTS, 0.0)
+
+    # codes: 감정 코드 배열, dates: 같은 순서의 글 날짜 (half_life가 있을 때만 사용)
+    def add(self, source, codes, dates=None):
+        self.counts[source] += sentiment_counts(codes)
+        if self.half_life:
+            weights = decay_weights(dates, self.half_life, self.now) if dates is not None else np.ones(len(codes))
+            self.weighted[source] += np.bincount(codes, weights, minlength=len(SENTIMENTS))
+            self.amounts[source] += float(weights.sum())
+
+    def score(self):
+        total = low = high = 0
+        for source, counts in self.counts.items():
+            if self.half_life:
+                totals = source_totals(source, self.weighted[source], self.amounts[source])
+            else:
+                totals = source_totals(source, counts, int(counts.sum()))
+            total += totals[0]
+            low += totals[1]
+            high += totals[2]
+        return normalize(total, low, high)
+
+    # {소스: {감정: 개수}}
+    def counts_by_source(self):
+        return {source: {sentiment: int(counts[code]) for code, sentiment in enumerate(SENTIMENTS)}
+                for source, counts in self.counts.items()}
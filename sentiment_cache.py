@@ -0,0 +1,131 @@
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+import hashlib
+import threading
+
+
+# 정리된 문장의 해시를 캐시 키로 사용
+def sentence_key(sentence):
+    return hashlib.sha1(sentence.strip().encode('utf-8')).hexdigest()
+
+
+# 감정 분석 결과 캐시 (메모리 LRU + MongoDB)
+# 값은 문장 하나에 대해 API가 돌려준 [[내용, 감정], ...] 목록
+class SentimentCache:
+    def __init__(self, collection=None, max_entries=20000, ttl=timedelta(days=7)):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+        if self.collection is not None:
+            # 저장 후 ttl이 지나면 MongoDB가 자동으로 삭제
+            self.collection.create_index('저장시각', expireAfterSeconds=int(ttl.total_seconds()))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _remember(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    # 메모리에서 찾은 결과 {문장: 결과}와 MongoDB에서 찾아볼 {키: 문장}
+    def _lookup_memory(self, sentences, now):
+        found = {}
+        missing = {}
+        seen = set()
+
+        with self._lock:
+            for sentence in sentences:
+                if sentence in seen:
+                    continue
+                seen.add(sentence)
+                key = sentence_key(sentence)
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < self.ttl:
+                    self._entries.move_to_end(key)
+                    found[sentence] = entry[0]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing[key] = sentence
+        self._count('memory_hits', len(found))
+        return found, missing
+
+    def _mongo_query(self, missing, now):
+        return {'_id': {'$in': list(missing)}, '저장시각': {'$gte': now - self.ttl}}, {'결과': 1, '저장시각': 1}
+
+    # MongoDB에서 찾은 문서를 결과와 메모리에 반영
+    def _found_documents(self, documents, found, missing):
+        mongo_hits = 0
+        for doc in documents:
+            sentence = missing.pop(doc['_id'])
+            found[sentence] = doc['결과']
+            self._remember(doc['_id'], doc['결과'], doc['저장시각'])
+            mongo_hits += 1
+        self._count('mongo_hits', mongo_hits)
+
+    # 문장 목록을 받아 캐시에 있는 결과만 {문장: 결과}로 반환
+    def get_many(self, sentences):
+        now = datetime.now()
+        found, missing = self._lookup_memory(sentences, now)
+        if missing and self.collection is not None:
+            self._found_documents(self.collection.find(*self._mongo_query(missing, now)), found, missing)
+        self._count('misses', len(missing))
+        return found
+
+    # get_many와 같지만 MongoDB는 비동기 컬렉션(collection)으로 조회 (메모리 캐시는 공유)
+    async def get_many_async(self, sentences, collection):
+        now = datetime.now()
+        found, missing = self._lookup_memory(sentences, now)
+        if missing:
+            documents = await collection.find(*self._mongo_query(missing, now)).to_list()
+            self._found_documents(documents, found, missing)
+        self._count('misses', len(missing))
+        return found
+
+    # 메모리에 저장하고 MongoDB에 쓸 작업 목록 반환
+    def _store(self, results):
+        now = datetime.now()
+        operations = []
+        for sentence, value in results.items():
+            key = sentence_key(sentence)
+            self._remember(key, value, now)
+            operations.append(ReplaceOne({'_id': key}, {'_id': key, '결과': value, '저장시각': now}, upsert=True))
+        return operations
+
+    # {문장: 결과}를 캐시에 저장
+    def put_many(self, results):
+        if not results:
+            return
+        operations = self._store(results)
+        if self.collection is not None:
+            self.collection.bulk_write(operations, ordered=False)
+
+    async def put_many_async(self, results, collection):
+        if not results:
+            return
+        await collection.bulk_write(self._store(results), ordered=False)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        hits = counters.get('memory_hits', 0) + counters.get('mongo_hits', 0)
+        lookups = hits + counters.get('misses', 0)
+        return {
+            'memory_hits': counters.get('memory_hits', 0),
+            'mongo_hits': counters.get('mongo_hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'hit_rate': hits / lookups if lookups else 0,
+            'size': size,
+        }
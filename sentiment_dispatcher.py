@@ -0,0 +1,278 @@
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http_pool import RETRY_STATUS, SessionPool
+from metrics import count_usage, submit_in_context
+import asyncio
+import threading
+import time
+import requests
+
+# 네이버 감정 분석 API의 요청당 최대 글자 수
+MAX_CONTENT_LENGTH = 1000
+
+# 200 응답의 본문을 읽을 수 없을 때 나는 예외 (JSON이 아니거나 sentences/content/sentiment가 없음)
+# 다른 API 오류와 같이 재시도하고, 끝까지 실패하면 그 묶음은 None
+MALFORMED_RESPONSE_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+# 초당 요청 수를 제한하는 토큰 버킷
+class RateLimiter:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate or 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# RateLimiter의 비동기 버전 (기다리는 동안 이벤트 루프를 막지 않음)
+class AsyncRateLimiter:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, rate or 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# 글자 수 제한 안에서 최대한 많은 댓글을 한 묶음으로 구성 (인덱스 목록 반환)
+def pack_batches(comments, max_chars=MAX_CONTENT_LENGTH):
+    batches = []
+    batch = []
+    length = 0
+    for index, comment in enumerate(comments):
+        size = len(comment) + (1 if batch else 0)  # ' '로 이어 붙이는 구분자 포함
+        if batch and length + size > max_chars:
+            batches.append(batch)
+            batch = []
+            length = 0
+            size = len(comment)
+        batch.append(index)
+        length += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+# API가 문장 단위로 나눠 돌려준 결과를 문장 위치(offset)로 원래 댓글에 다시 배정
+def split_sentences_by_comment(comments, text, sentences):
+    starts = []
+    position = 0
+    for comment in comments:
+        starts.append(position)
+        position += len(comment) + 1
+
+    batch_results = [[] for _ in comments]
+    cursor = 0
+    for sentence in sentences:
+        offset = sentence.get('offset')
+        if offset is None:
+            found = text.find(sentence['content'].strip(), cursor)
+            offset = found if found != -1 else cursor
+        cursor = offset
+        index = max(bisect_right(starts, offset) - 1, 0)
+        batch_results[index].append([sentence['content'], sentence['sentiment']])  # 구분자 제거 후 추가
+
+    return batch_results
+
+
+# 감정 분석 요청을 묶어서 동시에 보내는 디스패처
+# 결과는 입력 댓글 순서대로 [[내용, 감정], ...] 목록, 재시도 후에도 실패한 댓글은 None
+class SentimentDispatcher:
+    def __init__(self, api_url, headers, max_chars=MAX_CONTENT_LENGTH, max_workers=4,
+                 requests_per_second=10, max_retries=3, timeout=(5, 30), session_pool=None):
+        self.api_url = api_url
+        self.headers = headers
+        self.max_chars = max_chars
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.limiter = RateLimiter(requests_per_second)
+        # 재시도는 속도 제한을 거치도록 디스패처에서 직접 처리
+        self.session_pool = session_pool or SessionPool(
+            max_per_host=max_workers, max_retries=0, session_factory=requests.Session
+        )
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    # 한 묶음 전송, 실패하면 None
+    def send_batch(self, comments):
+        text = ' '.join(comments)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            self._count('requests')
+            self._count('in_flight')
+            count_usage('api_calls')
+            response = None
+            try:
+                response = self.session_pool.post(
+                    self.api_url, headers=self.headers, json={'content': text}, timeout=self.timeout
+                )
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            else:
+                if response.status_code == 200:
+                    try:
+                        return split_sentences_by_comment(comments, text, response.json()['sentences'])
+                    except MALFORMED_RESPONSE_ERRORS as e:
+                        error = f"malformed response: {e!r}"
+                else:
+                    error = f"status {response.status_code}"
+            finally:
+                self._count('in_flight', -1)
+
+            self._count('errors')
+            if response is not None and response.status_code != 200 and response.status_code not in RETRY_STATUS:
+                break
+
+            if attempt < self.max_retries:
+                self._count('retries')
+                time.sleep(self.session_pool.retry_delay(attempt, response))
+
+        self._count('failed_batches')
+        print(f"Sentiment batch of {len(comments)} comments failed: {error}")
+        return None
+
+    # on_batch(indices, batch_results)를 넘기면 묶음이 끝나는 순서대로 호출 (예외를 던지면 남은 묶음 취소)
+    def classify(self, comments, on_batch=None):
+        # 한 묶음의 글자 수 제한을 넘는 댓글은 잘라서 전송
+        comments = [comment[:self.max_chars] for comment in comments]
+        batches = pack_batches(comments, self.max_chars)
+        results = [None] * len(comments)
+        if not batches:
+            return results
+
+        def run(batch):
+            return self.send_batch([comments[index] for index in batch])
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {submit_in_context(executor, run, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                batch_results = future.result()
+                if batch_results is None:
+                    continue
+                for index, comment_results in zip(batch, batch_results):
+                    results[index] = comment_results
+                if on_batch is not None:
+                    on_batch(batch, batch_results)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self._count('batches', len(batches))
+        return results
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+# SentimentDispatcher의 비동기 버전 (같은 묶음 구성/재시도/결과 형식, session_pool은 async_http.AsyncSessionPool)
+# 스레드 대신 max_workers개의 코루틴으로 묶음을 보내므로 동시에 분석하는 종목이 많아도 스레드가 늘지 않음
+class AsyncSentimentDispatcher:
+    def __init__(self, api_url, headers, session_pool, max_chars=MAX_CONTENT_LENGTH, max_workers=4,
+                 requests_per_second=10, max_retries=3):
+        self.api_url = api_url
+        self.headers = headers
+        self.session_pool = session_pool
+        self.max_chars = max_chars
+        self.max_retries = max_retries
+        self.limiter = AsyncRateLimiter(requests_per_second)
+        self.semaphore = asyncio.Semaphore(max_workers)  # 모든 분석이 함께 쓰는 동시 요청 수 제한
+        self._counters = defaultdict(int)
+
+    def _count(self, name, amount=1):
+        self._counters[name] += amount
+
+    async def send_batch(self, comments):
+        text = ' '.join(comments)
+        for attempt in range(self.max_retries + 1):
+            async with self.semaphore:
+                await self.limiter.acquire()
+                self._count('requests')
+                self._count('in_flight')
+                response = None
+                try:
+                    # 재시도는 속도 제한을 거치도록 디스패처에서 직접 처리
+                    response = await self.session_pool.request('POST', self.api_url, headers=self.headers,
+                                                               json={'content': text}, retries=0)
+                except self.session_pool.errors as e:
+                    error = e
+                else:
+                    if response.status_code == 200:
+                        try:
+                            return split_sentences_by_comment(comments, text, response.json()['sentences'])
+                        except MALFORMED_RESPONSE_ERRORS as e:
+                            error = f"malformed response: {e!r}"
+                    else:
+                        error = f"status {response.status_code}"
+                finally:
+                    self._count('in_flight', -1)
+
+            self._count('errors')
+            if response is not None and response.status_code != 200 and response.status_code not in RETRY_STATUS:
+                break
+
+            if attempt < self.max_retries:
+                self._count('retries')
+                await asyncio.sleep(self.session_pool.retry_delay(attempt, response))
+
+        self._count('failed_batches')
+        print(f"Sentiment batch of {len(comments)} comments failed: {error}")
+        return None
+
+    async def classify(self, comments, on_batch=None):
+        comments = [comment[:self.max_chars] for comment in comments]
+        batches = pack_batches(comments, self.max_chars)
+        results = [None] * len(comments)
+
+        async def run(batch):
+            batch_results = await self.send_batch([comments[index] for index in batch])
+            if batch_results is None:
+                return
+            for index, comment_results in zip(batch, batch_results):
+                results[index] = comment_results
+            if on_batch is not None:
+                on_batch(batch, batch_results)
+
+        tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        self._count('batches', len(batches))
+        return results
+
+    def stats(self):
+        return dict(self._counters)
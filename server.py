@@ -1,9 +1,32 @@
-from flask import Flask, jsonify
-import requests
+from flask import Flask, Response, jsonify, request, stream_with_context
 from pymongo import MongoClient
 import comments_crawler
 from collections import Counter
-from sklearn.feature_extraction.text import TfidfVectorizer
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+import json
+import queue
+import threading
+import os
+import re
+import time
+import numpy as np
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sentiment_cache import SentimentCache
+from sentiment_dispatcher import SentimentDispatcher
+from result_cache import ResultCache
+from jobs import JobQueue, QueueFull
+from keyword_engine import KeywordAccumulator
+from comment_filter import CommentFilter
+from near_duplicates import NearDuplicateStore
+from metrics import count_usage, registry, stats_families
+from prewarm import PrewarmScheduler
+from scoring import SENTIMENTS, ScoreAccumulator, sentiment_codes
+from score_history import ROLLUP_UNITS, ScoreHistory
+from local_sentiment import LocalSentimentModel, SentimentClassifier
+import crawl_worker
+import atexit
 
 app = Flask(__name__)
 
@@ -13,208 +36,404 @@ CLIENT_SECRET = "xxx"
 
 
 # MongoDB 설정
-client = MongoClient("mongodb://localhost:27017")
+client = MongoClient(comments_crawler.MONGO_URI)
 db = client['stock_data']
 collection_news = db.news
 collection_comments = db.comments
 collection_investing = db.investing_comments
-
-#크롤링 실행 함수
-def crawlingWithStackCode(code):
-    comments_crawler.crawl_comments(code)
-    comments_crawler.crawl_news(code)
-    comments_crawler.crawl_investing(code)
-
-#댓글 필터링 함수
-def filteringComments(code, collection, check_empathy=False):
-    if check_empathy:
-        documents = collection.find({'종목코드': code}, {'내용': 1, '공감': 1, '비공감': 1, '_id': 0})
+source_collections = {'comments': collection_comments, 'news': collection_news, 'investing': collection_investing}
+
+# 감정 분석 결과 캐시 (메모리 LRU + MongoDB, 같은 문장은 API를 다시 호출하지 않음)
+SENTIMENT_CACHE_SIZE = 20000
+SENTIMENT_CACHE_TTL = timedelta(days=7)
+sentiment_cache = SentimentCache(db.sentiment_cache, SENTIMENT_CACHE_SIZE, SENTIMENT_CACHE_TTL)
+
+# 감정 분석 요청 설정 (글자 수 기준으로 묶어 동시에 전송, 초당 요청 수 제한)
+SENTIMENT_WORKERS = 4
+SENTIMENT_REQUESTS_PER_SECOND = 10
+sentiment_dispatcher = SentimentDispatcher(
+    API_URL,
+    {
+        'X-NCP-APIGW-API-KEY-ID': CLIENT_ID,
+        'X-NCP-APIGW-API-KEY': CLIENT_SECRET,
+        'Content-Type': 'application/json'
+    },
+    max_workers=SENTIMENT_WORKERS,
+    requests_per_second=SENTIMENT_REQUESTS_PER_SECOND
+)
+
+# 로컬 감정 분석 모델 (python local_sentiment.py로 감정 분석 캐시의 API 결과를 학습해 생성)
+# SENTIMENT_MODE: api(외부 API, 실패한 댓글만 로컬 모델), local(로컬 모델만), hybrid(확신도가 낮은 댓글만 API로 확인)
+SENTIMENT_MODE = os.environ.get('SENTIMENT_MODE', 'api')
+SENTIMENT_MODEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sentiment_model.joblib')
+SENTIMENT_MIN_CONFIDENCE = 0.8
+
+def loadSentimentModel(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        return LocalSentimentModel.load(path)
+    except Exception as e:
+        print(f"An error occurred while loading sentiment model: {e}")
+        return None
+
+sentiment_classifier = SentimentClassifier(
+    sentiment_dispatcher,
+    loadSentimentModel(SENTIMENT_MODEL_FILE),
+    mode=SENTIMENT_MODE,
+    min_confidence=SENTIMENT_MIN_CONFIDENCE
+)
+
+# 종목별 분석 결과 캐시 (초 단위)
+# TTL 안에는 캐시를 바로 반환, 그 뒤 STALE 시간 동안은 이전 결과를 반환하면서 백그라운드에서 갱신
+RESULT_CACHE_TTL = 300
+RESULT_CACHE_STALE = 1800
+result_cache = ResultCache(RESULT_CACHE_TTL, RESULT_CACHE_STALE)
+
+# 점수 계산 시 글 날짜 기준 시간 감쇠 (시간 단위 반감기, None이면 모든 글을 같은 가중치로 계산)
+SCORE_HALF_LIFE_HOURS = None
+
+# 점수 이력 (분석할 때마다 시계열 컬렉션에 저장, /history/<code>는 미리 집계한 시간/일 단위 값만 조회)
+SCORE_HISTORY_RETENTION = timedelta(days=90)
+SCORE_HISTORY_MAX_DAYS = 365
+score_history = ScoreHistory(db, retention=SCORE_HISTORY_RETENTION)
+
+# 비동기 분석 작업 설정 (작업자 수, 대기 가능한 작업 수, 완료 작업 보관 시간(초))
+JOB_WORKERS = 2
+JOB_QUEUE_DEPTH = 50
+JOB_RETENTION = 600
+
+# 인기 종목 사전 분석 설정
+# 요청 빈도 점수(요청마다 +1, PREWARM_HALF_LIFE 초마다 절반)가 PREWARM_MIN_SCORE 이상인 상위 PREWARM_MAX_CODES개 종목과
+# PREWARM_WATCHLIST 종목을 백그라운드에서 미리 분석 (인기가 높을수록 짧은 간격, 최소 간격은 RESULT_CACHE_TTL보다 짧게)
+# 사전 분석이 1분 동안 쓰는 크롤링 페이지 요청 수와 감정 분석 API 호출 수는 예산 안으로 제한
+PREWARM_ENABLED = True
+PREWARM_WATCHLIST = []
+PREWARM_MAX_CODES = 20
+PREWARM_MIN_SCORE = 1.5  # 최근에 두 번 정도 요청된 종목부터
+PREWARM_HALF_LIFE = 3600
+PREWARM_MIN_INTERVAL = 240
+PREWARM_MAX_INTERVAL = 1800
+PREWARM_PAGES_PER_MINUTE = 120
+PREWARM_API_CALLS_PER_MINUTE = 60
+PREWARM_SKIP_AGE = 60  # 이 시간(초) 안에 분석된 결과가 있으면 이번 사전 분석은 건너뜀
+PREWARM_CODE_PATTERN = re.compile(r'\d{6}')  # 요청 빈도는 6자리 종목코드만 기록 (다른 경로가 사전 분석 대상이 되지 않도록)
+
+# 크롤링 방식: 'local'이면 요청을 처리하는 프로세스에서 직접 크롤링
+# 'queue'면 MongoDB 작업 큐에 등록하고 crawl_worker.py 작업자가 끝낼 때까지 최대 CRAWL_QUEUE_TIMEOUT초 대기
+CRAWL_MODE = os.environ.get('CRAWL_MODE', 'local')
+CRAWL_QUEUE_TIMEOUT = 300
+crawl_queue = crawl_worker.create_queue()
+
+# 여러 종목 일괄 분석 설정 (한 번에 받을 종목 수, 동시에 크롤링할 종목 수)
+BATCH_MAX_CODES = 50
+BATCH_CRAWL_CONCURRENCY = 4
+
+# 소스별 유사 중복 제거 설정 (MinHash 추정 자카드 유사도 기준값, 문자 n-gram 길이, MongoDB 저장 여부)
+# None이면 해당 소스는 유사 중복을 검사하지 않음
+# 메모리에는 종목/소스마다 최신 대표 NEAR_DUPLICATE_MAX_SIZE개, 전체 NEAR_DUPLICATE_MAX_ENTRIES개까지만 유지 (대표 하나에 약 400바이트)
+NEAR_DUPLICATE_MAX_SIZE = 5000
+NEAR_DUPLICATE_MAX_ENTRIES = 100000
+NEAR_DUPLICATE_SETTINGS = {
+    'comments': {'threshold': 0.8, 'ngram': 3, 'persist': True},
+    'news': {'threshold': 0.7, 'ngram': 4, 'persist': True},
+    'investing': {'threshold': 0.8, 'ngram': 3, 'persist': False},
+}
+near_duplicates = NearDuplicateStore(NEAR_DUPLICATE_SETTINGS, db.near_duplicates,
+                                     retention_days=comments_crawler.RETENTION_DAYS,
+                                     max_size=NEAR_DUPLICATE_MAX_SIZE, max_entries=NEAR_DUPLICATE_MAX_ENTRIES)
+
+# 댓글 금지어 목록 (파일을 수정하면 다음 필터링부터 반영)
+BLOCKLIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blocklist.txt')
+comment_filter = CommentFilter(BLOCKLIST_FILE, near_duplicates)
+
+# 스트리밍 분석: 필터를 통과한 문서를 STREAM_BATCH_SIZE개씩 감정 분석하고 결과는 바로 점수/키워드 누적기에 반영
+# 소스 전체의 문서/결과 목록을 만들지 않으므로 메모리는 종목의 글 수가 아니라 묶음 크기에 비례
+STREAM_BATCH_SIZE = 2000
+
+# 분석 단계 (작업 진행률 표시에 사용)
+ANALYSIS_STAGES = ['crawling', 'filtering', 'sentiment', 'keywords', 'scoring']
+
+# 분석 지표 (/metrics)
+# 단계 소요 시간의 source 라벨: 소스마다 따로 하는 단계(crawling, filtering, sentiment, keywords)는 소스 이름만,
+# 분석 전체에 한 번 하는 단계(ranking: 키워드 순위 계산, scoring, total)는 all만 사용
+STAGE_SECONDS = registry.histogram('analysis_stage_seconds', 'Time spent in each analysis stage', ['stage', 'source'])
+DOCUMENTS_KEPT = registry.counter('analysis_documents_kept_total', 'Documents that passed filtering', ['source'])
+ANALYSES_IN_FLIGHT = registry.gauge('analysis_in_flight', 'Stock analyses currently running')
+
+# 단계 소요 시간 기록 (timings를 넘기면 요청별 내역에도 {단계: {소스: ms}} 형태로 기록)
+def recordStage(stage, source, seconds, timings=None):
+    STAGE_SECONDS.observe(seconds, stage=stage, source=source)
+    if timings is not None:
+        timings.setdefault(stage, {})[source] = round(seconds * 1000, 1)
+
+@contextmanager
+def measureStage(stage, source='all', timings=None):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recordStage(stage, source, time.perf_counter() - started, timings)
+
+#크롤링 실행 함수 (댓글/뉴스/인베스팅을 동시에 크롤링)
+def crawlingWithStackCode(code, on_source_done=None, timings=None):
+    source_seconds = {}
+    if CRAWL_MODE == 'queue':
+        crawlWithWorkers(code, on_source_done, source_seconds)
     else:
-        documents = collection.find({'종목코드': code}, {'내용': 1, '_id': 0})
-
-    trash_keywords = ['국힘', '정의당', '민주당', '석열', '윤통', '국민의힘', '만진당', '노무현', '김건희', '예수', '문재인', '찢재', '재명', '2찍', '박정희']
-    filtered_documents = []
-    last_content = ''
-
-    for doc in documents:
-        content = doc.get('내용', '').strip()  # 앞뒤 공백 제거
-
-        # 중복 내용 필터링
-        if content == last_content:
-            continue  # 이전 내용과 동일한 경우 건너뜀
-
-
-        if check_empathy:
-
-            # # 키워드 필터링
-            if any(keyword in content for keyword in trash_keywords):
-                continue  # 불필요한 키워드가 포함된 내용은 건너뜀
-            empathy = int(doc.get('공감', 0))
-            antipathy = int(doc.get('비공감', 0))
-            # 공감/비공감 비율 필터링
-            if antipathy > 0 and empathy / (antipathy + 1) < 1:
-                continue  # 비공감이 공감보다 많거나 비슷한 경우 제외
-
-        filtered_documents.append(doc)
-        last_content = content
-
-
-    return filtered_documents
+        comments_crawler.crawl_all(code, on_source_done=on_source_done, timings=source_seconds)
+    for source, seconds in source_seconds.items():
+        recordStage('crawling', source, seconds, timings)
+
+# 작업 큐에 소스별 크롤링 작업을 등록하고 작업자가 끝낼 때까지 대기 (시간 안에 끝나지 않으면 지금까지 저장된 글로 진행)
+# 작업자가 가져온 페이지 수는 작업 문서에서 읽어 이 요청의 사용량으로 기록 (사전 분석 예산 계산용)
+def crawlWithWorkers(code, on_source_done=None, timings=None):
+    started = time.perf_counter()
+    task_sources = {crawl_queue.enqueue(code, source): source for source in comments_crawler.CRAWLERS}
+
+    def done(task_id, status):
+        source = task_sources[task_id]
+        if timings is not None:
+            timings[source] = time.perf_counter() - started
+        if on_source_done is not None:
+            on_source_done(source)
+
+    statuses = crawl_queue.wait(list(task_sources), CRAWL_QUEUE_TIMEOUT, done)
+    count_usage('pages', crawl_queue.fetched_pages(task_sources))
+    for task_id, source in task_sources.items():
+        if statuses.get(task_id) != 'done':
+            print(f"Crawl task for {code}/{source} ended with status {statuses.get(task_id)}")
+
+# 필터링에 필요한 필드만 조회
+FILTER_PROJECTION = {'내용': 1, '내용해시': 1, '날짜': 1, '_id': 0}
+
+# 필터링 대상 조회 조건
+def filterQuery(code, check_empathy=False, source=None):
+    query = {'종목코드': code}
+    if source in comments_crawler.RETENTION_DAYS:
+        query['날짜'] = {'$gte': comments_crawler.retention_threshold(source)}
+    if check_empathy:
+        # 공감 / (비공감 + 1) >= 1 인 글만 (비공감이 없거나 공감이 비공감보다 많은 글)
+        query['$or'] = [{'비공감': {'$lte': 0}}, {'$expr': {'$gt': ['$공감', '$비공감']}}]
+    return query
 
+#댓글 필터링 함수
+# 보관 기간과 공감/비공감 비율은 MongoDB 조회 조건으로 처리하고 (종목코드, 날짜) 인덱스 사용
+# 종목/소스 하나의 cursor를 하나씩 읽으면서 금지어/중복/유사 중복 검사 (통과한 문서를 하나씩 반환하는 generator)
+def sourceDocuments(code, source):
+    check_empathy = source == 'comments'
+    documents = source_collections[source].find(filterQuery(code, check_empathy, source), FILTER_PROJECTION).sort('날짜', -1)
+    return comment_filter.filter(documents, check_empathy, source, code)
+
+# 소스 하나를 cursor → 필터 → 묶음 → 감정 분석 → 누적 순서로 처리하고 필터를 통과한 문서 수 반환
+def streamSource(code, source, scores, keywords=None, on_results=None, timings=None):
+    return streamDocuments(sourceDocuments(code, source), source, scores, keywords, on_results, timings)
+
+# 필터를 통과한 문서를 묶음 단위로 감정 분석해서 scores(ScoreAccumulator)에 누적
+# keywords(KeywordAccumulator)를 넘기면 결과 문장도 누적, 단계별 시간은 묶음마다 나눠서 합산
+def streamDocuments(documents, source, scores, keywords=None, on_results=None, timings=None):
+    documents = iter(documents)
+    kept = 0
+    seconds = {'filtering': 0.0, 'sentiment': 0.0, 'keywords': 0.0}
+    while True:
+        started = time.perf_counter()
+        batch = list(islice(documents, STREAM_BATCH_SIZE))
+        seconds['filtering'] += time.perf_counter() - started
+        if not batch:
+            break
+        kept += len(batch)
+
+        started = time.perf_counter()
+        dates = [] if scores.half_life else None
+        results = analysisComments(batch, on_results, dates)
+        codes = sentiment_codes(results)
+        scores.add(source, codes, dates)
+        seconds['sentiment'] += time.perf_counter() - started
+
+        if keywords is not None:
+            started = time.perf_counter()
+            keywords.add([content for content, _ in results], codes, news=source == 'news')
+            seconds['keywords'] += time.perf_counter() - started
+
+    for stage, stage_seconds in seconds.items():
+        if stage != 'keywords' or keywords is not None:
+            recordStage(stage, source, stage_seconds, timings)
+    DOCUMENTS_KEPT.inc(kept, source=source)
+    return kept
+
+# 여러 종목의 같은 소스를 이어서 묶음 단위로 감정 분석 (묶음 안에서 종목 사이에 겹치는 문장은 한 번만 분석)
+# scores: 종목 순서대로의 ScoreAccumulator 목록, keywords(KeywordAccumulator)에는 종목 순서를 group으로 누적
+def streamGroups(codes, source, scores, keywords=None):
+    documents = ((group, doc) for group, code in enumerate(codes) for doc in sourceDocuments(code, source))
+    kept = 0
+    seconds = {'filtering': 0.0, 'sentiment': 0.0, 'keywords': 0.0}
+    while True:
+        started = time.perf_counter()
+        batch = list(islice(documents, STREAM_BATCH_SIZE))
+        seconds['filtering'] += time.perf_counter() - started
+        if not batch:
+            break
+        kept += len(batch)
+
+        # 묶음을 종목별로 나눔 (종목 순서대로 이어져 있음)
+        groups = []
+        document_groups = []
+        for group, doc in batch:
+            if not groups or groups[-1] != group:
+                groups.append(group)
+                document_groups.append([])
+            document_groups[-1].append(doc)
+
+        started = time.perf_counter()
+        grouped_results, grouped_dates = analysisCommentGroups(document_groups)
+        grouped_codes = [sentiment_codes(results) for results in grouped_results]
+        for group, codes, dates in zip(groups, grouped_codes, grouped_dates):
+            scores[group].add(source, codes, dates)
+        seconds['sentiment'] += time.perf_counter() - started
+
+        if keywords is not None:
+            started = time.perf_counter()
+            for group, results, codes in zip(groups, grouped_results, grouped_codes):
+                keywords.add([content for content, _ in results], codes, news=source == 'news', group=group)
+            seconds['keywords'] += time.perf_counter() - started
+
+    for stage, stage_seconds in seconds.items():
+        if stage != 'keywords' or keywords is not None:
+            recordStage(stage, source, stage_seconds)
+    DOCUMENTS_KEPT.inc(kept, source=source)
+    return kept
+
+
+# 감정 분석 전 문장 정리 (대괄호 내용 제거, 문장 종결 부호 추가)
+def cleanComment(content):
+    # 대괄호 내용 제거
+    while '[' in content:
+        start_index = content.find('[')
+        end_index = content.find(']', start_index + 1)
+        if start_index != -1 and end_index != -1:
+            # 대괄호와 내용 제거
+            content = content[:start_index] + content[end_index + 1:]
+        else:
+            # 만약 닫는 대괄호가 없다면, 열린 대괄호 이후 모든 내용 제거
+            content = content[:start_index]
+            break
+
+    # 문장 종결 부호 추가
+    if not content.endswith(('.', '!', '?')):
+        content += '.'
+
+    content += ' '
+    return content
 
 #긍부정 평가 함수
-def analysisComments(documents):
+# on_results(결과 목록)를 넘기면 캐시 결과와 API 묶음 결과가 나올 때마다 호출
+# row_dates(list)를 넘기면 결과 문장마다 원래 글의 날짜를 같은 순서로 추가
+def analysisComments(documents, on_results=None, row_dates=None):
+    comments = [cleanComment(doc.get('내용', '')) for doc in documents]
+    return collectResults(documents, comments, classifyComments(comments, on_results), row_dates)
+
+# 입력 순서대로 결과 구성
+def collectResults(documents, comments, classified, row_dates=None):
     results = []
-    comments = []
-
-    headers = {
-        'X-NCP-APIGW-API-KEY-ID': CLIENT_ID,
-        'X-NCP-APIGW-API-KEY': CLIENT_SECRET,
-        'Content-Type': 'application/json'
-    }
-
-    # 댓글을 25개씩 묶어 처리
-    for doc in documents:
-        content = doc.get('내용', '')
-
-        # 대괄호 내용 제거
-        while '[' in content:
-            start_index = content.find('[')
-            end_index = content.find(']', start_index + 1)
-            if start_index != -1 and end_index != -1:
-                # 대괄호와 내용 제거
-                content = content[:start_index] + content[end_index + 1:]
-            else:
-                # 만약 닫는 대괄호가 없다면, 열린 대괄호 이후 모든 내용 제거
-                content = content[:start_index]
-                break
-
-        # 문장 종결 부호 추가
-        if not content.endswith(('.', '!', '?')):
-            content += '.'
-
-        content += ' '
-        comments.append(content)
-
-        if len(comments) == 25:
-            results.extend(process_comments_batch(comments, headers))
-            comments = []  # Reset the batch after processing
-
-    # 처리 후 남은 댓글이 있다면 요청 보내기
-    if comments:
-        results.extend(process_comments_batch(comments, headers))
+    for doc, comment in zip(documents, comments):
+        rows = classified.get(comment, [])
+        results.extend(rows)
+        if row_dates is not None:
+            row_dates.extend([doc.get('날짜')] * len(rows))
 
     return results
 
-# 긍부정 분석 후 댓글 리스트 만드는 함수 [[내용,감정],[내용,감정]....]
-def process_comments_batch(comments, headers):
-    text = ' '.join(comments)
-    payload = {'content': text}
-    response = requests.post(API_URL, headers=headers, json=payload)
-    batch_results = []
-
-    if response.status_code == 200:
-        json_response = response.json()
-        for sentence in json_response['sentences']:
-            sentiment = sentence['sentiment']
-            batch_results.append([sentence['content'], sentiment])  # 구분자 제거 후 추가
-
-    return batch_results
-
-
-#특정한 감정의 글들을 모음
-def extract_keywords_for_sentiment(comments, sentiment, top_n, exclude_keywords):
-    if not comments:
-        return []
-
-    # 감정에 따른 코멘트 필터링
-    filtered_comments = [comment for comment, s in comments if s == sentiment]
-    if not filtered_comments:
-        return []
-
-    korean_stopwords = load_stopwords('stopword.txt')
-    # TF-IDF Vectorizer 객체 생성, 한국어 불용어 리스트 사용
-    tfidf = TfidfVectorizer(max_features=500, stop_words=korean_stopwords)
-
-    # 문장 리스트를 TF-IDF 행렬로 변환
-    tfidf_matrix = tfidf.fit_transform(filtered_comments)
-
-    # 각 단어의 TF-IDF 점수를 가져와서 정렬
-    feature_array = tfidf.get_feature_names_out()
-    tfidf_sorting = tfidf_matrix.sum(axis=0).A1.argsort()[::-1]
-
-    # 상위 n개의 키워드를 추출, 이미 추출된 키워드 제외
-    top_keywords = [feature_array[i] for i in tfidf_sorting if feature_array[i] not in exclude_keywords][:top_n]
-
-    return top_keywords
-
-#모아진 감정의 글에서 키워드를 추출
-def extract_keywords(comments, top_n):
-    if not comments:
-        return []
-
-    korean_stopwords = load_stopwords('stopword.txt')
-    # TF-IDF Vectorizer 객체 생성, 한국어 불용어 리스트 사용
-    tfidf = TfidfVectorizer(max_features=500, stop_words=korean_stopwords)
-
-    # 문장 리스트를 TF-IDF 행렬로 변환
-    tfidf_matrix = tfidf.fit_transform(comments)
-
-    # 각 단어의 TF-IDF 점수를 가져와서 정렬
-    feature_array = tfidf.get_feature_names_out()
-    tfidf_sorting = tfidf_matrix.sum(axis=0).A1.argsort()[::-1]
-
-    # 상위 n개의 키워드를 추출
-    top_keywords = [feature_array[i] for i in tfidf_sorting[:top_n]]
-
-    return top_keywords
-
-#감정 평가를 기준으로 점수를 산출
-def rankData(comments_results, news_results, investing_results):
-    # 데이터 소스 별 가중치 설정
-    weights = {
-        'comments': {'weight': 1, 'positive': 1.2, 'neutral': 1, 'negative': 0.8},
-        'news': {'weight': 4, 'positive': 1.3, 'neutral': 1, 'negative': 0.7},
-        'investing': {'weight': 2, 'positive': 1.2, 'neutral': 1, 'negative': 0.7}
+# 여러 문서 묶음을 한 번에 감정 분석 (묶음 사이에 겹치는 문장도 한 번만 분석)
+# 반환값: 묶음별 결과 목록, 묶음별 결과 문장의 글 날짜 목록
+def analysisCommentGroups(document_groups):
+    groups = [[cleanComment(doc.get('내용', '')) for doc in documents] for documents in document_groups]
+    classified = classifyComments([comment for comments in groups for comment in comments])
+    results = [[row for comment in comments for row in classified.get(comment, [])] for comments in groups]
+    dates = [[doc.get('날짜') for doc, comment in zip(documents, comments) for _ in classified.get(comment, [])]
+             for documents, comments in zip(document_groups, groups)]
+    return results, dates
+
+# 캐시에 있던 문장의 결과 행은 바로 on_results로 전달하고, 새로 분석한 묶음의 행을 전달하는 on_batch 콜백 반환
+def forwardResults(comments, cached, misses, on_results):
+    cached_rows = [row for comment in comments if comment in cached for row in cached[comment]]
+    if cached_rows:
+        on_results(cached_rows)
+    counts = Counter(comments)
+
+    def on_batch(indices, batch_results):
+        on_results([row for index, comment_results in zip(indices, batch_results)
+                    for _ in range(counts[misses[index]]) for row in comment_results])
+    return on_batch
+
+# 정리된 문장들의 감정 분석 결과를 {문장: [[내용,감정],...]}으로 반환
+def classifyComments(comments, on_results=None):
+    # 캐시에 없는 문장만 분석 (API는 글자 수 기준으로 묶어 동시에 요청, SENTIMENT_MODE에 따라 로컬 모델 사용)
+    cached = sentiment_cache.get_many(comments)
+    misses = list(dict.fromkeys(comment for comment in comments if comment not in cached))
+
+    on_batch = forwardResults(comments, cached, misses, on_results) if on_results is not None else None
+    new_results, api_results = splitClassified(misses, *process_comments_batch(misses, on_batch))
+    sentiment_cache.put_many(api_results)  # 로컬 모델 결과는 캐시하지 않음 (캐시는 모델 학습 데이터로도 사용)
+    cached.update(new_results)
+    return cached
+
+# 분석 결과 -> ({문장: 결과}, 그중 API 결과만), 재시도 후에도 실패한 문장은 제외
+def splitClassified(comments, results, from_api):
+    new_results = {}
+    api_results = {}
+    for comment, comment_results, confirmed in zip(comments, results, from_api):
+        if comment_results is None:
+            continue
+        new_results[comment] = comment_results
+        if confirmed:
+            api_results[comment] = comment_results
+    return new_results, api_results
+
+# 긍부정 분석 후 댓글별 결과 리스트를 만드는 함수 [[[내용,감정],...], [[내용,감정],...], ...]
+# 실패한 묶음의 댓글은 None, 함께 댓글별 API 결과 여부를 반환
+def process_comments_batch(comments, on_batch=None):
+    return sentiment_classifier.classify(comments, on_batch)
+
+
+# 전역 문서 빈도가 충분히 쌓였으면 idf 조회 함수, 아니면 None (요청 안의 문장으로 계산)
+def keywordIdf():
+    return document_frequencies.idf if document_frequencies.total_documents() >= IDF_MIN_DOCUMENTS else None
+
+# 하나의 말뭉치에서 전체/뉴스/감정별 키워드를 한 번에 계산
+# rows: 종목의 전체 문장(뉴스+인베스팅), news_rows: 그중 뉴스 문장, sentiments: 문장별 감정 배열
+def rankKeywords(corpus, rows, news_rows, sentiments):
+    news_keywords = corpus.top_keywords(news_rows, 10)
+    return {
+        'positive': corpus.top_keywords(rows & (sentiments == 'positive'), 5, news_keywords),
+        'neutral': corpus.top_keywords(rows & (sentiments == 'neutral'), 5, news_keywords),
+        'negative': corpus.top_keywords(rows & (sentiments == 'negative'), 5, news_keywords),
+        'total': corpus.top_keywords(rows, 10),
+        'news': news_keywords
     }
 
-    # 최소 및 최대 점수 계산
-    min_score = 0
-    max_score = 0
-
-    # 각 결과의 가능한 최소 및 최대 점수 계산
-    for key, values in weights.items():
-        min_sentiment_weight = min(values['positive'], values['neutral'], values['negative'])
-        max_sentiment_weight = max(values['positive'], values['neutral'], values['negative'])
-        min_score += len(eval(key + '_results')) * values['weight'] * min_sentiment_weight
-        max_score += len(eval(key + '_results')) * values['weight'] * max_sentiment_weight
-
-    total_score = 0
-
-    # 각 데이터 소스를 순회하며 점수 계산
-    for result, source in [(comments_results, 'comments'), (news_results, 'news'), (investing_results, 'investing')]:
-        source_weight = weights[source]["weight"]
-        for content, sentiment in result:
-            sentiment_weight = weights[source][sentiment]
-            total_score += source_weight * sentiment_weight
-
-    # 점수 정규화 (0에서 100 사이)
-    normalized_score = int(100 * (total_score - min_score) / (max_score - min_score)) if max_score != min_score else 0
-
-    return normalized_score
-
-
-# 각 결과에 대해 감정의 수를 세는 함수
-def count_sentiments(results):
-    sentiment_counter = Counter([result[1] for result in results])
-    return {'positive': sentiment_counter['positive'], 'neutral': sentiment_counter['neutral'], 'negative': sentiment_counter['negative']}
-
 # 파일을 읽고 각 줄을 리스트로 변환하는 함수
 def load_stopwords(filename):
     with open(filename, 'r', encoding='utf-8') as file:
         stopwords = [line.strip() for line in file.readlines()]
     return stopwords
 
+# 불용어는 서버 시작 시 한 번만 읽음
+STOPWORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stopword.txt')
+STOPWORDS = frozenset(load_stopwords(STOPWORD_FILE))
+
+# 전체 종목에서 누적한 문서 빈도 (키워드 idf 계산용)
+# 크롤링으로 새 글이 저장될 때마다 갱신하고, 백그라운드 스레드가 crawl_worker.IDF_SYNC_INTERVAL초마다
+#   (crawl_worker.IDF_SAVE_EVERY개 문서가 쌓이면 바로) / 서버 종료 시 MongoDB에 합침
+# crawl_worker 작업자도 같은 컬렉션에 합치고, 서버는 같은 스레드에서 crawl_worker.IDF_SYNC_INTERVAL초마다 전체 빈도를 다시 읽음
+# 누적 문서가 IDF_MIN_DOCUMENTS개 미만이면 요청 안의 문장으로 idf를 계산, 문서 빈도가 IDF_MIN_DF 미만인 단어는 키워드에서 제외
+IDF_MIN_DOCUMENTS = 1000
+IDF_MIN_DF = 2
+document_frequencies = crawl_worker.create_document_frequencies(STOPWORDS, IDF_MIN_DF)
+comments_crawler.record_listeners.append(
+    lambda source, records: document_frequencies.add_documents([record['내용'] for record in records])
+)
+atexit.register(document_frequencies.flush)
+
 
 
 
@@ -230,39 +449,265 @@ def favicon():
 
 @app.route('/<title>', methods=['GET'])
 def analysis(title):
-    #종목코드를 바탕으로 크롤링 진행
-    crawlingWithStackCode(title)
-
-    #DB를 읽어와 쓸모있는 댓글 리스트를 구성
-     # comments 컬렉션은 공감/비공감 비율을 확인
-    comments_data = filteringComments(title, collection_comments, check_empathy=True)
-     # news와 investing 컬렉션은 기본 필터링만 수행
-    news_data = filteringComments(title, collection_news)
-    investing_data = filteringComments(title, collection_investing)
-
-    # 분석 결과를 각각 처리
-    comments_results = analysisComments(comments_data)
-    news_results = analysisComments(news_data)
-    investing_results = analysisComments(investing_data)
-
-    all_results = news_results + investing_results
-
-    # 감정별 키워드 추출
-
-    general_keywords = extract_keywords([comment for comment, _ in all_results], 10)
-    news_keywords = extract_keywords([comment for comment, _ in news_results], 10)
-
-    keywords_positive = extract_keywords_for_sentiment(all_results, 'positive', 5, news_keywords)
-    keywords_neutral = extract_keywords_for_sentiment(all_results, 'neutral', 5, news_keywords)
-    keywords_negative = extract_keywords_for_sentiment(all_results, 'negative', 5, news_keywords)
-
-    # 분석 내용을 바탕으로 점수 산출
-    total_score = rankData(comments_results, news_results, investing_results)
-
-    # 결과에서 감정 개수 계산
-    comments_sentiments = count_sentiments(comments_results)
-    news_sentiments = count_sentiments(news_results)
-    investing_sentiments = count_sentiments(investing_results)
+    # 같은 종목을 동시에 요청하면 분석은 한 번만 실행하고 결과를 함께 사용
+    recordRequest(title)
+    if request.args.get('timings') not in ('1', 'true'):
+        return jsonify(result_cache.get(title, lambda: analyzeStock(title)))
+
+    # ?timings=1이면 단계/소스별 소요 시간(ms)을 함께 반환 (이 요청에서 분석하지 않고 캐시를 받았으면 {'cached': True})
+    timings = {}
+    request_thread = threading.get_ident()
+    payload = result_cache.get(title, lambda: analyzeStock(
+        title, timings=timings if threading.get_ident() == request_thread else None
+    ))
+    return jsonify({**payload, 'timings': timings or {'cached': True}})
+
+
+# 작업 큐에서 실행하는 분석 (결과 캐시를 함께 사용)
+def runAnalysisJob(code, progress):
+    return result_cache.get(code, lambda: analyzeStock(code, progress))
+
+analysis_jobs = JobQueue(runAnalysisJob, ANALYSIS_STAGES, JOB_WORKERS, JOB_QUEUE_DEPTH, JOB_RETENTION)
+
+
+# 분석 작업 등록 후 작업 ID를 바로 반환
+@app.route('/analyze/<code>', methods=['POST'])
+def submitAnalysis(code):
+    recordRequest(code)
+    try:
+        job = analysis_jobs.submit(code)
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify(analysis_jobs.describe(job)), 202
+
+
+# 작업 상태/진행률 조회, 완료되면 analysis()와 같은 형식의 결과 포함
+@app.route('/jobs/<job_id>', methods=['GET'])
+def jobStatus(job_id):
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'job not found'}), 404
+    return jsonify(analysis_jobs.describe(job))
+
+
+# 인기 종목 사전 분석 (방금 분석된 결과가 있으면 건너뜀)
+def prewarmStock(code):
+    age = result_cache.age(code)
+    if age is not None and age < PREWARM_SKIP_AGE:
+        return
+    result_cache.refresh(code, lambda: analyzeStock(code))
+
+prewarm_scheduler = PrewarmScheduler(
+    prewarmStock,
+    watchlist=PREWARM_WATCHLIST,
+    max_codes=PREWARM_MAX_CODES,
+    min_score=PREWARM_MIN_SCORE,
+    half_life=PREWARM_HALF_LIFE,
+    min_interval=PREWARM_MIN_INTERVAL,
+    max_interval=PREWARM_MAX_INTERVAL,
+    pages_per_minute=PREWARM_PAGES_PER_MINUTE,
+    api_calls_per_minute=PREWARM_API_CALLS_PER_MINUTE,
+    enabled=PREWARM_ENABLED
+)
+
+# 사전 분석 대상 선정을 위한 요청 빈도 기록 (6자리 종목코드가 아니면 무시)
+def recordRequest(code):
+    if PREWARM_CODE_PATTERN.fullmatch(code):
+        prewarm_scheduler.record(code)
+
+
+# 다른 객체가 따로 모으고 있는 통계를 조회 시점에 지표로 변환
+def collectServiceMetrics():
+    families = []
+    families += stats_families('sentiment_api', sentiment_dispatcher.stats(), 'Sentiment API dispatcher',
+                               counters=('requests', 'retries', 'errors', 'failed_batches', 'batches'))
+    families += stats_families('sentiment_classifier', sentiment_classifier.stats(), 'Sentiment classifier',
+                               counters=('local', 'api', 'fallback', 'local_seconds'))
+    families += stats_families('sentiment_cache', sentiment_cache.stats(), 'Sentiment cache',
+                               counters=('memory_hits', 'mongo_hits', 'misses', 'evictions'))
+    families += stats_families('result_cache', result_cache.stats(), 'Analysis result cache',
+                               counters=('hits', 'stale_hits', 'misses', 'coalesced'))
+    families += stats_families('analysis_jobs', analysis_jobs.stats(), 'Analysis job queue')
+    families.append(('crawl_tasks', 'gauge', 'Crawl tasks in the Mongo task queue by status',
+                     [({'status': status}, count) for status, count in crawl_queue.stats().items()]))
+    families += stats_families('prewarm', prewarm_scheduler.stats(), 'Prewarm scheduler',
+                               counters=('refreshes', 'failures', 'budget_waits'))
+    families.append(('comment_filter_dropped_total', 'counter', 'Documents dropped by the comment filter',
+                     [({'reason': reason}, count) for reason, count in sorted(comment_filter.stats().items())]))
+    families.append(('idf_documents', 'gauge', 'Documents counted in the global IDF store',
+                     [({}, document_frequencies.total_documents())]))
+    return families
+
+registry.add_collector(collectServiceMetrics)
+
+
+# Prometheus 형식 지표 (단계별 소요 시간, 크롤링/필터링/감정 분석 집계, 진행 중인 작업 수, 캐시 통계)
+@app.route('/metrics', methods=['GET'])
+def exportMetrics():
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class AnalysisCancelled(Exception):
+    pass
+
+
+# 스트리밍 분석: 단계별 진행 상황과 중간 결과를 이벤트로 전송 (format=ndjson이면 줄 단위 JSON, 기본은 SSE)
+@app.route('/<title>/stream', methods=['GET'])
+def analysisStream(title):
+    recordRequest(title)
+    if request.args.get('format') == 'ndjson':
+        encode = lambda event, data: json.dumps({'event': event, **data}, ensure_ascii=False) + '\n'
+        mimetype = 'application/x-ndjson'
+    else:
+        encode = lambda event, data: f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        mimetype = 'text/event-stream'
+
+    def generate():
+        for event, data in streamAnalysisEvents(title):
+            yield encode(event, data)
+
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={'Cache-Control': 'no-cache'})
+
+
+# 스트림이 시작한 분석의 진행 상황을 구독 중인 스트림들에 전달 (종목코드 -> 이벤트 큐 목록)
+analysis_subscribers = {}
+analysis_subscribers_lock = threading.Lock()
+
+def subscribeAnalysis(title):
+    events = queue.Queue()
+    with analysis_subscribers_lock:
+        analysis_subscribers.setdefault(title, []).append(events)
+    return events
+
+def unsubscribeAnalysis(title, events):
+    with analysis_subscribers_lock:
+        subscribers = analysis_subscribers.get(title, [])
+        if events in subscribers:
+            subscribers.remove(events)
+        if not subscribers:
+            analysis_subscribers.pop(title, None)
+
+# 단계와 중간 결과를 구독 중인 스트림에 전달하는 progress 함수 (감정 결과 묶음은 누적 개수와 잠정 점수로 바꿔서 전달)
+# 구독 중인 스트림도, 결과를 기다리는 다른 요청도 없으면 다음 단계에서 분석을 중단 (result_cache.abandon으로 확인)
+def publishAnalysisProgress(title):
+    partial = ScoreAccumulator()
+    lock = threading.Lock()
+
+    def progress(stage, **data):
+        if stage == 'sentiment_batch':
+            with lock:
+                partial.add(data['source'], sentiment_codes(data['results']))
+                stage, data = 'sentiment_progress', {
+                    'source': data['source'],
+                    'sentiment_count': partial.counts_by_source(),
+                    'provisional_score': partial.score()
+                }
+        with analysis_subscribers_lock:
+            subscribers = list(analysis_subscribers.get(title, ()))
+        if not subscribers and result_cache.abandon(title):
+            raise AnalysisCancelled()
+        for events in subscribers:
+            events.put((stage, data))
+    return progress
+
+# (이벤트 이름, 데이터)를 차례로 생성
+# 분석은 결과 캐시에 등록해서 백그라운드 스레드에서 실행하므로 같은 종목의 다른 요청(일반/스트림)은 같은 분석에 합류
+# 이미 다른 요청이 분석 중이면 그 분석에 합류 (스트림이 시작한 분석이면 합류한 뒤의 진행 상황도 받음)
+# 클라이언트 연결이 끊겨 제너레이터가 닫히고 기다리는 요청도 없으면 다음 단계에서 분석을 중단
+# 구독하는 사이에 중단된 분석에 합류했으면 새 분석을 시작
+def streamAnalysisEvents(title):
+    cached = result_cache.peek(title)
+    if cached is not None:
+        yield 'result', cached
+        return
+
+    events = subscribeAnalysis(title)
+    try:
+        started = False
+        while True:
+            future, _ = result_cache.start(title, lambda: analyzeStock(title, publishAnalysisProgress(title)))
+            future.add_done_callback(lambda _: events.put(None))
+            if not started:
+                yield 'started', {'code': title}
+                started = True
+            while True:
+                item = events.get()
+                if item is None:
+                    break
+                yield item
+            try:
+                payload = future.result()
+            except AnalysisCancelled:
+                continue
+            except Exception as e:
+                yield 'error', {'error': str(e)}
+                return
+            yield 'result', payload
+            return
+    finally:
+        unsubscribeAnalysis(title, events)
+
+
+# 종목 분석 전체 과정 (크롤링 → 필터링 → 감정 분석 → 키워드 → 점수)
+# progress(stage, **data)를 넘기면 단계가 시작될 때와 중간 결과가 나올 때마다 호출
+# timings(dict)를 넘기면 단계/소스별 소요 시간(ms)을 기록
+def analyzeStock(title, progress=None, timings=None):
+    progress = progress or (lambda stage, **data: None)
+
+    with ANALYSES_IN_FLIGHT.track_inflight(), measureStage('total', timings=timings):
+        #종목코드를 바탕으로 크롤링 진행
+        progress('crawling')
+        crawlingWithStackCode(title, lambda source: progress(
+            'crawled', source=source, count=source_collections[source].count_documents({'종목코드': title})
+        ), timings)
+
+        #DB를 읽어와 쓸모있는 댓글을 묶음 단위로 감정 분석 (필터링과 감정 분석은 묶음마다 번갈아 진행)
+        # 점수와 감정 개수, 키워드용 뉴스/인베스팅 문장만 누적하고 문서/결과 목록은 묶음이 끝나면 버림
+        progress('filtering')
+        scores = ScoreAccumulator(SCORE_HALF_LIFE_HOURS)
+        keyword_rows = KeywordAccumulator(STOPWORDS)
+        counts = {}
+        progress('sentiment')
+        for source in ('comments', 'news', 'investing'):  # 키워드 누적기에는 뉴스를 먼저 추가
+            counts[source] = streamSource(
+                title, source, scores, keyword_rows if source != 'comments' else None,
+                lambda results, source=source: progress('sentiment_batch', source=source, results=results), timings
+            )
+        progress('filtered', counts=counts)
+
+        # 감정별 키워드 추출
+        progress('keywords')
+        with measureStage('ranking', timings=timings):
+            keywords = rankAccumulatedKeywords(keyword_rows)
+
+        # 분석 내용을 바탕으로 점수 산출
+        progress('scoring')
+        with measureStage('scoring', timings=timings):
+            payload = analysisPayload(scores, keywords)
+            saveScoreHistory(title, payload)
+            return payload
+
+
+# 누적한 문장으로 감정별 키워드 추출 (전체 문장을 한 번만 벡터화)
+def rankAccumulatedKeywords(keyword_rows):
+    return rankKeywordGroups(keyword_rows, [None])[0]
+
+# 여러 종목의 문장을 한 번만 벡터화하고 종목(group)별 행 마스크로 감정별 키워드 추출 (group이 None이면 전체 문장)
+def rankKeywordGroups(keyword_rows, groups):
+    corpus = keyword_rows.corpus(idf=keywordIdf())
+    sentiments = np.asarray(SENTIMENTS)[np.frombuffer(keyword_rows.codes, dtype=np.int8)]
+    news_rows = keyword_rows.news_rows()
+    keywords = []
+    for group in groups:
+        rows = keyword_rows.group_rows(group) if group is not None else np.ones(corpus.size, dtype=bool)
+        keywords.append(rankKeywords(corpus, rows, rows & news_rows, sentiments))
+    return keywords
+
+
+# 누적한 점수와 감정 개수로 응답 구성
+def analysisPayload(scores, keywords):
+    total_score = scores.score()
+    counts = scores.counts_by_source()
 
     if total_score < 35:
         total_sentiment = 'negative'
@@ -271,35 +716,92 @@ def analysis(title):
     else:
         total_sentiment = 'positive'
 
-    return jsonify({
+    return {
         'total_sentiment': total_sentiment,
         'sentiment_count': {
-            'positive': {
-                'comments': comments_sentiments['positive'],
-                'news': news_sentiments['positive'],
-                'investing': investing_sentiments['positive']
-            },
-            'neutral': {
-                'comments': comments_sentiments['neutral'],
-                'news': news_sentiments['neutral'],
-                'investing': investing_sentiments['neutral']
-            },
-            'negative': {
-                'comments': comments_sentiments['negative'],
-                'news': news_sentiments['negative'],
-                'investing': investing_sentiments['negative']
-            }
+            sentiment: {source: counts[source][sentiment] for source in ('comments', 'news', 'investing')}
+            for sentiment in ('positive', 'neutral', 'negative')
         },
         'total_score': total_score,
-        'keywords': {
-            'positive': keywords_positive,
-            'neutral': keywords_neutral,
-            'negative': keywords_negative,
-            'total': general_keywords,
-            'news': news_keywords
-        }
-    })
+        'keywords': keywords
+    }
+
+
+# 여러 종목 일괄 분석: {"codes": [...]} 또는 ?codes=a,b → {종목코드: analysis()와 같은 형식}
+# GET은 종목 분석(/<title>)으로 넘어가지 않도록 405로 응답
+@app.route('/batch', methods=['GET', 'POST'])
+def batchAnalysis():
+    if request.method == 'GET':
+        return jsonify({'error': 'use POST /batch'}), 405, {'Allow': 'POST'}
+    body = request.get_json(silent=True) or {}
+    codes = body.get('codes')
+    if codes is None and request.args.get('codes'):
+        codes = request.args['codes'].split(',')
+    if not isinstance(codes, list) or not all(isinstance(code, str) and code.strip() for code in codes):
+        return jsonify({'error': 'codes must be a non-empty list of stock codes'}), 400
+    codes = list(dict.fromkeys(code.strip() for code in codes))
+    if not codes or len(codes) > BATCH_MAX_CODES:
+        return jsonify({'error': f'between 1 and {BATCH_MAX_CODES} codes are allowed'}), 400
+    for code in codes:
+        recordRequest(code)
+    return jsonify(analyzeStocks(codes))
+
+
+# 여러 종목 분석 (결과 캐시 기준은 analysis()와 같음: 신선한/오래된 결과는 그대로 사용, 다른 요청이 분석 중이면 합류)
+# 나머지 종목만 analyzeStockGroup으로 한 번에 분석
+def analyzeStocks(codes):
+    return result_cache.get_many(codes, analyzeStockGroup, analyzeStock)
+
+# 여러 종목을 하나의 파이프라인으로 분석 → {종목코드: 결과}
+# 크롤링은 종목 단위로 동시에, 감정 분석은 소스마다 전체 종목의 문서를 이어서 묶음 단위로(묶음 안에서 중복 제거),
+# 점수는 종목별 누적기에, 키워드용 문장은 종목 번호와 함께 하나의 누적기에 모은 뒤 한 번만 벡터화해서 종목별 행 마스크로 계산
+# analyzeStock과 마찬가지로 문서/결과 목록은 묶음이 끝나면 버림
+def analyzeStockGroup(pending):
+    with ThreadPoolExecutor(max_workers=BATCH_CRAWL_CONCURRENCY) as executor:
+        list(executor.map(crawlingWithStackCode, pending))
+
+    scores = [ScoreAccumulator(SCORE_HALF_LIFE_HOURS) for _ in pending]
+    keyword_rows = KeywordAccumulator(STOPWORDS)
+    for source in ('comments', 'news', 'investing'):  # 키워드 누적기에는 종목마다 뉴스를 먼저 추가
+        streamGroups(pending, source, scores, keyword_rows if source != 'comments' else None)
+
+    with measureStage('ranking'):
+        keywords = rankKeywordGroups(keyword_rows, range(len(pending)))
+
+    payloads = {}
+    for code, code_scores, code_keywords in zip(pending, scores, keywords):
+        payloads[code] = analysisPayload(code_scores, code_keywords)
+        saveScoreHistory(code, payloads[code])
+    return payloads
+
+
+# 분석 점수를 이력에 저장 (실패해도 분석 결과는 그대로 반환)
+def saveScoreHistory(code, payload):
+    try:
+        score_history.record(code, payload['total_score'], payload['sentiment_count'])
+    except Exception as e:
+        print(f"An error occurred while saving score history: {e}")
+
+
+# 점수 이력: ?interval=hour|day&days=7 → 미리 집계한 구간별 평균/최저/최고/마지막 점수와 감정 개수 (크롤링/감정 분석 없이 조회만)
+@app.route('/history/<code>', methods=['GET'])
+def scoreHistory(code):
+    interval = request.args.get('interval', 'hour')
+    if interval not in ROLLUP_UNITS:
+        return jsonify({'error': f"interval must be one of {', '.join(ROLLUP_UNITS)}"}), 400
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        days = None  # 숫자가 아니면 기본값 대신 400
+    if days is None or not 1 <= days <= SCORE_HISTORY_MAX_DAYS:
+        return jsonify({'error': f'days must be between 1 and {SCORE_HISTORY_MAX_DAYS}'}), 400
+    since = datetime.now() - timedelta(days=days)
+    return jsonify({'code': code, 'interval': interval, 'history': score_history.history(code, interval, since)})
+
+
 def main():
+    document_frequencies.start()  # 전체 문서 빈도를 읽고 이후 주기적으로 다시 읽음 (요청 처리 중에는 읽지 않음)
+    prewarm_scheduler.start()  # watchlist가 있으면 바로 사전 분석 시작 (다른 WSGI 서버에서는 첫 요청 때 시작)
     app.run(host='localhost', debug=False, port=5000)
 
 if __name__ == '__main__':
@@ -0,0 +1,171 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pymongo import MongoClient, UpdateOne
+import argparse
+import csv
+import os
+import threading
+
+
+# 인베스팅 종목 경로 정리 ('samsung-electronics-co-ltd' -> '/equities/samsung-electronics-co-ltd', 토론 주소 접미사 제거)
+def normalize_slug(slug):
+    slug = slug.strip().rstrip('/')
+    if slug.endswith('-commentary'):
+        slug = slug[:-len('-commentary')]
+    if not slug.startswith('/'):
+        slug = f'/equities/{slug}'
+    return slug
+
+
+# CSV 파일 (종목코드, 슬러그, 회사명 열) -> [(종목코드, 슬러그, 회사명), ...]
+# 머리글이 있으면 code/slug/name 또는 종목코드/슬러그/회사명 열 이름을 사용
+def read_symbol_file(path):
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        rows = list(csv.reader(file))
+    if rows and rows[0] and not rows[0][0].strip().isdigit():
+        header = [column.strip().lower() for column in rows.pop(0)]
+        columns = [next((header.index(name) for name in names if name in header), None)
+                   for names in (('code', '종목코드'), ('slug', '슬러그'), ('name', '회사명'))]
+    else:
+        columns = [0, 1, 2]
+    symbols = []
+    for row in rows:
+        values = [row[column].strip() if column is not None and column < len(row) else '' for column in columns]
+        if values[0] and values[1]:
+            symbols.append((values[0], normalize_slug(values[1]), values[2] or None))
+    return symbols
+
+
+# 종목코드 -> 인베스팅 종목 경로(슬러그) 저장소 (MongoDB 컬렉션 + 메모리)
+# 시작할 때 컬렉션 전체를 메모리에 올려두고, 없는 종목만 resolve(종목코드) -> (슬러그, 회사명)로 검색해 저장
+# 토론 페이지가 404면 refresh()로 다시 검색 (다른 스레드/프로세스가 이미 갱신했으면 그 값을 사용)
+# 같은 슬러그를 refresh_interval 안에 다시 확인하지는 않음 (마지막 페이지 뒤의 404 등으로 검색이 반복되지 않도록)
+class SymbolRegistry:
+    def __init__(self, collection, resolve, refresh_interval=timedelta(minutes=10)):
+        self.collection = collection
+        self.resolve = resolve
+        self.refresh_interval = refresh_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._code_locks = defaultdict(threading.Lock)
+        self._counters = defaultdict(int)
+
+        self.collection.create_index('종목코드', unique=True)
+        self.reload()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _code_lock(self, code):
+        with self._lock:
+            return self._code_locks[code]
+
+    @staticmethod
+    def _entry(doc):
+        return {'슬러그': doc['슬러그'], '회사명': doc.get('회사명'), '확인시각': doc.get('확인시각')}
+
+    def _remember(self, doc):
+        with self._lock:
+            self._entries[doc['종목코드']] = self._entry(doc)
+
+    # 컬렉션 전체를 메모리로 다시 읽음
+    def reload(self):
+        entries = {doc['종목코드']: self._entry(doc) for doc in self.collection.find({}, {'_id': 0})}
+        with self._lock:
+            self._entries = entries
+        return len(entries)
+
+    # 여러 종목을 한 번에 저장 (파일에서 읽은 목록 등), 저장한 종목 수 반환
+    # 검색으로 확인한 값이 아니므로 확인시각은 비워 둠 (처음 404가 나면 바로 다시 검색)
+    def bulk_load(self, symbols):
+        operations = []
+        for code, slug, name in symbols:
+            doc = {'종목코드': code, '슬러그': normalize_slug(slug), '회사명': name, '확인시각': None}
+            operations.append(UpdateOne({'종목코드': code}, {'$set': doc}, upsert=True))
+            self._remember(doc)
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    def _search(self, code):
+        self._count('searches')
+        found = self.resolve(code)
+        if not found:
+            return None
+        slug, name = found
+        doc = {'종목코드': code, '슬러그': normalize_slug(slug), '회사명': name, '확인시각': datetime.now()}
+        self.collection.update_one({'종목코드': code}, {'$set': doc}, upsert=True)
+        self._remember(doc)
+        return doc['슬러그']
+
+    # 메모리에 있는 경로만 반환 (없으면 None, 검색하지 않음)
+    def cached(self, code):
+        with self._lock:
+            entry = self._entries.get(code)
+        if entry is None:
+            return None
+        self._count('hits')
+        return entry['슬러그']
+
+    # 종목의 인베스팅 경로 (처음 보는 종목이면 검색, 찾지 못하면 None)
+    def get(self, code):
+        with self._lock:
+            entry = self._entries.get(code)
+        if entry is not None:
+            self._count('hits')
+            return entry['슬러그']
+        with self._code_lock(code):
+            with self._lock:
+                entry = self._entries.get(code)
+            if entry is not None:
+                return entry['슬러그']
+            self._count('misses')
+            return self._search(code)
+
+    # stale_slug로 요청한 페이지가 없을 때 호출, 새 경로 반환 (그대로면 같은 값)
+    def refresh(self, code, stale_slug):
+        with self._code_lock(code):
+            doc = self.collection.find_one({'종목코드': code}, {'_id': 0})
+            if doc is not None:
+                self._remember(doc)
+                if doc['슬러그'] != stale_slug:
+                    return doc['슬러그']
+                verified = doc.get('확인시각')
+                if verified is not None and datetime.now() - verified < self.refresh_interval:
+                    return stale_slug
+            self._count('refreshes')
+            return self._search(code) or stale_slug
+
+    def name(self, code):
+        with self._lock:
+            entry = self._entries.get(code)
+        return entry['회사명'] if entry else None
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'searches': counters.get('searches', 0),
+            'refreshes': counters.get('refreshes', 0),
+            'size': size,
+        }
+
+
+# 종목 목록 파일을 심볼 컬렉션에 한 번에 저장
+def main():
+    parser = argparse.ArgumentParser(description='인베스팅 종목 경로 일괄 등록 (CSV: 종목코드,슬러그,회사명)')
+    parser.add_argument('path')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+    args = parser.parse_args()
+
+    registry = SymbolRegistry(MongoClient(args.mongo_uri)['stock_data'].investing_symbols, lambda code: None)
+    count = registry.bulk_load(read_symbol_file(args.path))
+    print(f"Loaded {count} symbols into investing_symbols")
+
+
+if __name__ == '__main__':
+    main()